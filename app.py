@@ -1,10 +1,16 @@
-from flask import Flask, request, jsonify
+import hmac
+import io
+import json
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from config import Config
 from database import Database
 from whatsapp_service import WhatsAppService
 from task_parser import TaskParser
+from intent_classifier import IntentClassifier
 from scheduler import ReminderScheduler
+from wake_signal import WakeSender
+from bulk_import import BulkImporter, detect_format, read_rows
 
 app = Flask(__name__)
 CORS(app)
@@ -14,10 +20,18 @@ app.config.from_object(Config)
 database = Database()
 whatsapp_service = WhatsAppService()
 task_parser = TaskParser()
-reminder_scheduler = ReminderScheduler(database, whatsapp_service)
+intent_classifier = IntentClassifier()
 
-# Start the background scheduler
-reminder_scheduler.start()
+if Config.DISPATCHER_MODE == 'external':
+    # Reminders are sent by dispatcher.py; just tell it about near-term tasks
+    reminder_scheduler = None
+    database.add_task_listener(
+        WakeSender(Config.DISPATCHER_WAKE_ADDRESS, Config.REMINDER_RESYNC_MINUTES * 60).notify
+    )
+else:
+    # Start the background scheduler
+    reminder_scheduler = ReminderScheduler(database, whatsapp_service)
+    reminder_scheduler.start()
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
@@ -38,8 +52,16 @@ def webhook():
         
         print(f"📨 Received message from {from_number}: {incoming_msg}")
         
+        # Triage before parsing so chatter never costs an LLM call
+        triage = intent_classifier.classify(incoming_msg)
+        command = triage.get('command')
+        
+        if triage['intent'] == 'chatter':
+            whatsapp_service.send_message(from_number, intent_classifier.reply(triage))
+            return jsonify({"status": "success", "intent": "chatter"}), 200
+        
         # Handle special commands
-        if incoming_msg.lower() in ['help', 'start']:
+        if triage['intent'] == 'command' and command != 'list':
             help_message = """👋 Welcome to WhatsApp Reminder Bot!
 
 Send me a message like:
@@ -51,14 +73,17 @@ I'll understand when you want to be reminded and send you a notification at the
             whatsapp_service.send_message(from_number, help_message)
             return jsonify({"status": "success"}), 200
         
-        if incoming_msg.lower() == 'list':
-            tasks = database.get_user_tasks(from_number)
+        if command == 'list':
+            # WhatsApp has no buttons to page with: show the next few, say if there are more
+            tasks = database.get_user_tasks(from_number, limit=Config.LIST_PAGE_SIZE + 1)
             if not tasks:
                 whatsapp_service.send_message(from_number, "📋 You have no pending reminders.")
             else:
                 task_list = "📋 Your pending reminders:\n\n"
-                for i, task in enumerate(tasks, 1):
+                for i, task in enumerate(tasks[:Config.LIST_PAGE_SIZE], 1):
                     task_list += f"{i}. {task.task_description}\n   ⏰ {task.reminder_time.strftime('%A, %B %d at %I:%M %p')}\n\n"
+                if len(tasks) > Config.LIST_PAGE_SIZE:
+                    task_list += f"…and {database.count_pending_tasks(from_number) - Config.LIST_PAGE_SIZE} more."
                 whatsapp_service.send_message(from_number, task_list)
             return jsonify({"status": "success"}), 200
         
@@ -96,7 +121,7 @@ I'll understand when you want to be reminded and send you a notification at the
             "task_id": task.id,
             "confidence": parsed_data.get('confidence', 'medium')
         }), 200
-        
+    
     except Exception as e:
         print(f"❌ Error processing webhook: {e}")
         try:
@@ -112,32 +137,99 @@ I'll understand when you want to be reminded and send you a notification at the
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    scheduler_status = reminder_scheduler.get_scheduler_status()
+    if reminder_scheduler:
+        scheduler_status = reminder_scheduler.get_scheduler_status()
+    else:
+        scheduler_status = {'mode': 'external', 'wake_address': Config.DISPATCHER_WAKE_ADDRESS}
     return jsonify({
         "status": "healthy",
-        "scheduler": scheduler_status
+        "scheduler": scheduler_status,
+        "parse_cache": task_parser.parse_cache.stats() if task_parser.parse_cache else None,
+        "parse_templates": task_parser.templates.stats() if task_parser.templates else None,
+        "parser": task_parser.metrics.snapshot(),
+        "llm_batching": task_parser.batcher.stats() if task_parser.batcher else None,
+        "intents": intent_classifier.stats(),
+        "group_commit": database.writer.stats() if database.writer else None,
+        "task_cache": database.task_cache.stats() if database.task_cache else None
     }), 200
 
 
 @app.route('/tasks/<phone>', methods=['GET'])
 def get_tasks(phone):
-    """Get all tasks for a user (for debugging/admin)"""
+    """
+    Get a user's tasks (for debugging/admin)
+    
+    Returns one page of TASKS_PAGE_SIZE tasks (?limit=, up to 1000); pass the
+    response's next_cursor as ?after= for the next page. ?format=ndjson streams
+    every task instead, one JSON object per line.
+    """
     try:
         # Ensure phone number format
         if not phone.startswith('whatsapp:'):
             phone = f'whatsapp:{phone}'
         
         include_sent = request.args.get('include_sent', 'false').lower() == 'true'
-        tasks = database.get_user_tasks(phone, include_sent=include_sent)
+        if request.args.get('format') == 'ndjson':
+            return Response(export_tasks(phone, include_sent), mimetype='application/x-ndjson')
+        
+        try:
+            limit = min(int(request.args.get('limit', Config.TASKS_PAGE_SIZE)), 1000)
+            after = parse_cursor(request.args.get('after'))
+        except ValueError:
+            return jsonify({"status": "error", "message": "Invalid limit or cursor"}), 400
+        # One extra row tells whether another page follows
+        tasks = database.get_user_tasks(phone, include_sent=include_sent, limit=limit + 1, after=after)
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = '{}:{}'.format(*tasks[-1].cursor)
         
         return jsonify({
             "status": "success",
-            "tasks": [task.to_dict() for task in tasks]
+            "tasks": [task.to_dict() for task in tasks],
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+def parse_cursor(value):
+    """'reminder_at_ms:id' from next_cursor into a Task.cursor tuple"""
+    if not value:
+        return None
+    reminder_at_ms, task_id = value.split(':')
+    return int(reminder_at_ms), int(task_id)
+
+
+def export_tasks(phone, include_sent):
+    """NDJSON lines for every task, streamed straight from the database cursor"""
+    for task in database.iter_user_tasks(phone, include_sent=include_sent):
+        yield json.dumps(task.to_dict()) + '\n'
+
+
+@app.route('/tasks/import', methods=['POST'])
+def import_tasks():
+    """
+    Bulk-import reminders from a CSV or NDJSON request body (see bulk_import.py)
+    
+    The body is parsed as it streams in; times come from the local parser only.
+    Format: ?format=csv|ndjson, else the Content-Type (application/x-ndjson means NDJSON).
+    Requires `Authorization: Bearer <IMPORT_API_TOKEN>`.
+    """
+    if not Config.IMPORT_API_TOKEN:
+        return jsonify({"status": "error", "message": "Bulk import is disabled (IMPORT_API_TOKEN is not set)"}), 403
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {Config.IMPORT_API_TOKEN}".encode()):
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+    
+    fmt = request.args.get('format') or detect_format(content_type=request.content_type)
+    lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    report = BulkImporter(database).run(read_rows(lines, fmt))
+    if 'error' in report:
+        return jsonify({"status": "error", **report}), 500
+    return jsonify({"status": "success", **report}), 200
+
+
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint"""
@@ -147,7 +239,8 @@ def index():
         "endpoints": {
             "webhook": "/webhook (POST) - Receive WhatsApp messages",
             "health": "/health (GET) - Health check",
-            "tasks": "/tasks/<phone> (GET) - Get user tasks"
+            "tasks": "/tasks/<phone> (GET) - Get user tasks",
+            "import": "/tasks/import (POST) - Bulk-import reminders from CSV/NDJSON"
         }
     }), 200
 
@@ -160,7 +253,9 @@ if __name__ == '__main__':
         app.run(debug=Config.DEBUG, host='0.0.0.0', port=5000)
     except KeyboardInterrupt:
         print("\n⏹️ Shutting down...")
-        reminder_scheduler.stop()
+        if reminder_scheduler:
+            reminder_scheduler.stop()
     except Exception as e:
         print(f"❌ Error starting app: {e}")
-        reminder_scheduler.stop()
+        if reminder_scheduler:
+            reminder_scheduler.stop()
@@ -8,74 +8,174 @@ from database import Database
 from task_parser import TaskParser
 from telegram_service import TelegramService
 from scheduler import ReminderScheduler
+from rate_limiter import ChatRateLimiter, TokenBucket
+from wake_signal import WakeSender
+from telegram.error import Forbidden, RetryAfter
+from datetime import datetime, timedelta
 import asyncio
+import time
 from threading import Thread
 
-# Initialize services
-database = Database()
-task_parser = TaskParser()
-telegram_service = TelegramService(database, task_parser)
+# How soon to look again for due reminders when the bot's event loop isn't up yet
+LOOP_RETRY_SECONDS = 2
 
 class TelegramReminderScheduler(ReminderScheduler):
     """Modified scheduler for Telegram"""
     
     def __init__(self, database: Database, telegram_service: TelegramService):
-        self.database = database
+        super().__init__(database, whatsapp_service=None)
         self.telegram_service = telegram_service
-        from apscheduler.schedulers.background import BackgroundScheduler
-        import pytz
-        self.scheduler = BackgroundScheduler()
-        self.timezone = pytz.timezone(Config.DEFAULT_TIMEZONE)
+        self.rate_limiter = None
+        self.catchup_bucket = None
+        self._prerendered = set()
+    
+    def start(self):
+        """Start dispatching, plus the voice pre-render lookahead"""
+        super().start()
+        self.scheduler.add_job(
+            self.prerender_upcoming_voices,
+            'interval',
+            seconds=60,
+            id='voice_prerender',
+            next_run_time=datetime.now(self.timezone)
+        )
+    
+    def schedule_task(self, task):
+        """Queue the task and, if it is due soon, start rendering its voice note now"""
+        super().schedule_task(task)
+        if task.reminder_at_ms / 1000 - time.time() <= Config.VOICE_PRERENDER_MINUTES * 60:
+            self._prerendered.add(task.id)
+            self.telegram_service.prerender_voice(task.task_description)
+    
+    def prerender_upcoming_voices(self):
+        """Render voice notes for reminders due within VOICE_PRERENDER_MINUTES"""
+        try:
+            upcoming = self.get_upcoming_task_ids(Config.VOICE_PRERENDER_MINUTES * 60)
+            # Forget ids that have been dispatched; only fetch the new ones
+            self._prerendered &= upcoming
+            new_ids = upcoming - self._prerendered
+            if not new_ids:
+                return
+            
+            for task in self.database.get_tasks(new_ids):
+                self.telegram_service.prerender_voice(task.task_description)
+            self._prerendered |= new_ids
+            print(f"🎙️ Pre-rendering {len(new_ids)} voice reminders")
+        except Exception as e:
+            print(f"❌ Error pre-rendering voice reminders: {e}")
     
     def check_and_send_reminders(self):
         """Check database for pending reminders and send them via Telegram"""
         try:
-            from datetime import datetime
-            current_time = datetime.now(self.timezone)
-            
-            pending_tasks = self.database.get_pending_reminders(current_time)
+            # Don't claim anything we couldn't send
+            loop = self.telegram_service.loop
+            if not loop or not loop.is_running():
+                # The bot is still starting up: the due entries have left the heap,
+                # so reload it shortly instead of waiting for the next resync
+                print(f"⚠️ Event loop not available, retrying in {LOOP_RETRY_SECONDS}s")
+                self.scheduler.add_job(
+                    self.resync,
+                    'date',
+                    run_date=datetime.now(self.timezone) + timedelta(seconds=LOOP_RETRY_SECONDS),
+                    id='reminder_loop_retry',
+                    replace_existing=True
+                )
+                return
             
-            if pending_tasks:
+            for pending_tasks in self.claim_due_batches():
                 print(f"📬 Found {len(pending_tasks)} pending reminders to send")
-            
-            for task in pending_tasks:
-                try:
-                    # Send reminder via Telegram using the bot's application
-                    # Create a coroutine and schedule it on the bot's event loop
-                    async def send():
-                        return await self.telegram_service.send_reminder(
-                            task.user_phone,
-                            task.task_description
-                        )
-                    
-                    # Use asyncio.run_coroutine_threadsafe to send from background thread
-                    try:
-                        # Get the bot's running event loop
-                        loop = self.telegram_service.application._application.loop
-                        if loop and loop.is_running():
-                            future = asyncio.run_coroutine_threadsafe(send(), loop)
-                            success = future.result(timeout=10)
-                        else:
-                            print(f"⚠️ Event loop not available, skipping task {task.id}")
-                            continue
-                    except Exception as loop_error:
-                        print(f"⚠️ Could not access event loop: {loop_error}")
-                        continue
-                    
-                    if success:
-                        self.database.mark_task_sent(task.id)
-                        print(f"✅ Sent reminder for task {task.id}")
-                    else:
-                        print(f"❌ Failed to send reminder for task {task.id}")
-                        
-                except Exception as e:
-                    print(f"❌ Error sending reminder for task {task.id}: {e}")
-            
+                deliveries, dropped = self.plan_deliveries(pending_tasks)
+                
+                # Hand the whole batch to the bot's event loop at once.
+                # Worst case: every reminder waits for its share of the global
+                # (or catch-up) rate, plus slack
+                timeout = 60 + 2 * len(deliveries) / Config.TELEGRAM_GLOBAL_RATE
+                if Config.REMINDER_CATCHUP_RATE > 0:
+                    timeout += sum(delivery.late for delivery in deliveries) / Config.REMINDER_CATCHUP_RATE
+                # send_batch stops itself at the deadline and still reports what
+                # went out; the extra wait here only guards against a stuck loop
+                future = asyncio.run_coroutine_threadsafe(self.send_batch(deliveries, timeout), loop)
+                results = future.result(timeout=timeout + 30)
+                self.record_outcomes(results + [(task, 'failed') for task in dropped])
+        
         except Exception as e:
             print(f"❌ Error in reminder checker: {e}")
+    
+    async def send_batch(self, deliveries, timeout=None):
+        """
+        Send a batch of reminders concurrently; returns (task, outcome) pairs
+        
+        Sends still running after timeout seconds are cancelled and come back
+        as 'retry', so the reminders that did go out are recorded as sent.
+        """
+        if self.rate_limiter is None:
+            self.rate_limiter = ChatRateLimiter(
+                Config.TELEGRAM_GLOBAL_RATE,
+                Config.TELEGRAM_PER_CHAT_RATE,
+                Config.TELEGRAM_PER_CHAT_BURST
+            )
+            if Config.REMINDER_CATCHUP_RATE > 0:
+                self.catchup_bucket = TokenBucket(Config.REMINDER_CATCHUP_RATE)
+        semaphore = asyncio.Semaphore(Config.TELEGRAM_MAX_CONCURRENT_SENDS)
+        started = time.perf_counter()
+        
+        sends = [asyncio.ensure_future(self._send_one(delivery, semaphore)) for delivery in deliveries]
+        _, pending = await asyncio.wait(sends, timeout=timeout) if sends else (set(), set())
+        for send in pending:
+            send.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            print(f"⏱️ Batch timed out after {timeout:.0f}s, deferring unfinished reminders")
+        outcomes = ['retry' if send.cancelled() else send.result() for send in sends]
+        
+        sent = outcomes.count('sent')
+        elapsed = time.perf_counter() - started
+        rate = sent / elapsed if elapsed > 0 else 0.0
+        print(f"📊 Batch: sent {sent}/{len(deliveries)} reminders in {elapsed:.2f}s ({rate:.1f}/s)")
+        return [
+            (task, outcome)
+            for delivery, outcome in zip(deliveries, outcomes)
+            for task in delivery.tasks
+        ]
+    
+    async def _send_one(self, delivery, semaphore):
+        """Send one reminder under the concurrency cap and flood limits; returns its outcome"""
+        if delivery.late and self.catchup_bucket:
+            await self.catchup_bucket.acquire()
+        for attempt in range(Config.TELEGRAM_SEND_RETRIES + 1):
+            # Wait for rate budget outside the semaphore so a throttled chat
+            # doesn't hold a send slot; each reminder is a text plus a voice message
+            await self.rate_limiter.acquire(delivery.user_phone, tokens=2)
+            try:
+                async with semaphore:
+                    success = await self.telegram_service.send_reminder(
+                        delivery.user_phone,
+                        delivery.task_description
+                    )
+            except RetryAfter as e:
+                print(f"⏳ Flood control for {delivery.label}, retrying in {e.retry_after}s")
+                self.rate_limiter.pause(float(e.retry_after), delivery.user_phone)
+                continue
+            except Forbidden as e:
+                # The user blocked the bot: retrying can't help
+                print(f"🚫 Cannot deliver {delivery.label}: {e}")
+                return 'failed'
+            except Exception as e:
+                print(f"❌ Error sending reminder for {delivery.label}: {e}")
+                return 'retry'
+            
+            if success:
+                print(f"✅ Sent reminder for {delivery.label}")
+                return 'sent'
+            print(f"❌ Failed to send reminder for {delivery.label}")
+            return 'retry'
+        
+        print(f"❌ Deferring {delivery.label} after {Config.TELEGRAM_SEND_RETRIES} flood-control retries")
+        return 'retry'
 
 def main():
     """Main entry point for Telegram bot"""
+    reminder_scheduler = None
     try:
         # Validate configuration
         Config.validate()
@@ -88,16 +188,29 @@ def main():
         print("=" * 60)
         print()
         
-        # Start the reminder scheduler in a separate thread
-        reminder_scheduler = TelegramReminderScheduler(database, telegram_service)
-        reminder_scheduler.start()
+        # Initialize services (here rather than at import, so importing this module stays cheap)
+        database = Database()
+        task_parser = TaskParser()
+        telegram_service = TelegramService(database, task_parser)
+        
+        if Config.DISPATCHER_MODE == 'external':
+            # Reminders are sent by dispatcher.py; just tell it about near-term tasks
+            print(f"📮 Sending is handled by dispatcher.py (signals to {Config.DISPATCHER_WAKE_ADDRESS})")
+            database.add_task_listener(
+                WakeSender(Config.DISPATCHER_WAKE_ADDRESS, Config.REMINDER_RESYNC_MINUTES * 60).notify
+            )
+        else:
+            # Start the reminder scheduler in a separate thread
+            reminder_scheduler = TelegramReminderScheduler(database, telegram_service)
+            reminder_scheduler.start()
         
         # Start the Telegram bot (this will block)
         telegram_service.start_bot()
-        
+    
     except KeyboardInterrupt:
         print("\n⏹️ Shutting down...")
-        reminder_scheduler.stop()
+        if reminder_scheduler:
+            reminder_scheduler.stop()
     except Exception as e:
         print(f"❌ Error starting bot: {e}")
         import traceback
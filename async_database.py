@@ -0,0 +1,100 @@
+"""
+asyncio-native access to the tasks table for the Telegram bot
+
+The bot's handlers run on its event loop; calling the synchronous Database
+there blocks every other chat for each round-trip (and any SQLite lock wait).
+AsyncDatabase runs the same queries through SQLAlchemy's asyncio extension
+(aiosqlite for SQLite, asyncpg for PostgreSQL). Schema creation, migrations
+and task listeners stay with the synchronous Database it wraps.
+"""
+
+import asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from database import Database
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgres': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def async_url(database_url: str) -> str:
+    """Point a database URL at its asyncio driver"""
+    scheme, separator, rest = database_url.partition('://')
+    dialect = scheme.split('+')[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}{separator}{rest}"
+
+
+class AsyncDatabase:
+    """Async counterpart of Database for use inside coroutines"""
+    
+    def __init__(self, database: Database):
+        self.database = database
+        options = database._engine_options()
+        if 'pool_size' in options:
+            # aiosqlite defaults to NullPool, which would open a connection (and thread) per session
+            options['poolclass'] = AsyncAdaptedQueuePool
+        self.engine = create_async_engine(async_url(database.database_url), **options)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine.sync_engine, 'connect', Database._configure_sqlite_connection)
+        self.SessionLocal = async_sessionmaker(self.engine, expire_on_commit=False)
+    
+    async def add_task(self, user_phone, task_description, reminder_time):
+        """Add a new task to the database"""
+        task = Database.new_task(user_phone, task_description, reminder_time)
+        if self.database.writer:
+            # Share the group commit with the sync callers (it notifies the listeners)
+            return await asyncio.wrap_future(self.database.writer.submit(task))
+        
+        async with self.SessionLocal() as session:
+            session.add(task)
+            await session.commit()
+        await self._off_loop(self.database.invalidate_users, [task.user_phone])
+        self.database._notify_task_listeners(task)
+        return task
+    
+    async def get_user_tasks(self, user_phone, include_sent=False, limit=None, after=None, before=None):
+        """Get a user's tasks, all of them or one keyset page (see Database.get_user_tasks)"""
+        # Shares the sync layer's cache, so writes from either side invalidate it
+        cache = self.database.task_cache if limit and not include_sent else None
+        key = ('tasks', limit, after, before)
+        if cache:
+            tasks, token = await self._off_loop(cache.lookup, user_phone, key)
+            if tasks is not None:
+                return list(tasks)
+        
+        query = Database.user_tasks_query(user_phone, include_sent, limit, after, before)
+        async with self.SessionLocal() as session:
+            tasks = (await session.execute(query)).scalars().all()
+        if before:
+            tasks.reverse()
+        if cache:
+            await self._off_loop(cache.store, user_phone, key, tuple(tasks), token)
+        return tasks
+    
+    async def count_pending_tasks(self, user_phone):
+        """Number of a user's pending tasks (see Database.count_pending_tasks)"""
+        cache = self.database.task_cache
+        if cache:
+            count, token = await self._off_loop(cache.lookup, user_phone, 'count')
+            if count is not None:
+                return count
+        async with self.SessionLocal() as session:
+            count = (await session.execute(Database.pending_count_query(user_phone))).scalar()
+        if cache:
+            await self._off_loop(cache.store, user_phone, 'count', count, token)
+        return count
+    
+    async def _off_loop(self, function, *args):
+        """Call into the task cache, in the default executor when it does SQLite I/O"""
+        cache = self.database.task_cache
+        if cache is not None and cache.shared:
+            return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+        return function(*args)
+    
+    async def dispose(self):
+        """Close pooled connections"""
+        await self.engine.dispose()
@@ -0,0 +1,90 @@
+"""
+Benchmark bot handler throughput with the sync vs the asyncio database layer
+
+Each simulated user runs the handler's database work (add_task, then
+get_user_tasks as /list does) on one event loop, while a dispatcher thread
+keeps taking the SQLite write lock like a busy reminder tick. A ticker
+coroutine measures how long the event loop is stalled.
+
+Usage: python benchmarks/bench_async_database.py [users] [messages_each]   (default 50 / 10)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from async_database import AsyncDatabase
+
+def busy_dispatcher(database, stop, hold_seconds=0.02, every_seconds=0.1):
+    """Hold the write lock for `hold_seconds` every `every_seconds`"""
+    while not stop.is_set():
+        with database.engine.connect() as connection:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            time.sleep(hold_seconds)
+            connection.exec_driver_sql('COMMIT')
+        stop.wait(every_seconds)
+
+async def run(database, use_async, users, messages_each):
+    async_database = AsyncDatabase(database) if use_async else None
+    due = datetime.now() + timedelta(days=1)
+    stalls = []
+    done = asyncio.Event()
+    
+    async def handler(user):
+        for i in range(messages_each):
+            if use_async:
+                await async_database.add_task(user, f'task {i}', due)
+                await async_database.get_user_tasks(user)
+            else:
+                database.add_task(user, f'task {i}', due)
+                database.get_user_tasks(user)
+            # Yield like a real handler awaiting its Telegram reply
+            await asyncio.sleep(0)
+    
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            stalls.append(now - last - 0.005)
+            last = now
+    
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(f'user{u}') for u in range(users)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticking
+    if async_database:
+        await async_database.dispose()
+    return elapsed, max(stalls) if stalls else 0.0
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    messages_each = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    handled = users * messages_each
+    
+    print(f"{users} concurrent users x {messages_each} messages, dispatcher holding the write lock 20% of the time")
+    for label, use_async in [('sync Database', False), ('AsyncDatabase', True)]:
+        with tempfile.TemporaryDirectory() as directory:
+            database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            stop = threading.Event()
+            dispatcher = threading.Thread(target=busy_dispatcher, args=(database, stop))
+            dispatcher.start()
+            try:
+                elapsed, max_stall = asyncio.run(run(database, use_async, users, messages_each))
+            finally:
+                stop.set()
+                dispatcher.join()
+            database.engine.dispose()
+        print(f"{label:14s} {handled / elapsed:8.1f} handlers/s   longest event-loop stall {max_stall * 1000:7.1f} ms")
+
+if __name__ == '__main__':
+    main()
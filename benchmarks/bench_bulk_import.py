@@ -0,0 +1,76 @@
+"""
+Benchmark importing reminders: add_task per row vs BulkImporter batches
+
+Rows are generated into a CSV file first; the importer streams it back. Peak
+Python memory (tracemalloc) shows whether memory stays flat as rows grow.
+
+Usage: python benchmarks/bench_bulk_import.py [rows]   (default 100000)
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from bulk_import import BulkImporter, read_rows
+
+def write_csv(path, rows):
+    """Mix of explicit times and messages for the local grammar"""
+    start = datetime.now() + timedelta(days=1)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['user_phone', 'task_description', 'reminder_time', 'message'])
+        for i in range(rows):
+            if i % 4:
+                when = (start + timedelta(minutes=i)).isoformat(timespec='minutes')
+                writer.writerow([f'user{i % 1000}', f'task {i}', when, ''])
+            else:
+                writer.writerow([f'user{i % 1000}', '', '', f'remind me to stretch {i} tomorrow at 9am'])
+
+def per_row(database, path):
+    """The pre-existing path: one add_task (one transaction) per row"""
+    importer = BulkImporter(database)
+    started = time.perf_counter()
+    rows = 0
+    with open(path, encoding='utf-8', newline='') as f:
+        for _, record in read_rows(f, 'csv'):
+            values = importer.row_values(record, datetime.now(importer.timezone))
+            database.add_task(values['user_phone'], values['task_description'], values['reminder_time'])
+            rows += 1
+    return rows / (time.perf_counter() - started)
+
+def bulk(database, path, batch_size):
+    with open(path, encoding='utf-8', newline='') as f:
+        return BulkImporter(database, batch_size=batch_size).run(read_rows(f, 'csv'))['rows_per_second']
+
+def measure(label, function, *args):
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        tracemalloc.start()
+        rate = function(database, *args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        database.engine.dispose()
+    print(f"{label:22s} {rate:10.1f} rows/s   peak {peak / 2**20:6.1f} MiB")
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as directory:
+        small, large = os.path.join(directory, 'small.csv'), os.path.join(directory, 'large.csv')
+        write_csv(small, min(rows, 2000))
+        write_csv(large, rows)
+        
+        print(f"add_task per row on {min(rows, 2000)} rows, bulk import on {rows} rows")
+        measure('add_task per row', per_row, small)
+        for batch_size in [500, 5000]:
+            measure(f'bulk, batch {batch_size}', bulk, large, batch_size)
+        measure('bulk, batch 5000 (2k)', bulk, small, 5000)
+
+if __name__ == '__main__':
+    main()
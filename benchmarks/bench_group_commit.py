@@ -0,0 +1,74 @@
+"""
+Benchmark add_task with 100 concurrent producers: one commit per task vs group commit
+
+Usage: python benchmarks/bench_group_commit.py [producers] [tasks_each]   (default 100 / 5)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from database import Database
+
+# (label, DB_GROUP_COMMIT, DB_GROUP_COMMIT_WINDOW_MS)
+MODES = [
+    ('per task', False, 0),
+    ('group, 0 ms', True, 0),
+    ('group, 2 ms', True, 2),
+]
+
+def run(database, producers, tasks_each):
+    """Returns (elapsed, sorted per-insert latencies)"""
+    due = datetime.now() + timedelta(days=1)
+    latencies = []
+    start = threading.Barrier(producers + 1)
+    
+    def produce(user):
+        start.wait()
+        for i in range(tasks_each):
+            started = time.perf_counter()
+            database.add_task(f'user{user}', f'task {i}', due)
+            latencies.append(time.perf_counter() - started)
+    
+    threads = [threading.Thread(target=produce, args=(u,)) for u in range(producers)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, sorted(latencies)
+
+def main():
+    producers = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    tasks_each = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    inserts = producers * tasks_each
+    # Enough connections that producers queue on SQLite's lock, not on the pool
+    Config.DB_POOL_SIZE = producers
+    
+    print(f"{producers} producers x {tasks_each} tasks")
+    for synchronous in ['FULL', 'NORMAL']:
+        Config.SQLITE_SYNCHRONOUS = synchronous
+        for label, enabled, window_ms in MODES:
+            Config.DB_GROUP_COMMIT = enabled
+            Config.DB_GROUP_COMMIT_WINDOW_MS = window_ms
+            with tempfile.TemporaryDirectory() as directory:
+                database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+                elapsed, latencies = run(database, producers, tasks_each)
+                commits = database.writer.stats()['commits'] if database.writer else inserts
+                database.engine.dispose()
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(
+                f"synchronous={synchronous:6s} {label:12s} {inserts / elapsed:8.1f} inserts/s   "
+                f"{commits:5d} commits   p50 {p50 * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms"
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure the intent pre-classifier on a labeled corpus
+
+Reports per-class precision/recall, how many LLM calls triage saves (non-
+reminders that the local time grammar can't resolve and that would
+otherwise have gone to the LLM) and the classification cost per message.
+
+Usage: python benchmarks/bench_intent_classifier.py [labeled_tsv]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytz
+from config import Config
+from intent_classifier import IntentClassifier
+from time_grammar import TimeGrammar
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(HERE, 'intent_corpus.tsv')
+REMINDER_CORPUS = os.path.join(HERE, 'reminder_corpus.txt')
+
+def load_corpus(path):
+    samples = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                label, message = line.rstrip('\n').split('\t', 1)
+                samples.append((label, message))
+    with open(REMINDER_CORPUS, encoding='utf-8') as f:
+        samples += [('reminder', line.strip()) for line in f if line.strip() and not line.startswith('#')]
+    return samples
+
+def main():
+    samples = load_corpus(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS)
+    classifier = IntentClassifier()
+    timezone = pytz.timezone(Config.DEFAULT_TIMEZONE)
+    grammar = TimeGrammar(timezone)
+    now = datetime.now(timezone)
+    
+    predictions = [(label, classifier.classify(message)['intent'], message) for label, message in samples]
+    
+    print(f"{len(samples)} labeled messages")
+    for intent in ('reminder', 'command', 'chatter'):
+        true_positive = sum(1 for label, predicted, _ in predictions if label == predicted == intent)
+        predicted_count = sum(1 for _, predicted, _ in predictions if predicted == intent)
+        actual_count = sum(1 for label, _, _ in predictions if label == intent)
+        precision = true_positive / predicted_count if predicted_count else 0.0
+        recall = true_positive / actual_count if actual_count else 0.0
+        print(f"  {intent:9s} precision {precision:6.1%}  recall {recall:6.1%}  ({actual_count} messages)")
+    
+    for label, predicted, message in predictions:
+        if label != predicted:
+            print(f"  misclassified ({label} -> {predicted}): {message}")
+    
+    # Without triage every message not resolved locally costs an LLM call
+    llm_before = [message for _, _, message in predictions if not grammar.parse(message, now)]
+    llm_after = [message for _, predicted, message in predictions if predicted == 'reminder' and not grammar.parse(message, now)]
+    saved = len(llm_before) - len(llm_after)
+    print(f"LLM calls: {len(llm_before)} -> {len(llm_after)} ({saved} saved, {saved / len(llm_before):.0%})")
+    
+    rounds = max(1, 50000 // len(samples))
+    messages = [message for _, message in samples]
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            classifier.classify(message)
+    elapsed = time.perf_counter() - started
+    print(f"classification: {elapsed / (rounds * len(messages)) * 1e6:.1f} µs/message")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark micro-batched LLM extraction against one LLM call per message
+
+A burst of messages is parsed concurrently through TaskParser.aparse_message.
+The simulated provider takes 0.8 s + 50 ms per message in the prompt and
+serves at most 4 requests at a time, like an account-level rate limit.
+Prompt size is measured on the real prompt templates (~4 chars per token).
+
+Usage: python benchmarks/bench_llm_batching.py [messages]   (default 200)
+"""
+
+import os
+import sys
+import asyncio
+import json
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+
+from datetime import datetime, timedelta
+from config import Config
+from task_parser import TaskParser
+
+# Not matched by the local parser, so every message needs the LLM
+MESSAGE = "don't let me forget the birthday gift for mom #{}"
+
+class SimulatedProvider:
+    """Stands in for the OpenAI API: fixed overhead, per-item cost, 4 concurrent requests"""
+    
+    def __init__(self, parser):
+        self.parser = parser
+        self.slots = threading.Semaphore(4)
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+    
+    def _call(self, prompt, items):
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+        with self.slots:
+            time.sleep(0.8 + 0.05 * items)
+    
+    @staticmethod
+    def _item(message):
+        when = datetime.now() + timedelta(days=1)
+        return {
+            'task_description': message,
+            'reminder_datetime': when.strftime('%Y-%m-%d %H:%M:%S'),
+            'confidence': 'high'
+        }
+    
+    def single_chain(self):
+        provider = self
+        class Chain:
+            def invoke(self, inputs):
+                provider._call(provider.parser.prompt.format(**inputs), 1)
+                return {'text': json.dumps(provider._item(inputs['message']))}
+            async def ainvoke(self, inputs):
+                return await asyncio.to_thread(self.invoke, inputs)
+        return Chain()
+    
+    def batch_chain(self):
+        provider = self
+        class Chain:
+            def invoke(self, inputs):
+                messages = json.loads(inputs['messages'])
+                provider._call(provider.parser.batch_prompt.format(**inputs), len(messages))
+                return {'text': json.dumps([dict(provider._item(m['message']), id=m['id']) for m in messages])}
+        return Chain()
+
+async def burst(parser, messages):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(parser.aparse_message(MESSAGE.format(i)) for i in range(messages)))
+    elapsed = time.perf_counter() - started
+    assert all(result and result['task_description'] == MESSAGE.format(i) for i, result in enumerate(results))
+    return elapsed
+
+def run(messages, batched):
+    parser = TaskParser()
+    parser.parse_cache = None
+    parser.templates = None
+    provider = SimulatedProvider(parser)
+    parser.chain = provider.single_chain()
+    parser.batch_chain = provider.batch_chain()
+    if not batched:
+        parser.batcher = None
+    elapsed = asyncio.run(burst(parser, messages))
+    return elapsed, provider
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    Config.LLM_TIMEOUT_SECONDS = 600
+    
+    for label, batched in (("one call per message", False), (f"batched (<= {Config.LLM_BATCH_MAX_SIZE}, {Config.LLM_BATCH_WINDOW_MS:g} ms)", True)):
+        elapsed, provider = run(messages, batched)
+        print(f"{label:28s} {messages / elapsed:7.2f} msg/s  {provider.calls:4d} LLM calls  "
+              f"~{provider.prompt_chars / 4 / messages:5.0f} prompt tokens/msg  ({elapsed:.1f}s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark TelegramService.handle_message throughput with a simulated 1-2 s LLM
+
+Compares the old blocking parse (sync chain.invoke inside the coroutine) with
+the async parse path. No network access or API key is needed.
+
+Usage: python benchmarks/bench_message_handler.py [messages]   (default 200)
+"""
+
+import os
+import sys
+import asyncio
+import json
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+os.environ.setdefault('VOICE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'bench_voice_cache'))
+
+from datetime import datetime, timedelta
+from task_parser import TaskParser
+from telegram_service import TelegramService
+
+# Not matched by the local parser, so every message needs the LLM
+MESSAGE = "don't let me forget the birthday gift for mom"
+
+class SimulatedChain:
+    """Stands in for the LLMChain with 1-2 s of latency"""
+    
+    def _answer(self):
+        when = datetime.now() + timedelta(days=1)
+        return {'text': json.dumps({
+            'task_description': 'birthday gift for mom',
+            'reminder_datetime': when.strftime('%Y-%m-%d %H:%M:%S'),
+            'confidence': 'high'
+        })}
+    
+    def invoke(self, inputs):
+        time.sleep(random.uniform(1, 2))
+        return self._answer()
+    
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(random.uniform(1, 2))
+        return self._answer()
+
+class FakeDatabase:
+    def add_task(self, user_phone, task_description, reminder_time):
+        return SimpleNamespace(id=1)
+
+def fake_update(i):
+    async def reply_text(text):
+        return None
+    return SimpleNamespace(
+        message=SimpleNamespace(text=MESSAGE, reply_text=reply_text),
+        effective_user=SimpleNamespace(id=i, first_name=f"user{i}")
+    )
+
+async def run(service, messages):
+    started = time.perf_counter()
+    await asyncio.gather(*(service.handle_message(fake_update(i), None) for i in range(messages)))
+    return time.perf_counter() - started
+
+def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    parser = TaskParser()
+    parser.chain = SimulatedChain()
+    service = TelegramService(FakeDatabase(), parser)
+    
+    # Silence the per-message logging while measuring
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        blocking_messages = min(messages, 10)
+        original = parser.aparse_message
+        async def blocking_parse(message):
+            return parser.parse_message(message)
+        parser.aparse_message = blocking_parse
+        blocking = asyncio.run(run(service, blocking_messages))
+        
+        parser.aparse_message = original
+        concurrent = asyncio.run(run(service, messages))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    
+    print(f"blocking parse: {blocking_messages / blocking:7.2f} msg/s ({blocking_messages} messages in {blocking:.1f}s)")
+    print(f"async parse:    {messages / concurrent:7.2f} msg/s ({messages} messages in {concurrent:.1f}s)")
+
+if __name__ == '__main__':
+    main()
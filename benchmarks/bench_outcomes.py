@@ -0,0 +1,72 @@
+"""
+Benchmark recording delivery outcomes: one commit per task vs one per batch
+
+Usage: python benchmarks/bench_outcomes.py [tasks] [batch]   (default 2,000 / 500)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytz
+from database import Database, Task, to_epoch_ms
+
+def seed(database, count):
+    """Insert `count` due tasks and claim them all for one worker"""
+    due = datetime.now(pytz.utc) - timedelta(minutes=1)
+    with database.engine.begin() as connection:
+        connection.execute(Task.__table__.insert(), [
+            {
+                'user_phone': str(i % 100),
+                'task_description': f'task {i}',
+                'reminder_time': due.replace(tzinfo=None),
+                'reminder_at_ms': to_epoch_ms(due),
+                'created_at': due.replace(tzinfo=None),
+                'is_sent': False
+            }
+            for i in range(count)
+        ])
+    return [task.id for task in database.claim_due_tasks('bench', datetime.now(pytz.utc), limit=count)]
+
+def per_task(database, task_ids, batch):
+    """Before: mark_task_sent for every delivered reminder"""
+    for task_id in task_ids:
+        database.mark_task_sent(task_id)
+    return len(task_ids)
+
+def per_batch(database, task_ids, batch):
+    """After: one record_outcomes call per claimed batch (10% of each batch retried)"""
+    retry_at = datetime.now(pytz.utc) + timedelta(minutes=1)
+    commits = 0
+    for start in range(0, len(task_ids), batch):
+        chunk = task_ids[start:start + batch]
+        retries = {task_id: retry_at for task_id in chunk[::10]}
+        sent_ids = [task_id for task_id in chunk if task_id not in retries]
+        database.record_outcomes('bench', sent_ids=sent_ids, retries=retries)
+        commits += 1
+    return commits
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    
+    print(f"Recording outcomes for {count:,} tasks (batch {batch})")
+    for label, record in [('per task', per_task), ('per batch', per_batch)]:
+        with tempfile.TemporaryDirectory() as directory:
+            database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            task_ids = seed(database, count)
+            started = time.perf_counter()
+            commits = record(database, task_ids, batch)
+            elapsed = time.perf_counter() - started
+            database.engine.dispose()
+        print(
+            f"{label:10s} {elapsed:8.2f} s   {count / elapsed:10,.0f} tasks/s   "
+            f"{commits:6,} commits ({commits / elapsed:,.1f}/s)"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the scheduler tick and per-user reads before and after archiving delivered reminders
+
+A database holds months of delivered reminders plus a small pending set. The
+same operations are timed, the settled rows are archived, and they are timed
+again.
+
+Usage: python benchmarks/bench_retention.py [settled] [pending] [users]   (default 300000 / 2000 / 1000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+import pytz
+from config import Config
+from database import Database
+
+def build(database, settled, pending, users):
+    now = datetime.now(pytz.utc)
+    for start in range(0, settled, 50000):
+        database.insert_tasks([
+            Database.task_row(f'user{i % users}', f'old {i}', now - timedelta(days=90, seconds=-i * 20))
+            for i in range(start, min(start + 50000, settled))
+        ])
+    with database.engine.begin() as connection:
+        connection.execute(text('UPDATE tasks SET is_sent = 1, sent_at = reminder_time'))
+    # Half of the pending work is due now, half later
+    database.insert_tasks([
+        Database.task_row(f'user{i % users}', f'pending {i}', now + timedelta(minutes=-5 if i % 2 else 60))
+        for i in range(pending)
+    ])
+
+def count_rows(database):
+    with database.engine.connect() as connection:
+        return connection.execute(text('SELECT count(*) FROM tasks')).scalar()
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def measure(database, label):
+    now = datetime.now(pytz.utc)
+    
+    def tick():
+        # One dispatcher tick: claim a batch of due reminders, then record them (released for the next round)
+        tasks = database.claim_due_tasks('bench', now, limit=Config.REMINDER_CLAIM_BATCH)
+        database.record_outcomes('bench', retries={task.id: now for task in tasks})
+    
+    results = {
+        'tick (claim+record)': timed(tick, 20),
+        'resync schedule': timed(database.get_reminder_schedule, 5),
+        'user history page': timed(lambda: database.get_user_tasks('user7', include_sent=True, limit=50), 50),
+        'count(*) tasks': timed(lambda: count_rows(database), 5),
+    }
+    rows = count_rows(database)
+    print(f"{label}: {rows} rows in tasks")
+    for name, ms in results.items():
+        print(f"  {name:22s} {ms:8.2f} ms")
+    return results
+
+def main():
+    settled = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    pending = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    users = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    Config.TASK_CACHE_MAX_USERS = 0
+    with tempfile.TemporaryDirectory() as directory:
+        Config.TASK_ARCHIVE_URL = f"sqlite:///{os.path.join(directory, 'archive-%Y-%m.db')}"
+        database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        build(database, settled, pending, users)
+        before = measure(database, 'before')
+        
+        started = time.perf_counter()
+        moved = database.archive_tasks(datetime.now(pytz.utc) - timedelta(days=Config.TASK_RETENTION_DAYS),
+                                       batch_size=Config.TASK_ARCHIVE_BATCH_SIZE)
+        elapsed = time.perf_counter() - started
+        print(f"archived {moved} rows in {elapsed:.1f}s ({moved / elapsed:.0f} rows/s, batches of {Config.TASK_ARCHIVE_BATCH_SIZE})")
+        
+        after = measure(database, 'after')
+        print("speedup: " + ", ".join(f"{name} {before[name] / after[name]:.1f}x" for name in before))
+        database.get_archive_engine().dispose()
+        database.engine.dispose()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark concurrent SQLite writers and readers: rollback journal vs WAL
+
+Writer threads add tasks (like the bot handling messages) while reader threads
+list a user's tasks (like /list and the dispatcher's claims), all through one
+shared Database.
+
+Usage: python benchmarks/bench_sqlite_contention.py [writers] [writes_each] [readers]   (default 4 / 50 / 4)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from database import Database
+
+MODES = [
+    ('rollback journal', 'DELETE', 'FULL'),
+    ('WAL', 'WAL', 'NORMAL'),
+]
+
+def run(database, writers, writes_each, readers):
+    """Returns (elapsed, write latencies, reads done, errors)"""
+    latencies, errors, reads = [], [], [0]
+    writing = threading.Event()
+    writing.set()
+    due = datetime.now() + timedelta(days=1)
+    
+    def write(worker):
+        for i in range(writes_each):
+            started = time.perf_counter()
+            try:
+                database.add_task(f'user{worker}', f'task {i}', due)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+    
+    def read(worker):
+        while writing.is_set():
+            try:
+                database.get_user_tasks(f'user{worker % writers}')
+                reads[0] += 1
+            except Exception as e:
+                errors.append(e)
+    
+    reader_threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    writing.clear()
+    for thread in reader_threads:
+        thread.join()
+    return elapsed, sorted(latencies), reads[0], errors
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    writes_each = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    
+    print(f"{writers} writers x {writes_each} tasks, {readers} readers")
+    for label, journal_mode, synchronous in MODES:
+        Config.SQLITE_JOURNAL_MODE = journal_mode
+        Config.SQLITE_SYNCHRONOUS = synchronous
+        with tempfile.TemporaryDirectory() as directory:
+            database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            elapsed, latencies, reads, errors = run(database, writers, writes_each, readers)
+            database.engine.dispose()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+        print(
+            f"{label:17s} {len(latencies) / elapsed:8.1f} writes/s   {reads / elapsed:8.1f} reads/s   "
+            f"p99 write {p99 * 1000:7.1f} ms   errors {len(errors)}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark /list-style reads with and without the per-user task cache
+
+Users read their first page and pending count (as /list does) and now and
+then add a task, which invalidates their entry.
+
+Usage: python benchmarks/bench_task_cache.py [users] [operations] [reads_per_write]   (default 200 / 20000 / 20)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from database import Database
+
+# (label, TASK_CACHE_MAX_USERS, shared store)
+MODES = [
+    ('no cache', 0, False),
+    ('in-process', 10000, False),
+    ('shared store', 10000, True),
+]
+
+def run(database, users, operations, reads_per_write):
+    rng = random.Random(7)
+    due = datetime.now() + timedelta(days=1)
+    started = time.perf_counter()
+    for i in range(operations):
+        user = f'user{rng.randrange(users)}'
+        if rng.randrange(reads_per_write + 1) == 0:
+            database.add_task(user, f'task {i}', due + timedelta(seconds=i))
+        else:
+            database.get_user_tasks(user, limit=Config.LIST_PAGE_SIZE + 1)
+            database.count_pending_tasks(user)
+    return operations / (time.perf_counter() - started)
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    reads_per_write = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    
+    print(f"{users} users, {operations} operations, {reads_per_write} reads per write")
+    for label, max_users, shared in MODES:
+        with tempfile.TemporaryDirectory() as directory:
+            Config.TASK_CACHE_MAX_USERS = max_users
+            Config.TASK_CACHE_PATH = os.path.join(directory, 'task_cache.db') if shared else ''
+            database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            # Every user starts with a screenful of reminders
+            due = datetime.now() + timedelta(days=2)
+            database.insert_tasks([
+                Database.task_row(f'user{u}', f'seed {i}', due + timedelta(minutes=i))
+                for u in range(users) for i in range(15)
+            ])
+            rate = run(database, users, operations, reads_per_write)
+            stats = database.task_cache.stats() if database.task_cache else None
+            if database.task_cache:
+                database.task_cache.close()
+            database.engine.dispose()
+        hit_rate = f"hit rate {stats['hit_rate']:.2f}" if stats else ''
+        print(f"{label:13s} {rate:9.1f} ops/s   {hit_rate}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark the hot task queries with and without the tasks table indexes
+
+Usage: python benchmarks/bench_task_queries.py [rows]   (default 1,000,000)
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import Database, Task, to_epoch_ms
+
+PENDING_SQL = "SELECT * FROM tasks WHERE is_sent = 0 AND reminder_at_ms <= :now"
+USER_SQL = "SELECT * FROM tasks WHERE user_phone = :phone AND is_sent = 0 ORDER BY reminder_at_ms"
+
+def populate(database, rows, users=10000, pending_ratio=0.01):
+    """Insert rows where most tasks are already sent (the steady-state shape)"""
+    start = datetime(2030, 1, 1)
+    batch = []
+    with database.engine.begin() as connection:
+        for i in range(rows):
+            reminder_time = start + timedelta(minutes=i % 525600)
+            is_sent = random.random() > pending_ratio
+            batch.append({
+                'user_phone': str(i % users),
+                'task_description': f'task {i}',
+                'reminder_time': reminder_time,
+                'reminder_at_ms': to_epoch_ms(reminder_time),
+                'created_at': start,
+                'is_sent': is_sent,
+                'sent_at': reminder_time if is_sent else None
+            })
+            if len(batch) == 50000:
+                connection.execute(Task.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(Task.__table__.insert(), batch)
+
+def measure(database, label, repeats=20):
+    now = to_epoch_ms(datetime(2030, 1, 2))
+    with database.engine.connect() as connection:
+        print(f"\n--- {label} ---")
+        for name, sql, params in [
+            ('pending', PENDING_SQL, {'now': now}),
+            ('user', USER_SQL, {'phone': '42'}),
+        ]:
+            plan = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+            started = time.perf_counter()
+            for _ in range(repeats):
+                connection.execute(text(sql), params).all()
+            elapsed = (time.perf_counter() - started) / repeats
+            print(f"{name:8s} {elapsed * 1000:9.2f} ms   plan: {' | '.join(row[-1] for row in plan)}")
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        print(f"📦 Inserting {rows:,} tasks...")
+        populate(database, rows)
+        with database.engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+        
+        measure(database, "with indexes")
+        
+        with database.engine.begin() as connection:
+            for index in Task.__table__.indexes:
+                connection.execute(text(f"DROP INDEX {index.name}"))
+        # Drop pooled connections so no cached statement keeps the old plan
+        database.engine.dispose()
+        measure(database, "without indexes (baseline schema)")
+
+if __name__ == '__main__':
+    main()
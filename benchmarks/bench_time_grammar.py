@@ -0,0 +1,57 @@
+"""
+Measure how many corpus messages the local time grammar resolves without an LLM
+
+Reports the LLM-avoidance rate (messages answered with confidence 'high') and
+parse throughput, next to the old "in/within/after N units" rule.
+
+Usage: python benchmarks/bench_time_grammar.py [corpus_file]
+"""
+
+import os
+import sys
+import re
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytz
+from config import Config
+from time_grammar import TimeGrammar
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reminder_corpus.txt')
+
+# The only phrasing parse_simple_reminder resolved with high confidence before the grammar
+LEGACY_PATTERN = re.compile(r'(?:in|within|after)\s+(\d+)\s+(second|seconds|minute|minutes|hour|hours|day|days)')
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def main():
+    corpus = load_corpus(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS)
+    timezone = pytz.timezone(Config.DEFAULT_TIMEZONE)
+    grammar = TimeGrammar(timezone)
+    now = datetime.now(timezone)
+    
+    resolved = [message for message in corpus if grammar.parse(message, now)]
+    legacy = [message for message in corpus if LEGACY_PATTERN.search(message.lower())]
+    
+    rounds = max(1, 20000 // len(corpus))
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in corpus:
+            grammar.parse(message, now)
+    elapsed = time.perf_counter() - started
+    
+    print(f"corpus:              {len(corpus)} messages")
+    print(f"LLM avoided (old):   {len(legacy) / len(corpus):6.1%}")
+    print(f"LLM avoided (new):   {len(resolved) / len(corpus):6.1%}")
+    print(f"throughput:          {rounds * len(corpus) / elapsed:,.0f} parses/s")
+    print("\nStill needs the LLM:")
+    for message in corpus:
+        if message not in resolved:
+            print(f"  - {message}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark listing a power user's tasks: everything at once vs keyset pages vs streamed NDJSON
+
+"all at once" is the old /tasks/<phone> path (get_user_tasks() into one JSON
+document). Peak Python memory (tracemalloc) shows what grows with task count.
+
+Usage: python benchmarks/bench_user_tasks.py [tasks]   (default 50000)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+def all_at_once(database):
+    return len(json.dumps({'tasks': [task.to_dict() for task in database.get_user_tasks('power')]}))
+
+def first_page(database):
+    return len(json.dumps({'tasks': [task.to_dict() for task in database.get_user_tasks('power', limit=101)[:100]]}))
+
+def last_page(database):
+    """Walk every page like a client following next_cursor; report the bytes of all pages"""
+    size, cursor = 0, None
+    while True:
+        tasks = database.get_user_tasks('power', limit=100, after=cursor)
+        size += len(json.dumps({'tasks': [task.to_dict() for task in tasks]}))
+        if len(tasks) < 100:
+            return size
+        cursor = tasks[-1].cursor
+
+def ndjson_export(database):
+    return sum(len(json.dumps(task.to_dict()) + '\n') for task in database.iter_user_tasks('power'))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        due = datetime.now() + timedelta(days=1)
+        database.insert_tasks([Database.task_row('power', f'task {i}', due + timedelta(seconds=i)) for i in range(count)])
+        
+        print(f"one user with {count} pending tasks")
+        for label, function in [
+            ('all at once', all_at_once),
+            ('first page (100)', first_page),
+            ('every page (100)', last_page),
+            ('NDJSON export', ndjson_export),
+        ]:
+            tracemalloc.start()
+            started = time.perf_counter()
+            size = function(database)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{label:18s} {elapsed * 1000:9.1f} ms   {size / 2**20:6.1f} MiB out   peak {peak / 2**20:6.1f} MiB")
+        database.engine.dispose()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Bulk reminder import
+
+Streams CSV or NDJSON rows into the tasks table without touching the LLM:
+each row carries either an explicit ISO 8601 reminder_time or a message the
+local time grammar must resolve on its own. Valid rows are inserted
+BULK_IMPORT_BATCH_SIZE at a time, one executemany per transaction, so memory
+stays flat however large the input is. Each batch commits on its own; if the
+database fails mid-import, the report says how many rows made it in.
+
+Columns (CSV header) / keys (NDJSON objects):
+    user_phone                          required
+    task_description, reminder_time     e.g. "Pay rent", "2030-01-01T09:00" (naive = DEFAULT_TIMEZONE)
+    message                             or e.g. "remind me to pay rent tomorrow at 9am"
+
+Usage: python bulk_import.py reminders.csv [--format csv|ndjson] [--batch-size N]
+       python bulk_import.py - --format ndjson < reminders.ndjson
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Tuple
+import csv
+import json
+import sys
+import time
+import pytz
+from config import Config
+from database import Database
+from time_grammar import TimeGrammar
+
+MAX_PHONE_LENGTH = 20
+MAX_DESCRIPTION_LENGTH = 500
+
+
+class RowError(ValueError):
+    """A row that cannot be imported"""
+
+
+def detect_format(filename: str = None, content_type: str = None) -> str:
+    """'ndjson' for .ndjson/.jsonl files or an NDJSON content type, otherwise 'csv'"""
+    hint = f"{filename or ''} {content_type or ''}".lower()
+    return 'ndjson' if any(marker in hint for marker in ('ndjson', 'jsonl', 'json-seq')) else 'csv'
+
+
+def read_rows(lines: Iterable[str], fmt: str = 'csv') -> Iterator[Tuple[int, object]]:
+    """
+    Yield (line_number, record) pairs from a text stream, one row at a time
+    
+    A record is a dict, or a RowError for an NDJSON line that is not a JSON object.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f"invalid JSON: {e}")
+            continue
+        yield line_number, record if isinstance(record, dict) else RowError("not a JSON object")
+
+
+class BulkImporter:
+    """Validates rows and inserts them in batches"""
+    
+    def __init__(self, database: Database, timezone=None, batch_size: int = None, max_errors: int = 100):
+        self.database = database
+        self.timezone = timezone or pytz.timezone(Config.DEFAULT_TIMEZONE)
+        self.batch_size = batch_size or Config.BULK_IMPORT_BATCH_SIZE
+        self.max_errors = max_errors
+        self.grammar = TimeGrammar(self.timezone)
+    
+    def row_values(self, record, now: datetime) -> Dict:
+        """Validate one record and return its task_row(); raises RowError"""
+        if isinstance(record, RowError):
+            raise record
+        
+        user_phone = str(record.get('user_phone') or '').strip()
+        if not user_phone:
+            raise RowError("user_phone is required")
+        if len(user_phone) > MAX_PHONE_LENGTH:
+            raise RowError(f"user_phone is longer than {MAX_PHONE_LENGTH} characters")
+        
+        message = str(record.get('message') or '').strip()
+        if message:
+            parsed = self.grammar.parse(message, now)
+            if not parsed:
+                raise RowError("no reminder time recognized in message")
+            if parsed['confidence'] != 'high':
+                raise RowError("reminder time in message is ambiguous")
+            task_description, reminder_time = parsed['task_description'], parsed['reminder_time']
+        else:
+            task_description = str(record.get('task_description') or '').strip()
+            reminder_time = self._parse_time(record.get('reminder_time'))
+        
+        if not task_description:
+            raise RowError("task_description or message is required")
+        if len(task_description) > MAX_DESCRIPTION_LENGTH:
+            raise RowError(f"task_description is longer than {MAX_DESCRIPTION_LENGTH} characters")
+        if reminder_time <= (now if reminder_time.tzinfo else now.replace(tzinfo=None)):
+            raise RowError("reminder_time is in the past")
+        return Database.task_row(user_phone, task_description, reminder_time)
+    
+    def _parse_time(self, value) -> datetime:
+        """ISO 8601 timestamp; naive values stay naive (wall time in the configured timezone)"""
+        if not value:
+            raise RowError("reminder_time is required without a message")
+        try:
+            return datetime.fromisoformat(str(value).strip())
+        except ValueError:
+            raise RowError(f"reminder_time is not ISO 8601: {value!r}")
+    
+    def run(self, rows: Iterable[Tuple[int, object]]) -> Dict:
+        """
+        Import (line_number, record) pairs from read_rows
+        
+        Returns:
+            Report with rows, imported, rejected, errors (the first max_errors, by line),
+            seconds and rows_per_second; plus 'error' if the database stopped the import
+        """
+        started = time.perf_counter()
+        now = datetime.now(self.timezone)
+        report = {'rows': 0, 'imported': 0, 'rejected': 0, 'errors': []}
+        batch = []
+        try:
+            for line_number, record in rows:
+                report['rows'] += 1
+                try:
+                    batch.append(self.row_values(record, now))
+                except RowError as e:
+                    report['rejected'] += 1
+                    if len(report['errors']) < self.max_errors:
+                        report['errors'].append({'line': line_number, 'error': str(e)})
+                    continue
+                if len(batch) >= self.batch_size:
+                    report['imported'] += self.database.insert_tasks(batch)
+                    batch = []
+            if batch:
+                report['imported'] += self.database.insert_tasks(batch)
+        except Exception as e:
+            report['error'] = str(e)
+            print(f"❌ Import stopped after {report['imported']} rows: {e}")
+        
+        elapsed = time.perf_counter() - started
+        report['seconds'] = round(elapsed, 3)
+        report['rows_per_second'] = round(report['rows'] / elapsed, 1) if elapsed else 0.0
+        print(
+            f"📥 Imported {report['imported']}/{report['rows']} rows "
+            f"({report['rejected']} rejected) in {elapsed:.2f}s, {report['rows_per_second']} rows/s"
+        )
+        return report
+
+
+def main(argv=None):
+    """Command-line import from a file or stdin"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Bulk-import reminders from CSV or NDJSON")
+    parser.add_argument('path', help="input file, or - for stdin")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="default: from the file extension")
+    parser.add_argument('--batch-size', type=int, default=Config.BULK_IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    
+    database = Database()
+    if Config.DISPATCHER_MODE == 'external':
+        # Let the dispatcher know about imported reminders due before its next resync
+        from wake_signal import WakeSender
+        database.add_task_listener(
+            WakeSender(Config.DISPATCHER_WAKE_ADDRESS, Config.REMINDER_RESYNC_MINUTES * 60).notify
+        )
+    importer = BulkImporter(database, batch_size=args.batch_size)
+    fmt = args.format or detect_format(filename=args.path)
+    
+    if args.path == '-':
+        report = importer.run(read_rows(sys.stdin, fmt))
+    else:
+        with open(args.path, encoding='utf-8', newline='') as f:
+            report = importer.run(read_rows(f, fmt))
+    for error in report['errors']:
+        print(f"  line {error['line']}: {error['error']}")
+    if report['rejected'] > len(report['errors']):
+        print(f"  ... and {report['rejected'] - len(report['errors'])} more")
+    return 1 if 'error' in report else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,9 +16,28 @@ class Config:
     
     # OpenAI
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+    # Latency budget per parse; past it the local parser's low-confidence guess is used
+    LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '15'))
+    # Fire a second (hedged) LLM request once the first exceeds the observed p95 latency
+    LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'False') == 'True'
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+    # Messages arriving within this window share one multi-item LLM call
+    LLM_BATCH_WINDOW_MS = float(os.getenv('LLM_BATCH_WINDOW_MS', '20'))
+    LLM_BATCH_MAX_SIZE = int(os.getenv('LLM_BATCH_MAX_SIZE', '8'))
+    
+    # LLM parse-result cache shared by all processes on the host (empty path disables it)
+    PARSE_CACHE_PATH = os.getenv('PARSE_CACHE_PATH', 'parse_cache.db')
+    PARSE_CACHE_MAX_ENTRIES = int(os.getenv('PARSE_CACHE_MAX_ENTRIES', '10000'))
+    PARSE_CACHE_TTL_HOURS = float(os.getenv('PARSE_CACHE_TTL_HOURS', '168'))
+    # Slot templates learned from LLM parses (JSON, inspect with `python parse_templates.py`)
+    PARSE_TEMPLATES_PATH = os.getenv('PARSE_TEMPLATES_PATH', 'parse_templates.json')
+    PARSE_TEMPLATES_MAX = int(os.getenv('PARSE_TEMPLATES_MAX', '500'))
     
     # Telegram Bot (FREE)
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+    # How many updates the bot may handle at once (python-telegram-bot default is 1)
+    TELEGRAM_CONCURRENT_UPDATES = int(os.getenv('TELEGRAM_CONCURRENT_UPDATES', '64'))
     
     # Twilio WhatsApp (PAID)
     TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
@@ -27,10 +46,89 @@ class Config:
     
     # Database
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///reminders.db')
+    # How long a SQLite writer waits for another process's lock before erroring
+    SQLITE_BUSY_TIMEOUT_SECONDS = float(os.getenv('SQLITE_BUSY_TIMEOUT_SECONDS', '30'))
+    # WAL lets readers (bot, /list) run while the dispatcher writes; NORMAL skips an fsync per commit
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    # Connection pool (PostgreSQL, and SQLite files)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv('DB_POOL_RECYCLE_SECONDS', '1800'))
+    # Group commit: concurrent add_task calls share one transaction. The window (ms) trades
+    # a little insert latency for fewer commits; 0 only groups inserts that queued up during a commit
+    DB_GROUP_COMMIT = os.getenv('DB_GROUP_COMMIT', 'False') == 'True'
+    DB_GROUP_COMMIT_WINDOW_MS = float(os.getenv('DB_GROUP_COMMIT_WINDOW_MS', '2'))
+    DB_GROUP_COMMIT_MAX_BATCH = int(os.getenv('DB_GROUP_COMMIT_MAX_BATCH', '500'))
+    # Bulk import (bulk_import.py, POST /tasks/import): rows inserted per transaction
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', '5000'))
+    # Bearer token required by POST /tasks/import (unset disables the endpoint)
+    IMPORT_API_TOKEN = os.getenv('IMPORT_API_TOKEN')
+    # Reminders per /list page (Telegram pages with next/previous buttons)
+    LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', '10'))
+    # Default page size for GET /tasks/<phone> (?limit= may ask for up to 1000)
+    TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', '100'))
+    # Cache of per-user pending pages/counts, invalidated on every write (0 users disables it).
+    # Invalidations go through TASK_CACHE_PATH (a local SQLite file) so every process on the host -
+    # gunicorn workers, dispatchers - sees each other's writes; '' keeps them in memory, which is
+    # only safe for a single process (other processes' writes then show up after the TTL)
+    TASK_CACHE_MAX_USERS = int(os.getenv('TASK_CACHE_MAX_USERS', '10000'))
+    TASK_CACHE_TTL_SECONDS = float(os.getenv('TASK_CACHE_TTL_SECONDS', '60'))
+    TASK_CACHE_PATH = os.getenv('TASK_CACHE_PATH', 'task_cache.db')
+    # Retention: every TASK_ARCHIVE_INTERVAL_MINUTES (0 disables) reminders that were delivered or given up
+    # on, and were due more than TASK_RETENTION_DAYS ago, move to tasks_archive TASK_ARCHIVE_BATCH_SIZE at a time.
+    # TASK_ARCHIVE_URL puts the archive in another database; strftime codes rotate it (sqlite:///archive-%Y-%m.db)
+    TASK_RETENTION_DAYS = float(os.getenv('TASK_RETENTION_DAYS', '7'))
+    TASK_ARCHIVE_INTERVAL_MINUTES = float(os.getenv('TASK_ARCHIVE_INTERVAL_MINUTES', '60'))
+    TASK_ARCHIVE_BATCH_SIZE = int(os.getenv('TASK_ARCHIVE_BATCH_SIZE', '1000'))
+    TASK_ARCHIVE_URL = os.getenv('TASK_ARCHIVE_URL', '')
     
     # Timezone
     DEFAULT_TIMEZONE = os.getenv('DEFAULT_TIMEZONE', 'Asia/Kolkata')
     
+    # Scheduler
+    # Safety-net reload of the in-memory timer heap (catches rows written by other processes)
+    REMINDER_RESYNC_MINUTES = int(os.getenv('REMINDER_RESYNC_MINUTES', '5'))
+    # Dispatchers claim due reminders with a lease so several workers never send the same one
+    REMINDER_LEASE_SECONDS = int(os.getenv('REMINDER_LEASE_SECONDS', '300'))
+    REMINDER_CLAIM_BATCH = int(os.getenv('REMINDER_CLAIM_BATCH', '500'))
+    # A failed send is retried after REMINDER_RETRY_SECONDS, up to REMINDER_MAX_ATTEMPTS times
+    REMINDER_RETRY_SECONDS = int(os.getenv('REMINDER_RETRY_SECONDS', '60'))
+    REMINDER_MAX_ATTEMPTS = int(os.getenv('REMINDER_MAX_ATTEMPTS', '5'))
+    # Catching up after downtime: reminders more than REMINDER_LATE_SECONDS overdue are
+    # paced at REMINDER_CATCHUP_RATE messages/s (0 = unpaced)
+    REMINDER_LATE_SECONDS = int(os.getenv('REMINDER_LATE_SECONDS', '60'))
+    REMINDER_CATCHUP_RATE = float(os.getenv('REMINDER_CATCHUP_RATE', '5'))
+    # Reminders older than REMINDER_STALE_MINUTES: 'send', 'collapse' (one summary per user) or 'drop'
+    REMINDER_STALE_MINUTES = int(os.getenv('REMINDER_STALE_MINUTES', '60'))
+    REMINDER_STALE_POLICY = os.getenv('REMINDER_STALE_POLICY', 'send')
+    # A user's reminders due within this many seconds of each other are sent as one message (0 = never)
+    REMINDER_COALESCE_SECONDS = int(os.getenv('REMINDER_COALESCE_SECONDS', '60'))
+    # Dispatcher identity in claimed_by (default: hostname-pid)
+    WORKER_ID = os.getenv('WORKER_ID')
+    # 'embedded': web/bot processes run their own dispatcher (single-process setups)
+    # 'external': they only enqueue; `python dispatcher.py` sends the reminders
+    DISPATCHER_MODE = os.getenv('DISPATCHER_MODE', 'embedded').lower()
+    # UDP host:port the dispatcher listens on for new-task signals (empty disables)
+    DISPATCHER_WAKE_ADDRESS = os.getenv('DISPATCHER_WAKE_ADDRESS', '127.0.0.1:8765')
+    
+    # Telegram delivery (Bot API allows ~30 messages/s overall, ~1 message/s per chat)
+    TELEGRAM_MAX_CONCURRENT_SENDS = int(os.getenv('TELEGRAM_MAX_CONCURRENT_SENDS', '20'))
+    # HTTP connections kept for update handlers' replies, on top of one per concurrent send
+    TELEGRAM_HANDLER_CONNECTIONS = int(os.getenv('TELEGRAM_HANDLER_CONNECTIONS', '16'))
+    TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))
+    TELEGRAM_PER_CHAT_RATE = float(os.getenv('TELEGRAM_PER_CHAT_RATE', '1'))
+    TELEGRAM_PER_CHAT_BURST = float(os.getenv('TELEGRAM_PER_CHAT_BURST', '3'))
+    TELEGRAM_SEND_RETRIES = int(os.getenv('TELEGRAM_SEND_RETRIES', '3'))
+    
+    # Voice reminder cache (synthesized MP3s + uploaded Telegram file_ids)
+    VOICE_CACHE_DIR = os.getenv('VOICE_CACHE_DIR', '.voice_cache')
+    VOICE_CACHE_MAX_MB = int(os.getenv('VOICE_CACHE_MAX_MB', '100'))
+    VOICE_CACHE_MEMORY_MB = int(os.getenv('VOICE_CACHE_MEMORY_MB', '16'))
+    TTS_WORKERS = int(os.getenv('TTS_WORKERS', '4'))
+    # Render voice notes for reminders due within this many minutes ahead of time
+    VOICE_PRERENDER_MINUTES = int(os.getenv('VOICE_PRERENDER_MINUTES', '5'))
+    
     @staticmethod
     def validate():
         """Validate required configuration"""
@@ -0,0 +1,16 @@
+import pytest
+from config import Config
+from database import Database
+
+@pytest.fixture(autouse=True)
+def task_cache_path(tmp_path, monkeypatch):
+    """Keep every Database's shared task cache file out of the working directory"""
+    monkeypatch.setattr(Config, 'TASK_CACHE_PATH', str(tmp_path / 'task_cache.db'))
+
+@pytest.fixture
+def database(tmp_path):
+    """Create a throwaway SQLite database"""
+    database = Database(f"sqlite:///{tmp_path / 'reminders.db'}")
+    yield database
+    # Close pooled connections now; left to the GC, closing a WAL database checkpoints mid-test elsewhere
+    database.engine.dispose()
@@ -1,11 +1,26 @@
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean
+from sqlalchemy import create_engine, event, inspect, text, bindparam, func, select, update, Column, Integer, BigInteger, String, DateTime, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+import pytz
 from config import Config
+from group_commit import GroupCommitWriter
+from task_cache import TaskListCache
 
 Base = declarative_base()
 
+def to_epoch_ms(value):
+    """Convert a datetime to UTC epoch milliseconds (naive values are local wall time)"""
+    if value.tzinfo is None:
+        value = pytz.timezone(Config.DEFAULT_TIMEZONE).localize(value)
+    return int(round(value.timestamp() * 1000))
+
+def to_local_naive(value):
+    """Convert a datetime to naive wall time in the configured timezone"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(pytz.timezone(Config.DEFAULT_TIMEZONE)).replace(tzinfo=None)
+
 class Task(Base):
     """Task model for storing reminders"""
     __tablename__ = 'tasks'
@@ -14,87 +29,605 @@ class Task(Base):
     user_phone = Column(String(20), nullable=False)
     task_description = Column(String(500), nullable=False)
     reminder_time = Column(DateTime, nullable=False)
+    # UTC epoch milliseconds; used for all ordering and due-time comparisons
+    reminder_at_ms = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # No longer pending: delivered (sent_at) or given up on (failed_at)
     is_sent = Column(Boolean, default=False)
     sent_at = Column(DateTime, nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
+    # Dispatch lease: the worker currently sending this reminder, and until when (epoch ms)
+    claimed_by = Column(String(64), nullable=True)
+    lease_until_ms = Column(BigInteger, nullable=True)
+    
+    __table_args__ = (
+        # Dispatcher: unsent rows ordered by due time (partial, so sent rows never bloat it)
+        Index(
+            'ix_tasks_pending_due',
+            reminder_at_ms,
+            sqlite_where=is_sent == False,
+            postgresql_where=is_sent == False
+        ),
+        # /list and /tasks/<phone>: a user's tasks filtered by status, ordered by due time
+        Index('ix_tasks_user_status_due', user_phone, is_sent, reminder_at_ms),
+    )
     
     def __repr__(self):
         return f"<Task(id={self.id}, user={self.user_phone}, task={self.task_description[:30]})>"
     
+    @property
+    def cursor(self):
+        """Keyset position (reminder_at_ms, id) for paging"""
+        return (self.reminder_at_ms, self.id)
+    
     def to_dict(self):
         return {
             'id': self.id,
             'user_phone': self.user_phone,
             'task_description': self.task_description,
             'reminder_time': self.reminder_time.isoformat(),
+            'reminder_at_ms': self.reminder_at_ms,
             'created_at': self.created_at.isoformat(),
             'is_sent': self.is_sent,
-            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'failed_at': self.failed_at.isoformat() if self.failed_at else None,
+            'attempts': self.attempts,
+            'claimed_by': self.claimed_by,
+            'lease_until_ms': self.lease_until_ms
         }
 
 
+class ArchivedTask(Base):
+    """Tasks moved out of the hot table once no longer pending (see Database.archive_tasks)"""
+    __tablename__ = 'tasks_archive'
+    
+    # Same columns as Task; ids are copied, not generated
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_phone = Column(String(20), nullable=False)
+    task_description = Column(String(500), nullable=False)
+    reminder_time = Column(DateTime, nullable=False)
+    reminder_at_ms = Column(BigInteger, nullable=True)
+    created_at = Column(DateTime)
+    is_sent = Column(Boolean)
+    sent_at = Column(DateTime, nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer)
+    claimed_by = Column(String(64), nullable=True)
+    lease_until_ms = Column(BigInteger, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_tasks_archive_user_due', user_phone, reminder_at_ms),
+    )
+
+
 class Database:
     """Database manager"""
     
+    # Columns added after the first release, created by migrate() on old databases
+    # (types come from the Task model, rendered for the connected dialect)
+    ADDED_COLUMNS = ['reminder_at_ms', 'claimed_by', 'lease_until_ms', 'failed_at', 'attempts']
+    
     def __init__(self, database_url=None):
         self.database_url = database_url or Config.DATABASE_URL
-        self.engine = create_engine(self.database_url)
+        self.engine = create_engine(self.database_url, **self._engine_options())
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', self._configure_sqlite_connection)
         Base.metadata.create_all(self.engine)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.migrate()
+        # Returned tasks are used after their session closes; don't expire them on commit
+        self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False)
+        # One session per thread (bot event loop, dispatcher, Flask workers)
+        self.Session = scoped_session(self.SessionLocal)
+        self._task_listeners = []
+        # TASK_ARCHIVE_URL engine, replaced when its strftime codes roll over
+        self._archive_url = None
+        self._archive_engine = None
+        # Per-user pending pages/counts; every write below invalidates the users it touches
+        self.task_cache = None
+        if Config.TASK_CACHE_MAX_USERS:
+            self.task_cache = TaskListCache(
+                max_users=Config.TASK_CACHE_MAX_USERS,
+                ttl_seconds=Config.TASK_CACHE_TTL_SECONDS,
+                shared_path=Config.TASK_CACHE_PATH or None
+            )
+        # Optional: concurrent add_task calls share one commit
+        self.writer = None
+        if Config.DB_GROUP_COMMIT:
+            self.writer = GroupCommitWriter(
+                self,
+                window_seconds=Config.DB_GROUP_COMMIT_WINDOW_MS / 1000,
+                max_batch=Config.DB_GROUP_COMMIT_MAX_BATCH
+            )
+    
+    def _engine_options(self):
+        """create_engine() keyword arguments for this database from Config"""
+        if not self.database_url.startswith('sqlite'):
+            return {
+                'pool_size': Config.DB_POOL_SIZE,
+                'max_overflow': Config.DB_MAX_OVERFLOW,
+                'pool_recycle': Config.DB_POOL_RECYCLE_SECONDS,
+                'pool_pre_ping': True
+            }
+        # Several threads and dispatcher processes may write at once; wait for the lock instead of failing
+        options = {'connect_args': {'timeout': Config.SQLITE_BUSY_TIMEOUT_SECONDS}}
+        if ':memory:' not in self.database_url and self.database_url not in ('sqlite://', 'sqlite:///'):
+            options['pool_size'] = Config.DB_POOL_SIZE
+            options['max_overflow'] = Config.DB_MAX_OVERFLOW
+        return options
+    
+    @staticmethod
+    def _configure_sqlite_connection(dbapi_connection, connection_record):
+        """WAL lets readers run alongside the writer; NORMAL sync is safe under WAL"""
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f'PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}')
+            cursor.execute(f'PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}')
+        finally:
+            cursor.close()
+    
+    def migrate(self):
+        """Bring an existing tasks table up to the current schema"""
+        columns = {column['name'] for column in inspect(self.engine).get_columns('tasks')}
+        for name in self.ADDED_COLUMNS:
+            if name not in columns:
+                print(f"🔧 Migrating tasks table: adding {name}")
+                column_type = Task.__table__.c[name].type.compile(dialect=self.engine.dialect)
+                with self.engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE tasks ADD COLUMN {name} {column_type}'))
+        
+        # Backfill rows written before the column existed (or by older code)
+        with self.engine.begin() as connection:
+            rows = connection.execute(
+                text('SELECT id, reminder_time FROM tasks WHERE reminder_at_ms IS NULL')
+            ).all()
+            if rows:
+                print(f"🔧 Backfilling reminder_at_ms for {len(rows)} tasks")
+                connection.execute(
+                    Task.__table__.update()
+                    .where(Task.__table__.c.id == bindparam('task_id'))
+                    .values(reminder_at_ms=bindparam('epoch_ms')),
+                    [
+                        {'task_id': task_id, 'epoch_ms': to_epoch_ms(self._as_datetime(reminder_time))}
+                        for task_id, reminder_time in rows
+                    ]
+                )
+        
+        # create_all() skips indexes on tables that already exist
+        for index in Task.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+    
+    @staticmethod
+    def _as_datetime(value):
+        """Raw SQL on SQLite returns DATETIME columns as strings"""
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return value
     
     def get_session(self):
-        """Get a new database session"""
-        return self.SessionLocal()
+        """Get this thread's database session (close it when done)"""
+        return self.Session()
+    
+    def add_task_listener(self, callback):
+        """Register a callback invoked with every newly committed task"""
+        self._task_listeners.append(callback)
+    
+    def invalidate_users(self, user_phones):
+        """Drop cached task lists of users whose tasks were just written"""
+        if self.task_cache:
+            self.task_cache.invalidate(user_phones)
+    
+    def _notify_task_listeners(self, task):
+        """Tell registered listeners (e.g. the scheduler) about a new task"""
+        for callback in self._task_listeners:
+            try:
+                callback(task)
+            except Exception as e:
+                print(f"⚠️ Task listener failed for task {task.id}: {e}")
+    
+    @staticmethod
+    def task_row(user_phone, task_description, reminder_time):
+        """Column values for a new reminder"""
+        return {
+            'user_phone': user_phone,
+            'task_description': task_description,
+            'reminder_time': to_local_naive(reminder_time),
+            'reminder_at_ms': to_epoch_ms(reminder_time)
+        }
+    
+    @staticmethod
+    def new_task(user_phone, task_description, reminder_time):
+        """Build an unsaved Task for a reminder"""
+        return Task(**Database.task_row(user_phone, task_description, reminder_time))
     
     def add_task(self, user_phone, task_description, reminder_time):
         """Add a new task to the database"""
+        task = self.new_task(user_phone, task_description, reminder_time)
+        if self.writer:
+            return self.writer.submit(task).result()
+        
         session = self.get_session()
         try:
-            task = Task(
-                user_phone=user_phone,
-                task_description=task_description,
-                reminder_time=reminder_time
-            )
             session.add(task)
             session.commit()
-            session.refresh(task)
+            self.invalidate_users([task.user_phone])
+            self._notify_task_listeners(task)
             return task
         finally:
             session.close()
     
-    def get_pending_reminders(self, current_time):
-        """Get all pending reminders that should be sent"""
+    def insert_tasks(self, rows):
+        """
+        Insert many tasks in one transaction (bulk import)
+        
+        Args:
+            rows: List of task_row() dicts
+        
+        Returns:
+            Number of rows inserted
+        """
+        statement = Task.__table__.insert()
+        with self.engine.begin() as connection:
+            if self._task_listeners:
+                # Listeners need the new ids: multi-row INSERT ... RETURNING, in row order
+                ids = connection.execute(statement.returning(Task.id, sort_by_parameter_order=True), rows).scalars().all()
+            else:
+                # Nobody needs the new ids: a plain executemany
+                connection.execute(statement, rows)
+                ids = []
+        self.invalidate_users(row['user_phone'] for row in rows)
+        for task_id, row in zip(ids, rows):
+            self._notify_task_listeners(Task(id=task_id, **row))
+        return len(rows)
+    
+    @staticmethod
+    def _after(cursor):
+        """Keyset condition: rows ordered after (reminder_at_ms, id)"""
+        reminder_at_ms, task_id = cursor
+        return (Task.reminder_at_ms > reminder_at_ms) | (
+            (Task.reminder_at_ms == reminder_at_ms) & (Task.id > task_id)
+        )
+    
+    @staticmethod
+    def _before(cursor):
+        """Keyset condition: rows ordered before (reminder_at_ms, id)"""
+        reminder_at_ms, task_id = cursor
+        return (Task.reminder_at_ms < reminder_at_ms) | (
+            (Task.reminder_at_ms == reminder_at_ms) & (Task.id < task_id)
+        )
+    
+    def get_pending_reminders(self, current_time, chunk_size=500):
+        """
+        Yield pending reminders that should be sent, oldest first
+        
+        Rows are read in keyset-paginated chunks of `chunk_size` (one short
+        session each), so a large backlog never sits in memory at once.
+        """
+        now_ms = to_epoch_ms(current_time)
+        cursor = None
+        while True:
+            session = self.get_session()
+            try:
+                query = session.query(Task).filter(
+                    Task.is_sent == False,
+                    Task.reminder_at_ms <= now_ms
+                )
+                if cursor:
+                    query = query.filter(self._after(cursor))
+                tasks = query.order_by(Task.reminder_at_ms, Task.id).limit(chunk_size).all()
+            finally:
+                session.close()
+            
+            yield from tasks
+            if len(tasks) < chunk_size:
+                return
+            cursor = (tasks[-1].reminder_at_ms, tasks[-1].id)
+    
+    def claim_due_tasks(self, worker_id, current_time, limit=100, lease_seconds=None, after=None):
+        """
+        Atomically claim up to `limit` due, unsent tasks for one dispatcher
+        
+        A single UPDATE takes rows that are unclaimed or whose lease has
+        expired, so concurrent workers (threads, processes or hosts) never get
+        the same row while its lease is valid. A worker that dies mid-send
+        loses its claim when the lease runs out and the task is retried.
+        
+        Args:
+            worker_id: Identifies the claiming dispatcher
+            current_time: Tasks due at or before this time are claimed
+            limit: Maximum number of tasks to claim
+            lease_seconds: How long the claim is exclusive (default REMINDER_LEASE_SECONDS)
+            after: Keyset cursor (reminder_at_ms, id) of the previous batch's
+                last task; only later rows are claimed, so a long drain never
+                rescans rows it has already passed
+        
+        Returns:
+            The claimed tasks, ordered by due time
+        """
+        now_ms = to_epoch_ms(current_time)
+        lease_until_ms = now_ms + int((lease_seconds if lease_seconds is not None else Config.REMINDER_LEASE_SECONDS) * 1000)
+        claimable = (
+            (Task.is_sent == False) &
+            (Task.reminder_at_ms <= now_ms) &
+            ((Task.lease_until_ms == None) | (Task.lease_until_ms <= now_ms))
+        )
+        if after:
+            claimable = claimable & self._after(after)
+        candidates = (
+            select(Task.id)
+            .where(claimable)
+            .order_by(Task.reminder_at_ms, Task.id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        
         session = self.get_session()
         try:
-            tasks = session.query(Task).filter(
-                Task.is_sent == False,
-                Task.reminder_time <= current_time
+            # The claimable condition is repeated on the outer UPDATE so a row
+            # claimed by someone else after the subquery ran is skipped
+            # RETURNING gives exactly this claim's rows, even when the same
+            # worker claims twice within one millisecond
+            claimed_ids = session.execute(
+                update(Task)
+                .where(Task.id.in_(candidates), claimable)
+                .values(claimed_by=worker_id, lease_until_ms=lease_until_ms)
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            session.commit()
+            if not claimed_ids:
+                return []
+            return session.query(Task).filter(
+                Task.id.in_(claimed_ids)
+            ).order_by(Task.reminder_at_ms, Task.id).all()
+        finally:
+            session.close()
+    
+    def get_reminder_schedule(self):
+        """Get (id, reminder_at_ms) pairs for every unsent task"""
+        session = self.get_session()
+        try:
+            return session.query(Task.id, Task.reminder_at_ms).filter(
+                Task.is_sent == False
             ).all()
-            return tasks
+        finally:
+            session.close()
+    
+    def get_tasks(self, task_ids):
+        """Get tasks by id"""
+        session = self.get_session()
+        try:
+            return session.query(Task).filter(Task.id.in_(list(task_ids))).all()
         finally:
             session.close()
     
     def mark_task_sent(self, task_id):
         """Mark a task as sent"""
+        return self.record_outcomes(None, sent_ids=[task_id])['sent'] > 0
+    
+    def record_outcomes(self, worker_id, sent_ids=(), failed_ids=(), retries=None):
+        """
+        Record the delivery results of a dispatched batch in one transaction
+        
+        Each kind of outcome is a single set-based UPDATE (retries share one
+        executemany statement), so a batch costs one commit instead of a
+        SELECT and a commit per task.
+        
+        Args:
+            worker_id: The dispatcher that claimed the tasks; failures and
+                retries are only applied while it still holds the claim
+            sent_ids: Delivered tasks
+            failed_ids: Tasks that will never be delivered (e.g. bot blocked)
+            retries: {task_id: retry_at} for transient failures; the task is
+                released and becomes claimable again at retry_at
+        
+        Returns:
+            Rows updated per outcome: {'sent': n, 'failed': n, 'retry': n}
+        """
+        tasks = Task.__table__
+        now = datetime.utcnow()
+        attempts = func.coalesce(tasks.c.attempts, 0) + 1
+        counts = {'sent': 0, 'failed': 0, 'retry': 0}
+        users = set()
+        
         session = self.get_session()
         try:
-            task = session.query(Task).filter(Task.id == task_id).first()
-            if task:
-                task.is_sent = True
-                task.sent_at = datetime.utcnow()
-                session.commit()
-                return True
-            return False
+            # UPDATEs only (no read first): a read-then-write transaction can
+            # deadlock against other SQLite writers instead of waiting
+            if sent_ids:
+                sent_users = session.execute(
+                    tasks.update()
+                    .where(tasks.c.id.in_(list(sent_ids)))
+                    .values(is_sent=True, sent_at=now)
+                    .returning(tasks.c.user_phone)
+                ).scalars().all()
+                counts['sent'] = len(sent_users)
+                users.update(sent_users)
+            if failed_ids:
+                failed_users = session.execute(
+                    tasks.update()
+                    .where(tasks.c.id.in_(list(failed_ids)), tasks.c.claimed_by == worker_id)
+                    .values(is_sent=True, failed_at=now, attempts=attempts)
+                    .returning(tasks.c.user_phone)
+                ).scalars().all()
+                counts['failed'] = len(failed_users)
+                users.update(failed_users)
+            if retries:
+                # The lease doubles as "not before": claimable again once it passes
+                counts['retry'] = session.execute(
+                    tasks.update()
+                    .where(tasks.c.id == bindparam('task_id'), tasks.c.claimed_by == worker_id)
+                    .values(claimed_by=None, lease_until_ms=bindparam('retry_at_ms'), attempts=attempts),
+                    [
+                        {'task_id': task_id, 'retry_at_ms': to_epoch_ms(retry_at)}
+                        for task_id, retry_at in retries.items()
+                    ]
+                ).rowcount
+                # executemany can't RETURN; the rows are already locked by the UPDATE
+                users.update(session.execute(
+                    select(tasks.c.user_phone).where(tasks.c.id.in_(list(retries))).distinct()
+                ).scalars())
+            session.commit()
         finally:
             session.close()
+        self.invalidate_users(users)
+        return counts
+    
+    def archive_tasks(self, older_than, batch_size=1000, max_batches=None):
+        """
+        Move tasks that are no longer pending and were due before `older_than` to tasks_archive
+        
+        Each batch is copied into the archive, then deleted from tasks, in
+        short separate transactions so dispatchers keep writing in between.
+        A batch interrupted between the two steps is copied again next time
+        (duplicates are ignored). Pending tasks are never touched, so the
+        task cache needs no invalidation.
+        
+        Args:
+            older_than: Due-time cutoff (aware, or naive local wall time)
+            batch_size: Rows per batch
+            max_batches: Stop after this many batches (None: until nothing is left)
+        
+        Returns:
+            Number of tasks moved
+        """
+        tasks = Task.__table__
+        archive = self.get_archive_engine()
+        insert = self._insert_ignoring_duplicates(archive)
+        archivable = select(tasks).where(
+            tasks.c.is_sent == True,
+            tasks.c.reminder_at_ms < to_epoch_ms(older_than),
+            # Keep the newest row: SQLite hands out max(id) + 1, so deleting it would reuse ids
+            tasks.c.id < select(func.max(tasks.c.id)).scalar_subquery()
+        ).order_by(tasks.c.id).limit(batch_size)
+        
+        moved = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with self.engine.connect() as connection:
+                rows = connection.execute(archivable).mappings().all()
+            if not rows:
+                break
+            archived_at = datetime.utcnow()
+            with archive.begin() as connection:
+                connection.execute(insert, [dict(row, archived_at=archived_at) for row in rows])
+            with self.engine.begin() as connection:
+                connection.execute(
+                    tasks.delete().where(tasks.c.id.in_([row['id'] for row in rows]), tasks.c.is_sent == True)
+                )
+            moved += len(rows)
+            batches += 1
+            if len(rows) < batch_size:
+                break
+        return moved
+    
+    def get_archive_engine(self):
+        """Engine holding tasks_archive: this database, or TASK_ARCHIVE_URL with its strftime codes applied"""
+        if not Config.TASK_ARCHIVE_URL:
+            return self.engine
+        url = datetime.now().strftime(Config.TASK_ARCHIVE_URL)
+        if url != self._archive_url:
+            if self._archive_engine is not None:
+                self._archive_engine.dispose()
+            engine = create_engine(url)
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', self._configure_sqlite_connection)
+            ArchivedTask.__table__.create(engine, checkfirst=True)
+            self._archive_url, self._archive_engine = url, engine
+        return self._archive_engine
+    
+    @staticmethod
+    def _insert_ignoring_duplicates(engine):
+        """INSERT into tasks_archive that skips ids already archived"""
+        table = ArchivedTask.__table__
+        if engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            return insert(table).on_conflict_do_nothing(index_elements=['id'])
+        if engine.dialect.name == 'sqlite':
+            return table.insert().prefix_with('OR IGNORE')
+        return table.insert()
     
-    def get_user_tasks(self, user_phone, include_sent=False):
-        """Get all tasks for a specific user"""
+    @staticmethod
+    def user_tasks_query(user_phone, include_sent=False, limit=None, after=None, before=None):
+        """
+        SELECT a user's tasks in (reminder_at_ms, id) order, optionally one keyset page
+        
+        With `before` the page is selected newest first (so LIMIT keeps the rows
+        closest to the cursor); get_user_tasks() puts it back in order.
+        """
+        query = select(Task).where(Task.user_phone == user_phone)
+        if not include_sent:
+            query = query.where(Task.is_sent == False)
+        if after:
+            query = query.where(Database._after(after))
+        if before:
+            query = query.where(Database._before(before)).order_by(Task.reminder_at_ms.desc(), Task.id.desc())
+        else:
+            query = query.order_by(Task.reminder_at_ms, Task.id)
+        if limit:
+            query = query.limit(limit)
+        return query
+    
+    def get_user_tasks(self, user_phone, include_sent=False, limit=None, after=None, before=None):
+        """
+        Get a user's tasks, all of them or one keyset page
+        
+        Pages of pending tasks are served from task_cache when possible.
+        
+        Args:
+            user_phone: User identifier
+            include_sent: Include tasks that are no longer pending
+            limit: Page size (None returns every task)
+            after: Task.cursor of the previous page's last task
+            before: Task.cursor of the next page's first task
+        """
+        # Whole lists are unbounded, and sent tasks are admin-only: neither is cached
+        cache = self.task_cache if limit and not include_sent else None
+        key = ('tasks', limit, after, before)
+        if cache:
+            tasks, token = cache.lookup(user_phone, key)
+            if tasks is not None:
+                return list(tasks)
+        
         session = self.get_session()
         try:
-            query = session.query(Task).filter(Task.user_phone == user_phone)
-            if not include_sent:
-                query = query.filter(Task.is_sent == False)
-            return query.order_by(Task.reminder_time).all()
+            query = self.user_tasks_query(user_phone, include_sent, limit, after, before)
+            tasks = session.execute(query).scalars().all()
+        finally:
+            session.close()
+        if before:
+            tasks.reverse()
+        if cache:
+            cache.store(user_phone, key, tuple(tasks), token)
+        return tasks
+    
+    @staticmethod
+    def pending_count_query(user_phone):
+        """SELECT the number of a user's pending tasks"""
+        return select(func.count()).select_from(Task).where(Task.user_phone == user_phone, Task.is_sent == False)
+    
+    def count_pending_tasks(self, user_phone):
+        """Number of a user's pending tasks (cached like get_user_tasks pages)"""
+        if self.task_cache:
+            count, token = self.task_cache.lookup(user_phone, 'count')
+            if count is not None:
+                return count
+        session = self.get_session()
+        try:
+            count = session.execute(self.pending_count_query(user_phone)).scalar()
+        finally:
+            session.close()
+        if self.task_cache:
+            self.task_cache.store(user_phone, 'count', count, token)
+        return count
+    
+    def iter_user_tasks(self, user_phone, include_sent=False, chunk_size=500):
+        """Stream all of a user's tasks for export, fetching chunk_size rows at a time"""
+        # A session of its own: the thread's scoped session may be closed mid-stream
+        session = self.SessionLocal()
+        try:
+            query = self.user_tasks_query(user_phone, include_sent).execution_options(yield_per=chunk_size)
+            yield from session.execute(query).scalars()
         finally:
             session.close()
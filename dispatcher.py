@@ -0,0 +1,67 @@
+"""
+Standalone reminder dispatcher
+
+Owns the ReminderScheduler for the configured platform without loading Flask
+or the LLM stack, so web/bot workers and dispatchers can be scaled separately:
+
+    DISPATCHER_MODE=external gunicorn app:app     # web: only enqueues tasks
+    DISPATCHER_MODE=external python app_telegram.py   # bot: only enqueues tasks
+    python dispatcher.py                         # sends the reminders
+
+Several dispatchers may run at once; claims/leases in the database keep them
+from sending the same reminder twice.
+"""
+
+import os
+import signal
+import threading
+from config import Config
+from database import Database
+from wake_signal import WakeListener
+
+
+def build_scheduler(database: Database):
+    """Scheduler plus sending client for MESSAGING_PLATFORM"""
+    if Config.MESSAGING_PLATFORM == 'telegram':
+        from app_telegram import TelegramReminderScheduler
+        from telegram_service import TelegramService
+        telegram_service = TelegramService(database, task_parser=None)
+        telegram_service.start_sender()
+        return TelegramReminderScheduler(database, telegram_service)
+    
+    from scheduler import ReminderScheduler
+    from whatsapp_service import WhatsAppService
+    return ReminderScheduler(database, WhatsAppService())
+
+
+def main():
+    """Main entry point for the dispatcher"""
+    required = ['TELEGRAM_BOT_TOKEN'] if Config.MESSAGING_PLATFORM == 'telegram' else ['TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN']
+    missing = [key for key in required if not os.getenv(key)]
+    if missing:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+    
+    print("=" * 60)
+    print(f"📮 Reminder dispatcher ({Config.MESSAGING_PLATFORM})")
+    print(f"⏰ Timezone: {Config.DEFAULT_TIMEZONE}")
+    print("=" * 60)
+    
+    database = Database()
+    reminder_scheduler = build_scheduler(database)
+    reminder_scheduler.start()
+    listener = WakeListener(Config.DISPATCHER_WAKE_ADDRESS, reminder_scheduler.wake)
+    listener.start()
+    
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    print("\n⏹️ Shutting down...")
+    listener.stop()
+    reminder_scheduler.stop()
+
+
+if __name__ == '__main__':
+    main()
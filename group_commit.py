@@ -0,0 +1,100 @@
+"""
+Group commit for new tasks
+
+Every add_task used to be its own transaction: one commit (an fsync on
+SQLite) per reminder, with concurrent Flask workers and bot handlers queueing
+on the write lock. GroupCommitWriter hands inserts to one writer thread that
+commits whatever has queued up as a single transaction. Callers block on a
+future that resolves only after the commit, so durability is unchanged.
+
+DB_GROUP_COMMIT_WINDOW_MS is the latency knob: 0 adds no delay (inserts that
+arrive while a commit is in progress simply share the next one); a few
+milliseconds gathers larger batches at the cost of that much latency.
+"""
+
+from concurrent.futures import Future
+from typing import Dict
+import threading
+import time
+
+
+class GroupCommitWriter:
+    """Commits tasks queued by many callers in shared transactions"""
+    
+    def __init__(self, database, window_seconds: float = 0.0, max_batch: int = 500):
+        self.database = database
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.commits = 0
+        self.tasks = 0
+        self._pending = []
+        self._opened_at = None
+        self._wakeup = threading.Condition()
+        self._thread = threading.Thread(target=self._collect_loop, name='group-commit', daemon=True)
+        self._thread.start()
+    
+    def submit(self, task) -> Future:
+        """Queue a new Task; the future resolves to it (with its id) once committed"""
+        future = Future()
+        with self._wakeup:
+            if not self._pending:
+                self._opened_at = time.monotonic()
+            self._pending.append((task, future))
+            self._wakeup.notify()
+        return future
+    
+    def _collect_loop(self):
+        """Close a batch when it is full or its window has elapsed, then commit it"""
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                while len(self._pending) < self.max_batch:
+                    remaining = self._opened_at + self.window_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._opened_at = time.monotonic()
+            self._flush(batch)
+    
+    def _flush(self, batch):
+        """Insert the batch in one transaction; if that fails, row by row so one bad row fails alone"""
+        try:
+            self._commit([task for task, _ in batch])
+        except Exception:
+            for task, future in batch:
+                try:
+                    self._commit([task])
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(task)
+            return
+        for task, future in batch:
+            future.set_result(task)
+    
+    def _commit(self, tasks):
+        session = self.database.get_session()
+        try:
+            session.add_all(tasks)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        self.commits += 1
+        self.tasks += len(tasks)
+        self.database.invalidate_users(task.user_phone for task in tasks)
+        for task in tasks:
+            self.database._notify_task_listeners(task)
+    
+    def stats(self) -> Dict:
+        """Grouping effectiveness for /health"""
+        return {
+            'commits': self.commits,
+            'tasks': self.tasks,
+            'avg_batch_size': self.tasks / self.commits if self.commits else 0.0
+        }
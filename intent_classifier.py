@@ -0,0 +1,120 @@
+"""
+Cheap local triage of incoming messages: reminder, command or chatter
+
+Runs before any parsing so "hi", "thanks" or a row of emoji never reach the
+LLM. A handful of precompiled keyword patterns feed a tiny linear score:
+
+    score = BIAS + sum(weight of each feature group that matches)
+
+Messages scoring at or above REMINDER_THRESHOLD are treated as reminders.
+Weights are tilted towards recall - a missed reminder costs more than an
+extra LLM call - so anything ambiguous still goes to the parser.
+"""
+
+from typing import Dict
+import re
+from time_grammar import WEEKDAYS, MONTHS, PARTS_OF_DAY, UNITS
+
+BIAS = -1.0
+REMINDER_THRESHOLD = 0.0
+COMMANDS = {'help', 'start', 'list', 'menu', 'commands'}
+
+# Replies for messages that are not reminders, keyed by chatter kind
+CHATTER_REPLIES = {
+    'greeting': "👋 Hi! Tell me what to remind you about, e.g. 'Remind me to call mom tomorrow at 6 PM'.",
+    'thanks': "😊 You're welcome! Send me another reminder anytime.",
+    'other': "🤔 I only handle reminders. Try something like: 'Remind me to [task] on [day] at [time]'"
+}
+
+def _words(words):
+    return '|'.join(sorted((re.escape(word) for word in words), key=len, reverse=True))
+
+FEATURES = [
+    # (name, weight, pattern)
+    ('trigger', 3.0, re.compile(
+        r"\b(?:remind|reminder|remember|forget|ping\s+me|alert\s+me|notify\s+me|wake\s+me|nudge\s+me|tell\s+me\s+to)\b",
+        re.IGNORECASE
+    )),
+    ('time', 2.0, re.compile(
+        rf"\b(?:today|tonight|tomorrow|tmrw|tmr|weekend|next\s+(?:week|month|year)|end\s+of\s+the\s+(?:day|week|month)"
+        rf"|{_words(w for w in WEEKDAYS if w.endswith('day'))}|{_words(m for m in MONTHS if len(m) > 3)}"
+        rf"|(?:in|within|after|every)\s+(?:\d+|an?|one|two|three|few|couple|half)\s*(?:of\s+)?(?:{_words(UNITS)})?"
+        rf"|\d{{1,2}}(?::\d{{2}})?\s*[ap]\.?m\b|\d{{1,2}}:\d{{2}}|at\s+\d{{1,2}}\b"
+        rf"|(?:this|in\s+the|at|by|before)\s+(?:{_words(PARTS_OF_DAY)}))",
+        re.IGNORECASE
+    )),
+    ('obligation', 1.5, re.compile(
+        r"\b(?:need\s+to|have\s+to|has\s+to|must|gotta|got\s+to|should|todo|to-do|deadline|due|schedule|appointment|meeting)\b",
+        re.IGNORECASE
+    )),
+    ('task', 1.0, re.compile(
+        r"\b(?:call|buy|pay|submit|book|take|pick\s+up|send|email|meet|renew|file|water|feed|cancel|check|"
+        r"collect|clean|finish|start|bring|order|visit|return|write|prepare|study|workout|exercise)\b",
+        re.IGNORECASE
+    )),
+    ('greeting', -3.0, re.compile(
+        r"^\W*(?:hi+|hello|hey+|hiya|yo|sup|howdy|good\s+(?:morning|afternoon|evening|night|day)|gm|gn|"
+        r"how\s+are\s+(?:you|u)|what'?s\s+up|bye|goodbye|see\s+(?:you|ya))\b",
+        re.IGNORECASE
+    )),
+    ('thanks', -3.0, re.compile(
+        r"^\W*(?:thanks|thank\s+(?:you|u)|thx|ty|tysm|cheers|appreciate\s+it|ok+(?:ay)?|k|kk|cool|nice|great|"
+        r"awesome|perfect|got\s+it|lol|haha+|hmm+|yes|yeah|yep|no|nope|sure|wow|np)\b",
+        re.IGNORECASE
+    )),
+    ('question', -1.5, re.compile(
+        r"^\W*(?:who|what|why|how)\s+(?:are|is|do|does|did|can)\b(?!.*\bremind)",
+        re.IGNORECASE
+    )),
+]
+
+_WEIGHTS = {name: weight for name, weight, _ in FEATURES}
+_LETTERS = re.compile(r"[^\W\d_]")
+_COMMAND = re.compile(r"^\s*/?(?P<name>[a-z]+)(?:@\w+)?\s*$", re.IGNORECASE)
+
+
+class IntentClassifier:
+    """Keyword-feature scorer that decides whether a message needs the parser"""
+    
+    def __init__(self, threshold: float = REMINDER_THRESHOLD):
+        self.threshold = threshold
+        self.counts = {'reminder': 0, 'command': 0, 'chatter': 0}
+    
+    def classify(self, message: str) -> Dict:
+        """
+        Triage a message
+        
+        Returns:
+            Dictionary with intent ('reminder', 'command' or 'chatter'), score,
+            matched features, the command name for commands and the chatter kind
+            ('greeting', 'thanks' or 'other') for chatter
+        """
+        result = self._classify(message or '')
+        self.counts[result['intent']] += 1
+        return result
+    
+    def _classify(self, message: str) -> Dict:
+        command = _COMMAND.match(message)
+        if command and (message.lstrip().startswith('/') or command.group('name').lower() in COMMANDS):
+            return {'intent': 'command', 'score': 0.0, 'features': [], 'command': command.group('name').lower()}
+        
+        if not _LETTERS.search(message):
+            # Emoji, stickers-as-text, punctuation, bare numbers
+            return {'intent': 'chatter', 'score': BIAS, 'features': [], 'kind': 'other'}
+        
+        features = [name for name, _, pattern in FEATURES if pattern.search(message)]
+        score = BIAS + sum(_WEIGHTS[name] for name in features)
+        if score >= self.threshold:
+            return {'intent': 'reminder', 'score': score, 'features': features}
+        
+        kind = 'greeting' if 'greeting' in features else 'thanks' if 'thanks' in features else 'other'
+        return {'intent': 'chatter', 'score': score, 'features': features, 'kind': kind}
+    
+    @staticmethod
+    def reply(result: Dict) -> str:
+        """Canned reply for a chatter classification"""
+        return CHATTER_REPLIES[result.get('kind', 'other')]
+    
+    def stats(self) -> Dict:
+        """Per-intent message counts for this process"""
+        return dict(self.counts)
@@ -0,0 +1,126 @@
+"""
+Micro-batching of LLM parse requests
+
+Requests arriving within LLM_BATCH_WINDOW_MS of each other (up to
+LLM_BATCH_MAX_SIZE) are sent as one multi-item prompt and the JSON array
+answer is split back to each waiting caller. A lone request is sent with the
+regular single-message prompt, so quiet periods behave exactly as before.
+"""
+
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+import json
+import re
+import threading
+import time
+
+
+def split_batch_answer(result, count: int) -> List[Dict]:
+    """
+    Demultiplex a batch answer into one chain-style result per item
+    
+    Args:
+        result: The batch chain's answer (dict with 'text' or a string)
+        count: Number of messages that were sent
+    
+    Returns:
+        List of {'text': <json>} (same shape as a single chain call) or None
+        for items the model left out
+    """
+    if isinstance(result, dict):
+        result = result.get('text', str(result))
+    text = str(result).strip()
+    if text.startswith("```"):
+        text = re.sub(r'```json\s*', '', text)
+        text = re.sub(r'```\s*', '', text)
+    
+    items = json.loads(text)
+    if isinstance(items, dict):
+        items = items.get('items', [items])
+    
+    answers = [None] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop('id', position)
+        if isinstance(index, int) and 0 <= index < count and answers[index] is None:
+            answers[index] = {'text': json.dumps(item)}
+    return answers
+
+
+class LLMBatcher:
+    """Collects parse requests for a few milliseconds and sends them as one LLM call"""
+    
+    def __init__(self, invoke_single: Callable, invoke_batch: Callable, executor,
+                 window_seconds: float = 0.02, max_batch: int = 8):
+        self.invoke_single = invoke_single
+        self.invoke_batch = invoke_batch
+        self.executor = executor
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.calls = 0
+        self.items = 0
+        self._pending = []
+        self._opened_at = None
+        self._wakeup = threading.Condition()
+        self._thread = threading.Thread(target=self._collect_loop, name='llm-batcher', daemon=True)
+        self._thread.start()
+    
+    def submit(self, inputs: Dict) -> Future:
+        """Queue prompt inputs; the future resolves to that message's chain result"""
+        future = Future()
+        with self._wakeup:
+            if not self._pending:
+                self._opened_at = time.monotonic()
+            self._pending.append((inputs, future))
+            self._wakeup.notify()
+        return future
+    
+    def _collect_loop(self):
+        """Close a batch when it is full or its window has elapsed"""
+        while True:
+            with self._wakeup:
+                while not self._pending:
+                    self._wakeup.wait()
+                while len(self._pending) < self.max_batch:
+                    remaining = self._opened_at + self.window_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._opened_at = time.monotonic()
+            self.executor.submit(self._flush, batch)
+    
+    def _flush(self, batch):
+        """Send one LLM call for the batch and resolve every caller's future"""
+        # Callers that already gave up (deadline, cancelled hedge) are dropped
+        batch = [(inputs, future) for inputs, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.calls += 1
+        self.items += len(batch)
+        try:
+            if len(batch) == 1:
+                batch[0][1].set_result(self.invoke_single(batch[0][0]))
+                return
+            answers = split_batch_answer(self.invoke_batch([inputs for inputs, _ in batch]), len(batch))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), answer in zip(batch, answers):
+            if answer is None:
+                future.set_exception(ValueError("Message missing from batched LLM answer"))
+            else:
+                future.set_result(answer)
+    
+    def stats(self) -> Dict:
+        """Batching effectiveness for /health"""
+        return {
+            'llm_calls': self.calls,
+            'messages': self.items,
+            'avg_batch_size': self.items / self.calls if self.calls else 0.0
+        }
@@ -0,0 +1,164 @@
+"""
+Cache of LLM parse results, stored as time rules rather than absolute datetimes
+
+"remind me to drink water in 1 hour" is cached as a +3600 s offset,
+"call mom on Friday at 6pm" as a weekday/time rule and "call mom at 6pm" as
+the next 6 PM, so a hit can be
+re-anchored to the current time without calling the model. Entries live in a
+local SQLite file so every process on the host shares them.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Dict
+import json
+import re
+import sqlite3
+import threading
+import time
+from time_grammar import WEEKDAYS, MONTHS
+
+_RELATIVE_CUE = re.compile(r"\b(?:in|within|after)\s+(?:\d+|an?|one|two|three|four|five|six|seven|eight|nine|ten|half|few|couple)\b", re.IGNORECASE)
+_WEEKDAY_CUE = re.compile(r"\b(?:%s)\b" % '|'.join(w for w in WEEKDAYS if w.endswith('day')), re.IGNORECASE)
+_MONTH = '|'.join(MONTHS)
+_DATE_CUE = re.compile(
+    rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?(?:{_MONTH})\b|\b(?:{_MONTH})\.?\s+\d{{1,2}}\b|\d{{1,4}}[/-]\d{{1,2}}",
+    re.IGNORECASE
+)
+# Only these pin a reminder to a number of days ahead; "at 5pm" alone means the next 5 PM
+_DAY_CUE = re.compile(r"\b(?:today|tonight|tomorrow|tmrw|tmr|day\s+after|next\s+week|in\s+a\s+week)\b", re.IGNORECASE)
+
+
+def normalize_message(message: str) -> str:
+    """Cache key: case-folded, whitespace-collapsed, without trailing punctuation"""
+    return ' '.join(message.split()).casefold().rstrip('.!?')
+
+
+def to_rule(message: str, reminder_time: datetime, current_time: datetime) -> Dict:
+    """Describe an absolute reminder time relative to when it was parsed"""
+    if _RELATIVE_CUE.search(message):
+        return {'kind': 'offset', 'seconds': (reminder_time - current_time).total_seconds()}
+    clock = reminder_time.strftime('%H:%M')
+    if _DATE_CUE.search(message):
+        return {'kind': 'absolute', 'at': reminder_time.isoformat()}
+    if _WEEKDAY_CUE.search(message):
+        return {'kind': 'weekday', 'weekday': reminder_time.weekday(), 'time': clock}
+    if not _DAY_CUE.search(message) and timedelta(0) < reminder_time - current_time <= timedelta(days=1):
+        return {'kind': 'clock', 'time': clock}
+    return {
+        'kind': 'day',
+        'days_ahead': (reminder_time.date() - current_time.date()).days,
+        'time': clock
+    }
+
+
+def from_rule(rule: Dict, current_time: datetime, timezone) -> Optional[datetime]:
+    """Re-anchor a cached rule to `current_time`; None if it no longer applies"""
+    kind = rule['kind']
+    if kind == 'offset':
+        return current_time + timedelta(seconds=rule['seconds'])
+    if kind == 'absolute':
+        reminder_time = datetime.fromisoformat(rule['at'])
+        return reminder_time if reminder_time > current_time else None
+    
+    hour, minute = (int(part) for part in rule['time'].split(':'))
+    if kind == 'weekday':
+        days_ahead = (rule['weekday'] - current_time.weekday()) % 7
+    elif kind == 'clock':
+        days_ahead = 0
+    else:
+        days_ahead = rule['days_ahead']
+    date = (current_time + timedelta(days=days_ahead)).date()
+    reminder_time = timezone.localize(datetime(date.year, date.month, date.day, hour, minute))
+    if kind == 'weekday' and reminder_time <= current_time:
+        reminder_time += timedelta(days=7)
+    elif kind == 'clock' and reminder_time <= current_time:
+        # The next time the clock shows it
+        date += timedelta(days=1)
+        reminder_time = timezone.localize(datetime(date.year, date.month, date.day, hour, minute))
+    return reminder_time if reminder_time > current_time else None
+
+
+class ParseCache:
+    """SQLite-backed TTL/LRU cache of parse results keyed on the normalized message"""
+    
+    def __init__(self, path: str, timezone, max_entries: int = 10000, ttl_seconds: float = 7 * 24 * 3600):
+        self.timezone = timezone
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                key TEXT PRIMARY KEY,
+                task_description TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                confidence TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS ix_parse_cache_last_used ON parse_cache (last_used)")
+    
+    def get(self, message: str, current_time: datetime) -> Optional[Dict]:
+        """Cached parse re-anchored to `current_time`, or None on a miss"""
+        key = normalize_message(message)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT task_description, rule, confidence FROM parse_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            reminder_time = from_rule(json.loads(row[1]), current_time, self.timezone) if row else None
+            if reminder_time is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE parse_cache SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        
+        return {
+            'task_description': row[0],
+            'reminder_time': reminder_time,
+            'confidence': row[2] or 'medium'
+        }
+    
+    def put(self, message: str, result: Dict, current_time: datetime):
+        """Store an LLM parse result as a relative rule"""
+        rule = to_rule(message, result['reminder_time'], current_time)
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO parse_cache (key, task_description, rule, confidence, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_message(message), result['task_description'], json.dumps(rule), result.get('confidence'), now, now)
+            )
+            self.stores += 1
+            if self.stores % 100 == 0:
+                self._evict(now)
+    
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used beyond max_entries"""
+        self._connection.execute("DELETE FROM parse_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._connection.execute(
+            "DELETE FROM parse_cache WHERE key IN ("
+            "SELECT key FROM parse_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+    
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            self._connection.close()
+    
+    def stats(self) -> Dict:
+        """Hit-rate counters for this process"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
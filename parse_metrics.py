@@ -0,0 +1,68 @@
+"""
+Parse outcome counters and LLM latency tracking
+
+The recent-latency window also drives request hedging: once enough samples
+are in, a second LLM request is fired when the first is slower than the p95.
+"""
+
+from collections import deque
+from typing import Optional, Dict
+import threading
+
+# Upper bounds (seconds) of the LLM latency histogram buckets
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20)
+
+class ParseMetrics:
+    """Outcome counters and an LLM latency histogram for TaskParser"""
+    
+    def __init__(self, window: int = 500, hedge_min_samples: int = 20, hedge_enabled: bool = False):
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self._outcomes = {}
+        self._buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, outcome: str):
+        """Count a parse outcome (fast_path, cache_hit, llm_hit, timeout_fallback, ...)"""
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+    
+    def observe_latency(self, seconds: float):
+        """Record the latency of a completed LLM call"""
+        with self._lock:
+            self._recent.append(seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self._buckets[i] += 1
+                    break
+            else:
+                self._buckets[-1] += 1
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile of recent LLM latencies, or None without data"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+    
+    def hedge_delay(self) -> Optional[float]:
+        """When to fire a hedged second LLM call (the recent p95), or None to not hedge"""
+        if not self.hedge_enabled or len(self._recent) < self.hedge_min_samples:
+            return None
+        return self.percentile(95)
+    
+    def snapshot(self) -> Dict:
+        """Counters and histogram for /health"""
+        with self._lock:
+            outcomes = dict(self._outcomes)
+            buckets = list(self._buckets)
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return {
+            'outcomes': outcomes,
+            'llm_latency_histogram': dict(zip(labels, buckets)),
+            'llm_latency_p50': self.percentile(50),
+            'llm_latency_p95': self.percentile(95)
+        }
@@ -0,0 +1,228 @@
+"""
+Learned parse templates: generalize past LLM extractions to new messages
+
+When the LLM parses "remind me to feed the fish in 45 mins", the task span
+("feed the fish") becomes a slot and the single number in the time expression
+becomes a scaled slot, giving the template
+    
+    ^remind\\s+me\\s+to\\s+(?P<task>.+?)\\s+in\\s+(?P<n>\\d+)\\s+mins$   -> 60 s per n
+
+so "remind me to water plants in 10 mins" is resolved locally. Non-offset
+rules (weekday/day/clock) keep their numbers literal and only generalize the
+task. Templates are stored as JSON so they can be inspected or pruned by hand:
+    
+    python parse_templates.py [path]
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Dict
+import json
+import os
+import re
+import sys
+import threading
+import time
+from parse_cache import to_rule, from_rule
+from time_grammar import WEEKDAYS, MONTHS
+
+# The rules parse_simple_reminder has always resolved itself, as templates
+SEED_TEMPLATES = [
+    {
+        'pattern': rf"^remind\s+me\s+to\s+(?P<task>.+?)\s+(?:in|within|after)\s+(?P<n>\d+)\s+{unit}s?$",
+        'rule': {'kind': 'offset', 'seconds_per_n': seconds},
+        'source': 'seed',
+        'example': f"remind me to stretch in 5 {unit}s",
+        'hits': 0
+    }
+    for unit, seconds in [('second', 1), ('minute', 60), ('hour', 3600), ('day', 86400)]
+]
+
+_NUMBER = re.compile(r"\d+")
+MAX_TIME_EXPRESSION_LENGTH = 60
+
+# Words that mark a time expression; short forms like "sun" or "may" are too common in tasks
+_TIME_WORD = re.compile(
+    r"\d|\b(?:" + '|'.join(
+        [day for day in WEEKDAYS if day.endswith('day')]
+        + [month for month in MONTHS if len(month) > 3]
+        + ['morning', 'afternoon', 'evening', 'night', 'tonight', 'noon', 'midnight', 'today',
+           'tomorrow', 'tmrw', 'weekend', 'fortnight', 'secs?', 'seconds?', 'mins?', 'minutes?',
+           'hours?', 'hrs?', 'days?', 'weeks?', 'months?', 'years?']
+    ) + r")\b",
+    re.IGNORECASE
+)
+
+
+def _literal(text: str) -> str:
+    """Regex for literal text, tolerant of whitespace and case differences"""
+    return r"\s+".join(re.escape(word) for word in text.split())
+
+
+def build_template(message: str, task_description: str, rule: Dict) -> Optional[Dict]:
+    """Abstract a parsed message into a template, or None if it doesn't generalize"""
+    message = ' '.join(message.split()).rstrip('.!?')
+    start = message.lower().find(task_description.lower().strip())
+    if start < 0 or not task_description.strip():
+        return None
+    end = start + len(task_description.strip())
+    before, after = message[:start].strip(), message[end:].strip()
+    time_expression = f"{before} {after}".strip()
+    if not time_expression or len(time_expression) > MAX_TIME_EXPRESSION_LENGTH:
+        return None
+    # The time must be outside the slot: otherwise the template is a bare
+    # "remind me to (task)" that would give every message this parse's time
+    if not _TIME_WORD.search(time_expression) or _TIME_WORD.search(task_description):
+        return None
+    
+    numbers = _NUMBER.findall(time_expression)
+    scaled = rule['kind'] == 'offset' and len(numbers) == 1 and int(numbers[0]) > 0
+    
+    def side(text):
+        if not scaled:
+            return _literal(text)
+        # Replace the one number with a slot, keep everything else literal
+        parts = _NUMBER.split(text)
+        if len(parts) == 1:
+            return _literal(text)
+        left, right = parts
+        return r"\s*".join(filter(None, [_literal(left), r"(?P<n>\d+)", _literal(right)]))
+    
+    pieces = [side(before) if before else '', r"(?P<task>.+?)", side(after) if after else '']
+    pattern = '^' + r"\s+".join(piece for piece in pieces if piece) + '$'
+    
+    if scaled:
+        rule = {'kind': 'offset', 'seconds_per_n': rule['seconds'] / int(numbers[0])}
+    return {
+        'pattern': pattern,
+        'rule': rule,
+        'source': 'learned',
+        'example': message,
+        'hits': 0
+    }
+
+
+class TemplateStore:
+    """Persistent, inspectable set of slot templates learned from LLM parses"""
+    
+    def __init__(self, path: str, timezone, max_templates: int = 500):
+        self.path = path
+        self.timezone = timezone
+        self.max_templates = max_templates
+        self.hits = 0
+        self.misses = 0
+        self._templates = []
+        self._compiled = []
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._load()
+    
+    def _load(self):
+        """(Re)read the JSON store, seeding it on first use"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime == self._mtime:
+            return
+        
+        templates = None
+        if mtime is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    templates = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read parse templates: {e}")
+        if templates is None:
+            templates = [dict(template) for template in SEED_TEMPLATES]
+        
+        self._templates = templates
+        self._compiled = [re.compile(template['pattern'], re.IGNORECASE) for template in templates]
+        self._mtime = mtime
+    
+    def _save(self):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._templates, f, indent=2)
+        os.replace(temp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+    
+    def match(self, message: str, current_time: datetime) -> Optional[Dict]:
+        """Resolve a message with a learned template, or None"""
+        message = ' '.join(message.split()).rstrip('.!?')
+        with self._lock:
+            self._load()
+            for template, compiled in zip(self._templates, self._compiled):
+                found = compiled.match(message)
+                # A time inside the task slot means the template doesn't cover it
+                if not found or _TIME_WORD.search(found.group('task')):
+                    continue
+                rule = template['rule']
+                if 'seconds_per_n' in rule:
+                    n = int(found.group('n')) if 'n' in compiled.groupindex else 1
+                    reminder_time = current_time + timedelta(seconds=rule['seconds_per_n'] * n)
+                else:
+                    reminder_time = from_rule(rule, current_time, self.timezone)
+                if reminder_time is None:
+                    continue
+                template['hits'] = template.get('hits', 0) + 1
+                self.hits += 1
+                return {
+                    'task_description': found.group('task').strip(),
+                    'reminder_time': reminder_time,
+                    'confidence': 'high'
+                }
+            self.misses += 1
+        return None
+    
+    def learn(self, message: str, parsed: Dict, current_time: datetime) -> Optional[Dict]:
+        """Add a template for a successful high-confidence LLM parse"""
+        if parsed.get('confidence') != 'high':
+            return None
+        rule = to_rule(message, parsed['reminder_time'], current_time)
+        template = build_template(message, parsed['task_description'], rule)
+        if template is None or rule['kind'] == 'absolute':
+            return None
+        
+        with self._lock:
+            self._load()
+            if any(existing['pattern'] == template['pattern'] for existing in self._templates):
+                return None
+            template['created_at'] = time.time()
+            self._templates.append(template)
+            self._compiled.append(re.compile(template['pattern'], re.IGNORECASE))
+            learned = [i for i, t in enumerate(self._templates) if t.get('source') == 'learned']
+            if len(self._templates) > self.max_templates and learned:
+                # Keep seeds, drop the least used learned template
+                victim = min(learned, key=lambda i: self._templates[i].get('hits', 0))
+                del self._templates[victim]
+                del self._compiled[victim]
+            try:
+                self._save()
+            except OSError as e:
+                print(f"⚠️ Could not save parse templates: {e}")
+        return template
+    
+    def templates(self):
+        """Snapshot of all templates (for inspection)"""
+        with self._lock:
+            self._load()
+            return [dict(template) for template in self._templates]
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'templates': len(self._templates),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+if __name__ == '__main__':
+    from config import Config
+    import pytz
+    store = TemplateStore(sys.argv[1] if len(sys.argv) > 1 else Config.PARSE_TEMPLATES_PATH, pytz.timezone(Config.DEFAULT_TIMEZONE))
+    for template in store.templates():
+        print(f"[{template.get('source')}] hits={template.get('hits', 0)}  {template['example']}")
+        print(f"    {template['pattern']}")
+        print(f"    {template['rule']}")
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """Async token bucket: refills at `rate` tokens per second up to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = None
+    
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def is_idle(self):
+        """True when the bucket is full again and can be discarded"""
+        now = time.monotonic()
+        self._refill(now)
+        return self._tokens >= self.capacity and now >= self._blocked_until
+    
+    def pause(self, seconds: float):
+        """Block all acquirers for `seconds` (e.g. after a flood-control response)"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+    
+    async def acquire(self, tokens: float = 1):
+        """Wait until `tokens` are available and take them (FIFO across waiters)"""
+        # Created lazily so the lock binds to the loop that actually uses it
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class ChatRateLimiter:
+    """Global plus per-chat token buckets matching Telegram's flood limits"""
+    
+    def __init__(self, global_rate: float, per_chat_rate: float, per_chat_burst: float = None, max_idle_chats: int = 10000):
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst or per_chat_rate
+        self.max_idle_chats = max_idle_chats
+        self._chats = {}
+    
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.max_idle_chats:
+                self._chats = {key: value for key, value in self._chats.items() if not value.is_idle()}
+            bucket = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+    
+    async def acquire(self, chat_id, tokens: float = 1):
+        """Wait for both the chat's and the global budget"""
+        await self._chat_bucket(chat_id).acquire(tokens)
+        await self.global_bucket.acquire(tokens)
+    
+    def pause(self, seconds: float, chat_id=None):
+        """Back off after a RetryAfter: the whole bot, plus the offending chat if known"""
+        self.global_bucket.pause(seconds)
+        if chat_id is not None:
+            self._chat_bucket(chat_id).pause(seconds)
@@ -1,72 +1,344 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import heapq
+import os
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, List, NamedTuple
 from apscheduler.schedulers.background import BackgroundScheduler
-from database import Database
-from whatsapp_service import WhatsAppService
+from database import Database, to_epoch_ms
 import pytz
 from config import Config
 
+if TYPE_CHECKING:
+    # Only for the annotation; importing twilio is not needed to schedule
+    from whatsapp_service import WhatsAppService
+
+class Delivery(NamedTuple):
+    """One message to send and the tasks it settles"""
+    user_phone: str
+    task_description: str
+    tasks: List
+    # Overdue by more than REMINDER_LATE_SECONDS: paced at REMINDER_CATCHUP_RATE
+    late: bool
+    
+    @property
+    def label(self):
+        return f"task {self.tasks[0].id}" if len(self.tasks) == 1 else f"tasks {', '.join(str(task.id) for task in self.tasks)}"
+
+
+# Telegram rejects texts over 4096 characters; leave room for the "🔔 Reminder: " prefix
+MAX_REMINDER_LENGTH = 4000
+
+
+def truncate(text, max_length=MAX_REMINDER_LENGTH):
+    """Cut text to max_length characters, marking the cut with an ellipsis"""
+    return text if len(text) <= max_length else text[:max_length - 1] + "…"
+
+
+def summarize_missed(tasks, limit=10, max_length=MAX_REMINDER_LENGTH):
+    """Collapse several missed reminders into one message text of at most max_length characters"""
+    shown = min(len(tasks), limit)
+    while True:
+        more = f" (+{len(tasks) - shown} more)" if len(tasks) > shown else ""
+        text = f"{len(tasks)} missed reminders: " + "; ".join(task.task_description for task in tasks[:shown])
+        if len(text) + len(more) <= max_length or shown == 1:
+            return truncate(text, max_length - len(more)) + more
+        shown -= 1
+
+
+def combine_reminders(tasks, max_length=MAX_REMINDER_LENGTH):
+    """One message text for reminders due together"""
+    return truncate("; ".join(task.task_description for task in tasks), max_length)
+
+
 class ReminderScheduler:
     """Background scheduler for sending reminders"""
     
-    def __init__(self, database: Database, whatsapp_service: WhatsAppService):
+    def __init__(self, database: Database, whatsapp_service: 'WhatsAppService'):
         self.database = database
         self.whatsapp_service = whatsapp_service
         self.scheduler = BackgroundScheduler()
         self.timezone = pytz.timezone(Config.DEFAULT_TIMEZONE)
+        # Name under which this process claims reminders (see Database.claim_due_tasks)
+        self.worker_id = Config.WORKER_ID or f"{socket.gethostname()}-{os.getpid()}"
+        
+        # Min-heap of (due_epoch, task_id) for every unsent task we know about
+        self._timer_heap = []
+        self._wakeup = threading.Condition()
+        self._dispatch_thread = None
+        self._running = False
+        # Earliest time (monotonic) the next late reminder may go out
+        self._catchup_next = 0.0
     
     def start(self):
         """Start the background scheduler"""
-        # Check for pending reminders every minute
+        # New tasks are pushed onto the timer heap as soon as they are committed
+        self.database.add_task_listener(self.schedule_task)
+        self.resync()
+        
+        self._running = True
+        self._dispatch_thread = threading.Thread(
+            target=self._dispatch_loop,
+            name='reminder-dispatch',
+            daemon=True
+        )
+        self._dispatch_thread.start()
+        
+        # Periodically reload the heap from the database as a safety net
         self.scheduler.add_job(
-            self.check_and_send_reminders,
+            self.resync,
             'interval',
-            minutes=1,
-            id='reminder_checker'
+            minutes=Config.REMINDER_RESYNC_MINUTES,
+            id='reminder_resync'
         )
+        # Keep the hot tasks table sized to pending work
+        if Config.TASK_ARCHIVE_INTERVAL_MINUTES:
+            self.scheduler.add_job(
+                self.archive_delivered,
+                'interval',
+                minutes=Config.TASK_ARCHIVE_INTERVAL_MINUTES,
+                id='task_archive'
+            )
         self.scheduler.start()
         print("✅ Reminder scheduler started")
     
     def stop(self):
         """Stop the scheduler"""
-        self.scheduler.shutdown()
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify()
+        if self.scheduler.running:
+            self.scheduler.shutdown()
         print("⏹️ Reminder scheduler stopped")
     
+    def schedule_task(self, task):
+        """Add a task to the timer heap, waking the dispatcher if it is now the earliest"""
+        self._push(task.id, task.reminder_at_ms)
+    
+    def wake(self, task_id, reminder_at_ms):
+        """Queue a task announced by another process (see wake_signal.py)"""
+        self._push(task_id, reminder_at_ms)
+    
+    def _push(self, task_id, reminder_at_ms):
+        due = reminder_at_ms / 1000
+        with self._wakeup:
+            heapq.heappush(self._timer_heap, (due, task_id))
+            if self._timer_heap[0][1] == task_id:
+                self._wakeup.notify()
+    
+    def resync(self):
+        """Rebuild the timer heap from all unsent tasks in the database"""
+        try:
+            heap = [
+                (reminder_at_ms / 1000, task_id)
+                for task_id, reminder_at_ms in self.database.get_reminder_schedule()
+            ]
+            heapq.heapify(heap)
+            with self._wakeup:
+                self._timer_heap = heap
+                self._wakeup.notify()
+        except Exception as e:
+            print(f"❌ Error loading reminder schedule: {e}")
+    
+    def archive_delivered(self):
+        """Move reminders settled more than TASK_RETENTION_DAYS ago to the archive"""
+        try:
+            cutoff = datetime.now(pytz.utc) - timedelta(days=Config.TASK_RETENTION_DAYS)
+            moved = self.database.archive_tasks(cutoff, batch_size=Config.TASK_ARCHIVE_BATCH_SIZE)
+            if moved:
+                print(f"🗄️ Archived {moved} delivered reminders")
+        except Exception as e:
+            print(f"❌ Error archiving reminders: {e}")
+    
+    def get_upcoming_task_ids(self, within_seconds):
+        """Ids on the timer heap that fall due within the next `within_seconds`"""
+        horizon = time.time() + within_seconds
+        upcoming = set()
+        with self._wakeup:
+            # Walk only the heap subtrees whose root is inside the horizon
+            heap = self._timer_heap
+            stack = [0] if heap else []
+            while stack:
+                i = stack.pop()
+                due, task_id = heap[i]
+                if due > horizon:
+                    continue
+                upcoming.add(task_id)
+                stack.extend(child for child in (2 * i + 1, 2 * i + 2) if child < len(heap))
+        return upcoming
+    
+    def _dispatch_loop(self):
+        """Sleep until the earliest deadline, then send everything that is due"""
+        while True:
+            with self._wakeup:
+                while self._running:
+                    if not self._timer_heap:
+                        self._wakeup.wait()
+                        continue
+                    delay = self._timer_heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._wakeup.wait(delay)
+                if not self._running:
+                    return
+                
+                now = time.time()
+                while self._timer_heap and self._timer_heap[0][0] <= now:
+                    heapq.heappop(self._timer_heap)
+            
+            self.check_and_send_reminders()
+    
+    def claim_due_batches(self):
+        """Claim due reminders for this worker, oldest first, REMINDER_CLAIM_BATCH at a time"""
+        cursor = None
+        while True:
+            current_time = datetime.now(self.timezone)
+            tasks = self.database.claim_due_tasks(
+                self.worker_id,
+                current_time,
+                limit=Config.REMINDER_CLAIM_BATCH,
+                after=cursor
+            )
+            if tasks:
+                yield tasks
+            if len(tasks) < Config.REMINDER_CLAIM_BATCH:
+                return
+            cursor = (tasks[-1].reminder_at_ms, tasks[-1].id)
+    
+    def plan_deliveries(self, tasks):
+        """
+        Turn a claimed batch into messages, applying the staleness policy
+        
+        A user's reminders due within REMINDER_COALESCE_SECONDS of each other
+        go out as one combined message (one text and one voice note on
+        Telegram) instead of one each, starting a new message whenever the
+        combined text would pass MAX_REMINDER_LENGTH. Reminders overdue by more than REMINDER_STALE_MINUTES are sent as usual
+        ('send'), folded into one summary per user ('collapse') or not sent at
+        all ('drop').
+        
+        Returns:
+            (deliveries, dropped_tasks)
+        """
+        now_ms = to_epoch_ms(datetime.now(self.timezone))
+        late_before = now_ms - Config.REMINDER_LATE_SECONDS * 1000
+        stale_before = now_ms - Config.REMINDER_STALE_MINUTES * 60 * 1000
+        policy = Config.REMINDER_STALE_POLICY
+        window_ms = Config.REMINDER_COALESCE_SECONDS * 1000
+        
+        groups, open_groups, open_lengths, dropped, stale_by_user = [], {}, {}, [], {}
+        for task in tasks:
+            if policy != 'send' and Config.REMINDER_STALE_MINUTES > 0 and task.reminder_at_ms < stale_before:
+                if policy == 'drop':
+                    dropped.append(task)
+                else:
+                    stale_by_user.setdefault(task.user_phone, []).append(task)
+                continue
+            # Tasks arrive oldest first: join the user's open group while inside its window
+            group = open_groups.get(task.user_phone)
+            length = open_lengths.get(task.user_phone, 0) + len("; ") + len(task.task_description)
+            if group and task.reminder_at_ms - group[0].reminder_at_ms < window_ms and length <= MAX_REMINDER_LENGTH:
+                group.append(task)
+                open_lengths[task.user_phone] = length
+                continue
+            group = open_groups[task.user_phone] = [task]
+            open_lengths[task.user_phone] = len(task.task_description)
+            groups.append(group)
+        
+        deliveries = [
+            Delivery(group[0].user_phone, combine_reminders(group), group, group[0].reminder_at_ms < late_before)
+            for group in groups
+        ]
+        coalesced = sum(len(group) for group in groups)
+        if coalesced > len(groups):
+            print(f"📦 Coalesced {coalesced} reminders into {len(groups)} messages")
+        for user_phone, stale_tasks in stale_by_user.items():
+            description = truncate(stale_tasks[0].task_description) if len(stale_tasks) == 1 else summarize_missed(stale_tasks)
+            deliveries.append(Delivery(user_phone, description, stale_tasks, True))
+        
+        if dropped:
+            print(f"🗑️ Dropping {len(dropped)} reminders older than {Config.REMINDER_STALE_MINUTES} min")
+        if stale_by_user:
+            print(f"🗂️ Collapsed stale reminders into {len(stale_by_user)} summaries")
+        return deliveries, dropped
+    
+    def pace_catchup(self):
+        """Sleep so late reminders go out at most REMINDER_CATCHUP_RATE per second"""
+        if Config.REMINDER_CATCHUP_RATE <= 0:
+            return
+        now = time.monotonic()
+        self._catchup_next = max(self._catchup_next, now)
+        time.sleep(self._catchup_next - now)
+        self._catchup_next += 1 / Config.REMINDER_CATCHUP_RATE
+    
     def check_and_send_reminders(self):
         """Check database for pending reminders and send them"""
         try:
-            current_time = datetime.now(self.timezone)
-            
-            # Get all pending reminders that should be sent now
-            pending_tasks = self.database.get_pending_reminders(current_time)
-            
-            if pending_tasks:
+            for pending_tasks in self.claim_due_batches():
                 print(f"📬 Found {len(pending_tasks)} pending reminders to send")
-            
-            for task in pending_tasks:
-                try:
-                    # Send the reminder
-                    success = self.whatsapp_service.send_reminder(
-                        task.user_phone,
-                        task.task_description
-                    )
-                    
-                    if success:
-                        # Mark as sent in database
-                        self.database.mark_task_sent(task.id)
-                        print(f"✅ Sent reminder for task {task.id} to {task.user_phone}")
-                    else:
-                        print(f"❌ Failed to send reminder for task {task.id}")
+                deliveries, dropped = self.plan_deliveries(pending_tasks)
+                results = [(task, 'failed') for task in dropped]
+                
+                for delivery in deliveries:
+                    if delivery.late:
+                        self.pace_catchup()
+                    try:
+                        # Send the reminder
+                        success = self.whatsapp_service.send_reminder(
+                            delivery.user_phone,
+                            delivery.task_description
+                        )
                         
-                except Exception as e:
-                    print(f"❌ Error sending reminder for task {task.id}: {e}")
-            
+                        if success:
+                            print(f"✅ Sent reminder for {delivery.label} to {delivery.user_phone}")
+                            outcome = 'sent'
+                        else:
+                            print(f"❌ Failed to send reminder for {delivery.label}")
+                            outcome = 'retry'
+                    
+                    except Exception as e:
+                        print(f"❌ Error sending reminder for {delivery.label}: {e}")
+                        outcome = 'retry'
+                    results.extend((task, outcome) for task in delivery.tasks)
+                
+                self.record_outcomes(results)
+        
         except Exception as e:
             print(f"❌ Error in reminder checker: {e}")
     
+    def record_outcomes(self, results):
+        """
+        Store a batch of (task, 'sent' | 'failed' | 'retry') results with one commit
+        
+        Retries are pushed back REMINDER_RETRY_SECONDS; a task that has used up
+        REMINDER_MAX_ATTEMPTS is marked failed instead.
+        """
+        retry_at = datetime.now(self.timezone) + timedelta(seconds=Config.REMINDER_RETRY_SECONDS)
+        sent_ids, failed_ids, retries = [], [], {}
+        for task, outcome in results:
+            if outcome == 'sent':
+                sent_ids.append(task.id)
+            elif outcome == 'failed' or (task.attempts or 0) + 1 >= Config.REMINDER_MAX_ATTEMPTS:
+                failed_ids.append(task.id)
+            else:
+                retries[task.id] = retry_at
+        
+        self.database.record_outcomes(self.worker_id, sent_ids, failed_ids, retries)
+        if failed_ids or retries:
+            print(f"🔁 {len(retries)} reminders will be retried, {len(failed_ids)} given up")
+        # Wake up for the retries even if nothing else is due by then
+        for task_id in retries:
+            self._push(task_id, to_epoch_ms(retry_at))
+    
     def get_scheduler_status(self):
         """Get current scheduler status"""
+        with self._wakeup:
+            queued = len(self._timer_heap)
+            next_due = self._timer_heap[0][0] if self._timer_heap else None
         return {
             'running': self.scheduler.running,
+            'queued_reminders': queued,
+            'next_due': datetime.fromtimestamp(next_due, self.timezone).isoformat() if next_due else None,
             'jobs': [
                 {
                     'id': job.id,
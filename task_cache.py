@@ -0,0 +1,167 @@
+"""
+Read cache for users' pending task lists and counts
+
+/list and /tasks/<phone> read the same few rows over and over, while a
+user's pending set only changes when a task is added, sent, failed or
+retried. Database invalidates the user here on each of those writes, so
+entries are served until the data actually changes; a TTL is only a safety
+net for writers that bypass Database.
+
+Every user has a generation that each invalidation bumps. A lookup hands out
+the current generation as a token and store() drops the result if the user
+was invalidated in between, so a read racing a write never caches old rows.
+Generations live in a local SQLite file (TASK_CACHE_PATH) shared by all the
+processes that write - gunicorn workers, or a dispatcher marking reminders
+sent while the web/bot process serves /list - or in memory for a single
+process. The cached rows themselves stay in-process.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+import sqlite3
+import threading
+import time
+
+
+class TaskListCache:
+    """LRU of per-user query results, invalidated by user"""
+    
+    def __init__(self, max_users: int = 10000, ttl_seconds: float = 60.0, shared_path: Optional[str] = None,
+                 max_keys_per_user: int = 32):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.max_keys_per_user = max_keys_per_user
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_drops = 0
+        self.expired = 0
+        self._hit_age_total = 0.0
+        self._hit_age_max = 0.0
+        self._lock = threading.Lock()
+        # user -> (generation, cached_at, {key: value})
+        self._entries = OrderedDict()
+        # In-memory generations: user -> counter value at its last invalidation, bounded like
+        # the entries; users that fall out report the highest evicted value (a miss, never a stale hit)
+        self._generations = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+        self._connection = None
+        if shared_path:
+            self._connection = sqlite3.connect(shared_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS task_cache_generations (
+                    user_phone TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                )
+            """)
+    
+    def _generation(self, user_phone) -> int:
+        """Current generation of a user (call with the lock held)"""
+        if self._connection is not None:
+            row = self._connection.execute(
+                "SELECT generation FROM task_cache_generations WHERE user_phone = ?", (user_phone,)
+            ).fetchone()
+            return row[0] if row else 0
+        return self._generations.get(user_phone, self._floor)
+    
+    def lookup(self, user_phone, key: Hashable) -> Tuple[object, int]:
+        """
+        Cached value for (user, key), or None on a miss
+        
+        Returns:
+            (value or None, token to pass to store() after reading the database)
+        """
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation(user_phone)
+            entry = self._entries.get(user_phone)
+            if entry is not None:
+                entry_generation, cached_at, values = entry
+                if entry_generation != generation:
+                    self.stale_drops += 1
+                    del self._entries[user_phone]
+                elif now - cached_at > self.ttl_seconds:
+                    self.expired += 1
+                    del self._entries[user_phone]
+                elif key in values:
+                    self._entries.move_to_end(user_phone)
+                    age = now - cached_at
+                    self._hit_age_total += age
+                    self._hit_age_max = max(self._hit_age_max, age)
+                    self.hits += 1
+                    return values[key], generation
+            self.misses += 1
+            return None, generation
+    
+    def store(self, user_phone, key: Hashable, value, token: int):
+        """Cache a value read from the database, unless the user was invalidated since lookup()"""
+        with self._lock:
+            if self._generation(user_phone) != token:
+                return
+            entry = self._entries.get(user_phone)
+            if entry is None or entry[0] != token:
+                entry = (token, time.monotonic(), {})
+                self._entries[user_phone] = entry
+            values = entry[2]
+            if key not in values and len(values) >= self.max_keys_per_user:
+                values.pop(next(iter(values)))
+            values[key] = value
+            self._entries.move_to_end(user_phone)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, user_phones: Iterable):
+        """Forget the users' cached results (after committing a write that changes them)"""
+        users = set(user_phones)
+        if not users:
+            return
+        with self._lock:
+            self.invalidations += len(users)
+            for user_phone in users:
+                self._entries.pop(user_phone, None)
+            if self._connection is not None:
+                self._connection.executemany(
+                    "INSERT INTO task_cache_generations (user_phone, generation) VALUES (?, 1) "
+                    "ON CONFLICT (user_phone) DO UPDATE SET generation = generation + 1",
+                    [(user_phone,) for user_phone in users]
+                )
+                return
+            for user_phone in users:
+                self._counter += 1
+                self._generations[user_phone] = self._counter
+                self._generations.move_to_end(user_phone)
+            while len(self._generations) > self.max_users:
+                _, generation = self._generations.popitem(last=False)
+                self._floor = max(self._floor, generation)
+    
+    @property
+    def shared(self) -> bool:
+        """Whether lookups and invalidations go to the SQLite file (blocking I/O)"""
+        return self._connection is not None
+    
+    def close(self):
+        """Close the shared store's SQLite connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+    
+    def stats(self) -> Dict:
+        """Hit ratio and staleness counters for /health"""
+        lookups = self.hits + self.misses
+        return {
+            'users': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            # Entries found out of date at lookup: invalidated elsewhere, or past the TTL
+            'stale_drops': self.stale_drops,
+            'expired': self.expired,
+            # How old the data served from the cache was
+            'avg_hit_age_seconds': self._hit_age_total / self.hits if self.hits else 0.0,
+            'max_hit_age_seconds': self._hit_age_max,
+            'shared': self.shared
+        }
@@ -1,28 +1,22 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict
-from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain.chains import LLMChain
 from dateutil import parser
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+import json
 import pytz
 import re
+import threading
+import time
 from config import Config
+from time_grammar import TimeGrammar
+from parse_cache import ParseCache
+from parse_templates import TemplateStore
+from parse_metrics import ParseMetrics
+from llm_batcher import LLMBatcher
 
-class TaskParser:
-    """Parse natural language messages to extract task information"""
-    
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            temperature=0,
-            model_name="gpt-3.5-turbo",
-            openai_api_key=Config.OPENAI_API_KEY
-        )
-        self.timezone = pytz.timezone(Config.DEFAULT_TIMEZONE)
-        
-        # Prompt template for extracting task information
-        self.prompt = PromptTemplate(
-            input_variables=["message", "current_time"],
-            template="""You are a helpful assistant that extracts task information from user messages.
+# Prompt template for extracting task information
+EXTRACTION_PROMPT = """You are a helpful assistant that extracts task information from user messages.
 
 Current date and time: {current_time}
 
@@ -56,14 +50,118 @@ Return ONLY a JSON object with this exact format:
 }}
 
 Do not include any other text or explanation."""
+
+# Same extraction for several messages at once (used by the micro-batcher)
+BATCH_EXTRACTION_PROMPT = """You are a helpful assistant that extracts task information from user messages.
+
+Current date and time: {current_time}
+
+User messages, as a JSON list of {{"id": ..., "message": ...}}:
+{messages}
+
+For EACH message extract:
+1. Task description (what the user wants to be reminded about)
+2. Reminder datetime (when to send the reminder)
+
+Important rules:
+- "in/within/after X seconds/minutes/hours" means ADD that time to current time
+- "tomorrow" means next day at 9 AM unless time specified
+- "tonight" means today at 8 PM
+- "today" means today, preserve current time or add specified time
+- If no specific time mentioned, use 9 AM as default for future days
+- Calculate from the CURRENT time provided above
+- Messages are independent of each other
+
+Return ONLY a JSON array with one object per message, in this exact format:
+[
+    {{
+        "id": <the message id>,
+        "task_description": "the task to remind about",
+        "reminder_datetime": "YYYY-MM-DD HH:MM:SS",
+        "confidence": "high/medium/low"
+    }}
+]
+
+Do not include any other text or explanation."""
+
+# Built on first use: importing langchain takes about a second
+_LAZY_LLM_ATTRIBUTES = ('llm', 'prompt', 'chain', 'batch_prompt', 'batch_chain')
+
+class TaskParser:
+    """Parse natural language messages to extract task information"""
+    
+    def __init__(self):
+        self.timezone = pytz.timezone(Config.DEFAULT_TIMEZONE)
+        self.grammar = TimeGrammar(self.timezone)
+        self.parse_cache = ParseCache(
+            Config.PARSE_CACHE_PATH,
+            self.timezone,
+            max_entries=Config.PARSE_CACHE_MAX_ENTRIES,
+            ttl_seconds=Config.PARSE_CACHE_TTL_HOURS * 3600
+        ) if Config.PARSE_CACHE_PATH else None
+        self.templates = TemplateStore(
+            Config.PARSE_TEMPLATES_PATH,
+            self.timezone,
+            max_templates=Config.PARSE_TEMPLATES_MAX
+        ) if Config.PARSE_TEMPLATES_PATH else None
+        
+        # Guards the lazy creation of the LLM client and chains (see __getattr__)
+        self._llm_lock = threading.Lock()
+        
+        # Caps in-flight OpenAI calls from the async path
+        self._llm_semaphore = asyncio.Semaphore(Config.LLM_MAX_CONCURRENCY)
+        # Runs sync LLM calls so parse_message can stop waiting at the deadline
+        self._llm_executor = ThreadPoolExecutor(max_workers=Config.LLM_MAX_CONCURRENCY, thread_name_prefix='llm')
+        self.metrics = ParseMetrics(
+            hedge_enabled=Config.LLM_HEDGE_ENABLED,
+            hedge_min_samples=Config.LLM_HEDGE_MIN_SAMPLES
         )
+        # Bursts of messages share one LLM call (LLM_BATCH_MAX_SIZE=1 disables)
+        self.batcher = LLMBatcher(
+            lambda inputs: self.chain.invoke(inputs),
+            self._invoke_batch,
+            self._llm_executor,
+            window_seconds=Config.LLM_BATCH_WINDOW_MS / 1000,
+            max_batch=Config.LLM_BATCH_MAX_SIZE
+        ) if Config.LLM_BATCH_MAX_SIZE > 1 else None
+    
+    def __getattr__(self, name):
+        """Create the LLM client, prompts and chains the first time one is used"""
+        if name in _LAZY_LLM_ATTRIBUTES:
+            self._build_llm()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+    
+    def _build_llm(self):
+        """Import langchain and build whatever hasn't been set (tests may inject their own chain)"""
+        from langchain.prompts import PromptTemplate
+        from langchain_openai import ChatOpenAI
+        from langchain.chains import LLMChain
         
-        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
+        with self._llm_lock:
+            attributes = self.__dict__
+            if 'llm' not in attributes:
+                self.llm = ChatOpenAI(
+                    temperature=0,
+                    model_name="gpt-3.5-turbo",
+                    openai_api_key=Config.OPENAI_API_KEY
+                )
+            if 'prompt' not in attributes:
+                self.prompt = PromptTemplate(input_variables=["message", "current_time"], template=EXTRACTION_PROMPT)
+            if 'batch_prompt' not in attributes:
+                self.batch_prompt = PromptTemplate(input_variables=["messages", "current_time"], template=BATCH_EXTRACTION_PROMPT)
+            if 'chain' not in attributes:
+                self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
+            if 'batch_chain' not in attributes:
+                self.batch_chain = LLMChain(llm=self.llm, prompt=self.batch_prompt)
     
     def parse_message(self, message: str) -> Optional[Dict]:
         """
         Parse a message to extract task and reminder time
         
+        The LLM call is bounded by LLM_TIMEOUT_SECONDS; on timeout or error the
+        local parser's guess is returned with confidence 'low'.
+        
         Args:
             message: User's message text
         
@@ -73,21 +171,195 @@ Do not include any other text or explanation."""
         # First try the simple parser for common patterns (faster and more reliable)
         simple_result = self.parse_simple_reminder(message)
         if simple_result and simple_result.get('confidence') == 'high':
+            self.metrics.record('fast_path')
             return simple_result
         
+        # Get current time in the configured timezone
+        current_time = datetime.now(self.timezone)
+        
+        cached = self._cached_result(message, current_time)
+        if cached:
+            return cached
+        
+        started = time.monotonic()
         try:
-            # Get current time in the configured timezone
-            current_time = datetime.now(self.timezone)
-            current_time_str = current_time.strftime("%A, %B %d, %Y at %I:%M %p")
-            
             # Use LangChain to extract information
-            result = self.chain.invoke({
-                "message": message,
-                "current_time": current_time_str
-            })
+            result = self._invoke_with_deadline(self._llm_inputs(message, current_time))
+        except TimeoutError:
+            print(f"⏱️ LLM parse exceeded {Config.LLM_TIMEOUT_SECONDS}s, using local parser")
+            return self._fallback(simple_result, 'timeout_fallback')
+        except Exception as e:
+            print(f"Error parsing message: {e}")
+            return self._fallback(simple_result, 'error_fallback')
+        
+        self.metrics.observe_latency(time.monotonic() - started)
+        return self._accept(message, result, simple_result, current_time)
+    
+    async def aparse_message(self, message: str) -> Optional[Dict]:
+        """
+        Async version of parse_message for use inside the bot's event loop
+        
+        The LLM call is awaited (so other updates keep being processed), limited
+        to LLM_MAX_CONCURRENCY concurrent calls and bounded by LLM_TIMEOUT_SECONDS
+        including time spent waiting for a slot.
+        
+        Args:
+            message: User's message text
+        
+        Returns:
+            Dictionary with task_description and reminder_time, or None if parsing fails
+        """
+        simple_result = self.parse_simple_reminder(message)
+        if simple_result and simple_result.get('confidence') == 'high':
+            self.metrics.record('fast_path')
+            return simple_result
+        
+        current_time = datetime.now(self.timezone)
+        
+        cached = self._cached_result(message, current_time)
+        if cached:
+            return cached
+        
+        started = time.monotonic()
+        try:
+            result = await self._ainvoke_with_deadline(self._llm_inputs(message, current_time))
+        except TimeoutError:
+            print(f"⏱️ LLM parse exceeded {Config.LLM_TIMEOUT_SECONDS}s, using local parser")
+            return self._fallback(simple_result, 'timeout_fallback')
+        except Exception as e:
+            print(f"Error parsing message: {e}")
+            return self._fallback(simple_result, 'error_fallback')
+        
+        self.metrics.observe_latency(time.monotonic() - started)
+        return self._accept(message, result, simple_result, current_time)
+    
+    def _invoke_with_deadline(self, inputs: Dict):
+        """
+        Run the chain in the LLM pool within the latency budget
+        
+        If hedging is enabled and the call is still running after the observed
+        p95 latency, a second identical request is sent and whichever answers
+        first wins. Raises TimeoutError when the budget runs out.
+        """
+        deadline = time.monotonic() + Config.LLM_TIMEOUT_SECONDS
+        futures = [self._submit_llm(inputs)]
+        
+        hedge_after = self.metrics.hedge_delay()
+        if hedge_after is not None and hedge_after < Config.LLM_TIMEOUT_SECONDS:
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                self.metrics.record('hedged')
+                futures.append(self._submit_llm(inputs))
+        
+        done, _ = wait(futures, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        # Calls that lost are left to finish in the pool; their results are dropped
+        for future in futures:
+            future.cancel()
+        if not done:
+            raise TimeoutError
+        return next(iter(done)).result()
+    
+    def _submit_llm(self, inputs: Dict) -> Future:
+        """Start an LLM call, through the micro-batcher when enabled"""
+        if self.batcher is not None:
+            return self.batcher.submit(inputs)
+        return self._llm_executor.submit(self.chain.invoke, inputs)
+    
+    def _invoke_batch(self, batch_inputs):
+        """One chain call for several messages; answers are split by LLMBatcher"""
+        messages = [{'id': i, 'message': inputs['message']} for i, inputs in enumerate(batch_inputs)]
+        return self.batch_chain.invoke({
+            'messages': json.dumps(messages, ensure_ascii=False),
+            'current_time': batch_inputs[0]['current_time']
+        })
+    
+    async def _ainvoke_with_deadline(self, inputs: Dict):
+        """Async counterpart of _invoke_with_deadline; the losing request is cancelled"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.LLM_TIMEOUT_SECONDS
+        
+        async def call_llm():
+            if self.batcher is not None:
+                return await asyncio.wrap_future(self.batcher.submit(inputs))
+            async with self._llm_semaphore:
+                return await self.chain.ainvoke(inputs)
+        
+        tasks = [asyncio.ensure_future(call_llm())]
+        try:
+            hedge_after = self.metrics.hedge_delay()
+            if hedge_after is not None and hedge_after < Config.LLM_TIMEOUT_SECONDS:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    self.metrics.record('hedged')
+                    tasks.append(asyncio.ensure_future(call_llm()))
             
-            # Parse the JSON response
-            import json
+            done, _ = await asyncio.wait(tasks, timeout=max(0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError
+            return next(iter(done)).result()
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _accept(self, message: str, result, simple_result: Optional[Dict], current_time: datetime) -> Optional[Dict]:
+        """Use a valid LLM answer, or fall back to the local parser"""
+        parsed = self._parse_llm_result(result, current_time)
+        if not parsed:
+            return self._fallback(simple_result, 'error_fallback')
+        self.metrics.record('llm_hit')
+        return self._remember(message, parsed, current_time)
+    
+    def _fallback(self, simple_result: Optional[Dict], outcome: str) -> Optional[Dict]:
+        """Local parser's guess, marked low-confidence, when the LLM can't answer in time"""
+        self.metrics.record(outcome)
+        if not simple_result:
+            return None
+        return dict(simple_result, confidence='low')
+    
+    def _cached_result(self, message: str, current_time: datetime) -> Optional[Dict]:
+        """Previous LLM parse of the same message, or of a learned template, re-anchored to now"""
+        for name, lookup in (('cache', self.parse_cache and self.parse_cache.get),
+                             ('template', self.templates and self.templates.match)):
+            if not lookup:
+                continue
+            try:
+                result = lookup(message, current_time)
+                if result:
+                    self.metrics.record(f'{name}_hit')
+                    return result
+            except Exception as e:
+                print(f"⚠️ Parse {name} lookup failed: {e}")
+        return None
+    
+    def _remember(self, message: str, parsed: Optional[Dict], current_time: datetime) -> Optional[Dict]:
+        """Store a successful LLM parse in the cache and template store and pass it through"""
+        if not parsed:
+            return parsed
+        if self.parse_cache is not None:
+            try:
+                self.parse_cache.put(message, parsed, current_time)
+            except Exception as e:
+                print(f"⚠️ Parse cache store failed: {e}")
+        if self.templates is not None:
+            try:
+                template = self.templates.learn(message, parsed, current_time)
+                if template:
+                    print(f"🧩 Learned parse template: {template['pattern']}")
+            except Exception as e:
+                print(f"⚠️ Parse template learning failed: {e}")
+        return parsed
+    
+    @staticmethod
+    def _llm_inputs(message: str, current_time: datetime) -> Dict:
+        """Prompt variables for the extraction chain"""
+        return {
+            "message": message,
+            "current_time": current_time.strftime("%A, %B %d, %Y at %I:%M %p")
+        }
+    
+    def _parse_llm_result(self, result, current_time: datetime) -> Optional[Dict]:
+        """Turn the chain's JSON answer into a parsed reminder"""
+        try:
             # Handle both dict and string responses
             if isinstance(result, dict):
                 result = result.get('text', str(result))
@@ -120,14 +392,18 @@ Do not include any other text or explanation."""
                 'reminder_time': reminder_time,
                 'confidence': parsed.get('confidence', 'medium')
             }
-            
+        
         except Exception as e:
-            print(f"Error parsing message: {e}")
+            print(f"Error parsing LLM response: {e}")
             return None
     
     def parse_simple_reminder(self, message: str) -> Optional[Dict]:
         """
-        Fallback parser for simple reminders using pattern matching
+        Local parser for reminders using the rule-based time grammar
+        
+        Returns confidence 'high' when the time was resolved unambiguously (no
+        LLM needed), 'low' for a partial or ambiguous parse, or 'low' with a
+        tomorrow-9-AM default when only a task was found.
         
         Args:
             message: User's message text
@@ -137,57 +413,25 @@ Do not include any other text or explanation."""
         """
         try:
             current_time = datetime.now(self.timezone)
-            message_lower = message.lower()
             
-            # Extract task description (everything before time indicators)
-            task_match = re.search(r'remind me to (.+?)(?:\s+in\s+|\s+within\s+|\s+after\s+|$)', message_lower)
-            if not task_match:
-                return None
+            result = self.grammar.parse(message, current_time)
+            if result:
+                return result
             
-            task = task_match.group(1).strip()
-            reminder_time = current_time
-            
-            # Parse relative time: "in/within/after X seconds/minutes/hours/days"
-            time_match = re.search(r'(?:in|within|after)\s+(\d+)\s+(second|seconds|minute|minutes|hour|hours|day|days)', message_lower)
-            
-            if time_match:
-                amount = int(time_match.group(1))
-                unit = time_match.group(2)
-                
-                if 'second' in unit:
-                    reminder_time = current_time + timedelta(seconds=amount)
-                elif 'minute' in unit:
-                    reminder_time = current_time + timedelta(minutes=amount)
-                elif 'hour' in unit:
-                    reminder_time = current_time + timedelta(hours=amount)
-                elif 'day' in unit:
-                    reminder_time = current_time + timedelta(days=amount)
-                
-                return {
-                    'task_description': task,
-                    'reminder_time': reminder_time,
-                    'confidence': 'high'
-                }
+            task = self.grammar.extract_task(message)
+            if not task:
+                return None
             
-            # Parse specific times: "tomorrow", "today", "tonight"
-            if 'tomorrow' in message_lower:
-                reminder_time = current_time + timedelta(days=1)
-                reminder_time = reminder_time.replace(hour=9, minute=0, second=0)
-            elif 'tonight' in message_lower:
-                reminder_time = current_time.replace(hour=20, minute=0, second=0)
-            elif 'today' in message_lower:
-                reminder_time = current_time.replace(hour=18, minute=0, second=0)
-            else:
-                # Default to tomorrow at 9 AM
-                reminder_time = current_time + timedelta(days=1)
-                reminder_time = reminder_time.replace(hour=9, minute=0, second=0)
+            # No time we understand: default to tomorrow at 9 AM
+            tomorrow = (current_time + timedelta(days=1)).date()
+            reminder_time = self.timezone.localize(datetime(tomorrow.year, tomorrow.month, tomorrow.day, 9, 0))
             
             return {
                 'task_description': task,
                 'reminder_time': reminder_time,
-                'confidence': 'medium'
+                'confidence': 'low'
             }
-            
+        
         except Exception as e:
             print(f"Error in simple parser: {e}")
             return None
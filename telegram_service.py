@@ -1,15 +1,21 @@
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import RetryAfter, BadRequest, Forbidden
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram.request import HTTPXRequest
 from datetime import datetime
 from config import Config
 from database import Database
 from task_parser import TaskParser
+from intent_classifier import IntentClassifier
+from voice_cache import VoiceCache
 import asyncio
 import httpx
-from gtts import gTTS
-import tempfile
-import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import io
+
+# Telegram rejects longer text messages
+MESSAGE_LIMIT = 4096
 
 class TelegramService:
     """Service for Telegram bot messaging (FREE alternative to WhatsApp)"""
@@ -18,7 +24,33 @@ class TelegramService:
         self.bot_token = Config.TELEGRAM_BOT_TOKEN
         self.database = database
         self.task_parser = task_parser
+        self.intent_classifier = IntentClassifier()
         self.application = None
+        self.voice_cache = VoiceCache(
+            Config.VOICE_CACHE_DIR,
+            max_disk_bytes=Config.VOICE_CACHE_MAX_MB * 1024 * 1024,
+            max_memory_bytes=Config.VOICE_CACHE_MEMORY_MB * 1024 * 1024
+        )
+        # gTTS is blocking network I/O: keep it off the bot's event loop
+        self.tts_executor = ThreadPoolExecutor(
+            max_workers=Config.TTS_WORKERS,
+            thread_name_prefix='tts'
+        )
+        # The bot's event loop, captured once polling starts (used by the scheduler thread)
+        self.loop = None
+        self._async_database = None
+    
+    @property
+    def async_database(self):
+        """Non-blocking database access for the handlers, created on first use (on the bot's loop)"""
+        if self._async_database is None:
+            from async_database import AsyncDatabase
+            self._async_database = AsyncDatabase(self.database)
+        return self._async_database
+    
+    async def _on_startup(self, application: Application):
+        """Remember the running event loop so other threads can schedule sends on it"""
+        self.loop = asyncio.get_running_loop()
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -54,17 +86,77 @@ I'll figure out when to remind you and send a message at the right time!"""
         await update.message.reply_text(help_text)
     
     async def list_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /list command"""
-        user_id = str(update.effective_user.id)
-        tasks = self.database.get_user_tasks(user_id)
+        """Handle /list command: the first page of pending reminders"""
+        text, buttons = await self.task_page(str(update.effective_user.id))
+        await update.message.reply_text(text, reply_markup=buttons)
+    
+    async def list_page_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Next/previous buttons under a /list page: 'list:<next|prev>:<start>:<reminder_at_ms>:<id>'"""
+        query = update.callback_query
+        await query.answer()
+        direction, start, reminder_at_ms, task_id = query.data.split(':')[1:]
+        cursor = (int(reminder_at_ms), int(task_id))
+        text, buttons = await self.task_page(
+            str(query.from_user.id),
+            start=int(start),
+            after=cursor if direction == 'next' else None,
+            before=cursor if direction == 'prev' else None
+        )
+        try:
+            await query.edit_message_text(text, reply_markup=buttons)
+        except BadRequest as e:
+            # "Message is not modified" after a double tap
+            print(f"⚠️ Could not update /list page: {e}")
+    
+    async def task_page(self, user_id: str, start: int = 0, after=None, before=None):
+        """
+        Text and inline buttons for one /list page
         
-        if not tasks:
-            await update.message.reply_text("📋 You have no pending reminders.")
+        Args:
+            user_id: Telegram user id
+            start: Number of reminders before this page (for numbering); with `before`,
+                the number before the page being paged back from
+            after / before: Task.cursor to page forward from / back from
+        """
+        page_size = Config.LIST_PAGE_SIZE
+        # One extra row tells whether another page follows in the paging direction
+        tasks = await self.async_database.get_user_tasks(user_id, limit=page_size + 1, after=after, before=before)
+        if before:
+            has_previous = len(tasks) > page_size
+            tasks = tasks[-page_size:]
+            has_next = True
+            start = max(start - len(tasks), 0) if has_previous else 0
         else:
-            task_list = "📋 Your pending reminders:\n\n"
-            for i, task in enumerate(tasks, 1):
-                task_list += f"{i}. {task.task_description}\n   ⏰ {task.reminder_time.strftime('%A, %B %d at %I:%M %p')}\n\n"
-            await update.message.reply_text(task_list)
+            has_previous = after is not None
+            has_next = len(tasks) > page_size
+            tasks = tasks[:page_size]
+        
+        if not tasks:
+            if after or before:
+                # The neighbouring reminders have been sent since the page was shown
+                return await self.task_page(user_id)
+            return "📋 You have no pending reminders.", None
+        
+        # Room per reminder so a full page stays under Telegram's message limit
+        description_limit = MESSAGE_LIMIT // page_size - 60
+        total = await self.async_database.count_pending_tasks(user_id)
+        task_list = f"📋 Your pending reminders ({total}):\n\n"
+        for i, task in enumerate(tasks, start + 1):
+            description = task.task_description
+            if len(description) > description_limit:
+                description = description[:description_limit - 1] + "…"
+            task_list += f"{i}. {description}\n   ⏰ {task.reminder_time.strftime('%A, %B %d at %I:%M %p')}\n\n"
+        
+        buttons = []
+        if has_previous:
+            buttons.append(InlineKeyboardButton(
+                "⬅️ Previous", callback_data='list:prev:{}:{}:{}'.format(start, *tasks[0].cursor)
+            ))
+        if has_next:
+            buttons.append(InlineKeyboardButton(
+                "Next ➡️", callback_data='list:next:{}:{}:{}'.format(start + len(tasks), *tasks[-1].cursor)
+            ))
+        return task_list, InlineKeyboardMarkup([buttons]) if buttons else None
     
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle regular text messages"""
@@ -76,8 +168,22 @@ I'll figure out when to remind you and send a message at the right time!"""
             
             print(f"📨 Received message from {user_name} ({user_id}): {message_text}")
             
+            # Only plausible reminders go on to the parser (and possibly the LLM)
+            triage = self.intent_classifier.classify(message_text)
+            if triage['intent'] == 'command':
+                if triage['command'] == 'list':
+                    await self.list_command(update, context)
+                elif triage['command'] == 'start':
+                    await self.start_command(update, context)
+                else:
+                    await self.help_command(update, context)
+                return
+            if triage['intent'] == 'chatter':
+                await update.message.reply_text(self.intent_classifier.reply(triage))
+                return
+            
             # Parse the message
-            parsed_data = self.task_parser.parse_message(message_text)
+            parsed_data = await self.task_parser.aparse_message(message_text)
             print(f"🔍 Parsed data: {parsed_data}")
             
             if not parsed_data:
@@ -90,7 +196,7 @@ I'll figure out when to remind you and send a message at the right time!"""
                 return
             
             # Save the task
-            task = self.database.add_task(
+            task = await self.async_database.add_task(
                 user_phone=user_id,
                 task_description=parsed_data['task_description'],
                 reminder_time=parsed_data['reminder_time']
@@ -103,7 +209,7 @@ I'll figure out when to remind you and send a message at the right time!"""
             await update.message.reply_text(confirmation)
             
             print(f"✅ Created task {task.id} for {user_name}")
-            
+        
         except Exception as e:
             print(f"❌ Error handling message: {e}")
             # Try to send error message, but don't crash if it fails
@@ -124,57 +230,142 @@ I'll figure out when to remind you and send a message at the right time!"""
             
             # Generate and send voice message
             try:
-                # Create voice message text
-                voice_text = f"Reminder: {task_description}"
-                
-                # Generate speech
-                tts = gTTS(text=voice_text, lang='en', slow=False)
-                
-                # Save to temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                    temp_path = temp_file.name
-                    tts.save(temp_path)
-                
-                # Send voice message
-                with open(temp_path, 'rb') as voice_file:
-                    await self.application.bot.send_voice(
-                        chat_id=int(user_id),
-                        voice=voice_file,
-                        caption=f"🔊 Voice reminder"
-                    )
-                
-                # Clean up temporary file
-                os.unlink(temp_path)
+                await self.send_voice(int(user_id), self.voice_text(task_description))
                 print(f"📢 Sent voice reminder for: {task_description}")
-                
+            
             except Exception as voice_error:
                 print(f"⚠️ Could not send voice message: {voice_error}")
                 # Text message was already sent, so still return True
             
             return True
+        except (RetryAfter, Forbidden):
+            # Flood control / blocked by the user: the dispatcher decides what to do
+            raise
         except Exception as e:
             print(f"❌ Error sending reminder to {user_id}: {e}")
             return False
     
-    def start_bot(self):
-        """Start the Telegram bot"""
-        print("🤖 Starting Telegram bot...")
+    async def send_voice(self, chat_id: int, voice_text: str, lang: str = 'en'):
+        """Send a voice note, reusing an already uploaded clip when possible"""
+        caption = "🔊 Voice reminder"
+        loop = asyncio.get_running_loop()
+        
+        # Identical text was uploaded before: send by reference, no synthesis or upload.
+        # The cache reads and writes small files, so keep it off the event loop
+        file_id = await loop.run_in_executor(None, self.voice_cache.get_file_id, voice_text, lang)
+        if file_id:
+            try:
+                return await self.application.bot.send_voice(chat_id=chat_id, voice=file_id, caption=caption)
+            except BadRequest as e:
+                print(f"⚠️ Cached voice file_id rejected, re-uploading: {e}")
+                await loop.run_in_executor(None, self.voice_cache.forget_file_id, voice_text, lang)
         
-        # Create application with increased timeout to handle network issues better
+        # Cache lookup (disk read) and synthesis both run in the TTS pool
+        audio = await loop.run_in_executor(
+            self.tts_executor,
+            self.voice_cache.get_audio,
+            voice_text,
+            lang,
+            self._synthesize
+        )
+        message = await self.application.bot.send_voice(
+            chat_id=chat_id,
+            voice=audio,
+            filename='reminder.mp3',
+            caption=caption
+        )
+        if message and message.voice:
+            await loop.run_in_executor(None, self.voice_cache.remember_file_id, voice_text, lang, message.voice.file_id)
+        return message
+    
+    @staticmethod
+    def voice_text(task_description: str) -> str:
+        """Spoken text for a reminder"""
+        return f"Reminder: {task_description}"
+    
+    def prerender_voice(self, task_description: str, lang: str = 'en'):
+        """Render a reminder's voice note in the background so it is cached when due"""
+        voice_text = self.voice_text(task_description)
+        if self.voice_cache.get_file_id(voice_text, lang):
+            return None
+        return self.tts_executor.submit(self.voice_cache.get_audio, voice_text, lang, self._synthesize)
+    
+    @staticmethod
+    def _synthesize(voice_text: str, lang: str) -> bytes:
+        """Generate MP3 speech for the given text"""
+        # Imported here so processes that never speak don't pay for it
+        from gtts import gTTS
+        buffer = io.BytesIO()
+        gTTS(text=voice_text, lang=lang, slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+    
+    @staticmethod
+    def connection_pool_size() -> int:
+        """One connection per concurrent reminder send, plus headroom for handler replies"""
+        return Config.TELEGRAM_MAX_CONCURRENT_SENDS + Config.TELEGRAM_HANDLER_CONNECTIONS
+    
+    def _build_application(self) -> Application:
+        # Create application with increased timeout to handle network issues better;
+        # a pool smaller than the send concurrency turns bursts into PoolTimeouts (and retries)
         request = HTTPXRequest(
-            connection_pool_size=8,
+            connection_pool_size=self.connection_pool_size(),
             connect_timeout=10.0,
             read_timeout=20.0,
             write_timeout=20.0,
             pool_timeout=10.0
         )
         
-        self.application = Application.builder().token(self.bot_token).request(request).build()
+        return (
+            Application.builder()
+            .token(self.bot_token)
+            .request(request)
+            .post_init(self._on_startup)
+            .concurrent_updates(Config.TELEGRAM_CONCURRENT_UPDATES)
+            .build()
+        )
+    
+    def start_sender(self, timeout: float = 30):
+        """
+        Start a send-only bot (no polling, no handlers) on a background event loop
+        
+        Used by the standalone dispatcher, which delivers reminders while the
+        polling bot runs in another process.
+        """
+        self.application = self._build_application()
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        errors = []
+        
+        def run():
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.application.initialize())
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+                return
+            self.loop = loop
+            ready.set()
+            loop.run_forever()
+        
+        threading.Thread(target=run, name='telegram-sender', daemon=True).start()
+        if not ready.wait(timeout):
+            raise TimeoutError("Telegram sender did not start")
+        if errors:
+            raise errors[0]
+        print("✅ Telegram sender ready")
+    
+    def start_bot(self):
+        """Start the Telegram bot"""
+        print("🤖 Starting Telegram bot...")
+        
+        self.application = self._build_application()
         
         # Add handlers
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
         self.application.add_handler(CommandHandler("list", self.list_command))
+        self.application.add_handler(CallbackQueryHandler(self.list_page_callback, pattern=r'^list:'))
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
         
         # Start polling
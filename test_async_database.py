@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+import pytest
+from datetime import datetime
+from sqlalchemy import text
+from database import Database
+from async_database import AsyncDatabase, async_url
+
+pytest.importorskip('aiosqlite')
+
+def test_async_url_picks_the_asyncio_driver():
+    """Sync URLs map onto aiosqlite / asyncpg"""
+    assert async_url('sqlite:///reminders.db') == 'sqlite+aiosqlite:///reminders.db'
+    assert async_url('postgres://u:p@host/db') == 'postgresql+asyncpg://u:p@host/db'
+    assert async_url('postgresql+psycopg2://u:p@host/db') == 'postgresql+asyncpg://u:p@host/db'
+
+def test_async_and_sync_layers_share_tasks_and_listeners(database):
+    """Tasks added from a coroutine are visible to the sync layer and reach its listeners"""
+    notified = []
+    database.add_task_listener(lambda task: notified.append(task.id))
+    
+    async def run():
+        async_database = AsyncDatabase(database)
+        try:
+            task = await async_database.add_task('user', 'stretch', datetime(2030, 1, 1, 9, 0))
+            return task, await async_database.get_user_tasks('user')
+        finally:
+            await async_database.dispose()
+    
+    task, tasks = asyncio.run(run())
+    assert notified == [task.id]
+    assert [t.id for t in tasks] == [t.id for t in database.get_user_tasks('user')] == [task.id]
+
+def test_lock_wait_does_not_stall_the_event_loop(database):
+    """While another writer holds the SQLite lock, other coroutines keep running"""
+    locked = threading.Event()
+    
+    def hold_write_lock():
+        with database.engine.connect() as connection:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            locked.set()
+            time.sleep(0.5)
+            connection.execute(text('ROLLBACK'))
+    
+    async def run():
+        async_database = AsyncDatabase(database)
+        holder = threading.Thread(target=hold_write_lock)
+        holder.start()
+        locked.wait()
+        started = time.perf_counter()
+        gaps = []
+        
+        async def tick():
+            last = time.perf_counter()
+            while holder.is_alive():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+        
+        async def add():
+            await async_database.add_task('user', 'waits for the lock', datetime(2030, 1, 1))
+            return time.perf_counter() - started
+        
+        try:
+            _, waited = await asyncio.gather(tick(), add())
+        finally:
+            holder.join()
+            await async_database.dispose()
+        return gaps, waited
+    
+    gaps, waited = asyncio.run(run())
+    assert waited >= 0.3
+    assert len(gaps) > 10
+    assert max(gaps) < 0.2
+    assert len(database.get_user_tasks('user')) == 1
+
+def test_shared_task_cache_is_used_off_the_event_loop(database, monkeypatch):
+    """With the SQLite-backed task cache, its lookups, stores and invalidations run in the executor"""
+    cache = database.task_cache
+    assert cache.shared
+    threads = []
+    for name in ('lookup', 'store', 'invalidate'):
+        method = getattr(cache, name)
+        
+        def record(*args, _method=method):
+            threads.append(threading.current_thread())
+            return _method(*args)
+        monkeypatch.setattr(cache, name, record)
+    
+    async def run():
+        async_database = AsyncDatabase(database)
+        try:
+            await async_database.add_task('user', 'stretch', datetime(2030, 1, 1, 9, 0))
+            await async_database.get_user_tasks('user', limit=10)
+            await async_database.count_pending_tasks('user')
+        finally:
+            await async_database.dispose()
+    
+    asyncio.run(run())
+    assert len(threads) == 5
+    assert threading.main_thread() not in threads
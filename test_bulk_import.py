@@ -0,0 +1,58 @@
+import io
+import pytz
+from datetime import datetime
+from bulk_import import BulkImporter, detect_format, read_rows
+
+TIMEZONE = pytz.timezone('Asia/Kolkata')
+
+def test_csv_rows_are_validated_and_imported_in_batches(database):
+    """Good rows land across several batches; bad rows are reported by line"""
+    csv_text = (
+        "user_phone,task_description,reminder_time,message\n"
+        "111,Pay rent,2030-01-01T09:00,\n"
+        "222,,,remind me to call mom tomorrow at 5pm\n"
+        "333,Old news,2001-01-01T09:00,\n"
+        ",Nobody,2030-01-01T09:00,\n"
+        "444,Bad time,next tuesday-ish,\n"
+        "555,,,remind me about something\n"
+        "666,Water plants,2030-01-02T07:30+00:00,\n"
+    )
+    importer = BulkImporter(database, timezone=TIMEZONE, batch_size=2)
+    
+    report = importer.run(read_rows(io.StringIO(csv_text), 'csv'))
+    
+    assert (report['rows'], report['imported'], report['rejected']) == (7, 3, 4)
+    assert [error['line'] for error in report['errors']] == [4, 5, 6, 7]
+    assert 'past' in report['errors'][0]['error']
+    assert report['rows_per_second'] > 0
+    rent = database.get_user_tasks('111')[0]
+    assert rent.reminder_time == datetime(2030, 1, 1, 9, 0)
+    assert database.get_user_tasks('222')[0].task_description == 'call mom'
+    # Offsets are converted to the configured timezone's wall time
+    assert database.get_user_tasks('666')[0].reminder_time == datetime(2030, 1, 2, 13, 0)
+
+def test_ndjson_import_notifies_listeners_with_ids(database):
+    """With a listener registered (scheduler, wake sender) every imported task is announced"""
+    notified = []
+    database.add_task_listener(lambda task: notified.append((task.id, task.reminder_at_ms)))
+    ndjson_text = (
+        '{"user_phone": "111", "task_description": "Stretch", "reminder_time": "2030-01-01T09:00"}\n'
+        '\n'
+        'not json\n'
+        '{"user_phone": "111", "message": "remind me in 10 minutes to drink water"}\n'
+        '[1, 2]\n'
+    )
+    
+    report = BulkImporter(database, timezone=TIMEZONE).run(read_rows(io.StringIO(ndjson_text), 'ndjson'))
+    
+    assert (report['rows'], report['imported'], report['rejected']) == (4, 2, 2)
+    assert [error['line'] for error in report['errors']] == [3, 5]
+    tasks = database.get_user_tasks('111')
+    assert sorted(notified) == sorted((task.id, task.reminder_at_ms) for task in tasks)
+
+def test_detect_format():
+    """NDJSON by extension or content type, CSV otherwise"""
+    assert detect_format(filename='reminders.ndjson') == 'ndjson'
+    assert detect_format(filename='reminders.jsonl') == 'ndjson'
+    assert detect_format(content_type='application/x-ndjson') == 'ndjson'
+    assert detect_format(filename='reminders.csv', content_type='text/csv') == 'csv'
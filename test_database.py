@@ -0,0 +1,287 @@
+import multiprocessing
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from database import ArchivedTask, Database, Task, to_epoch_ms
+import pytz
+from config import Config
+
+def query_plan(database, sql, **params):
+    with database.engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return ' '.join(row[-1] for row in rows)
+
+def test_aware_and_naive_times_share_one_clock(database):
+    """Aware and naive reminder times are stored on the same UTC epoch"""
+    timezone = pytz.timezone(Config.DEFAULT_TIMEZONE)
+    naive = datetime(2030, 1, 1, 9, 0)
+    aware_utc = timezone.localize(naive).astimezone(pytz.utc)
+    
+    first = database.add_task('user', 'naive', naive)
+    second = database.add_task('user', 'aware', aware_utc)
+    
+    assert first.reminder_at_ms == second.reminder_at_ms == to_epoch_ms(aware_utc)
+    assert first.reminder_time == second.reminder_time == naive
+
+def test_sqlite_engine_uses_wal_and_thread_scoped_sessions(database):
+    """Connections run in WAL mode; each thread gets its own session; results outlive it"""
+    with database.engine.connect() as connection:
+        assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+    
+    task = database.add_task('user', 'stretch', datetime(2030, 1, 1, 9, 0))
+    # Not expired on commit: attributes are readable after the session closed
+    assert (task.id, task.is_sent, task.attempts) == (1, False, 0)
+    
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(database.get_session()))
+    thread.start()
+    thread.join()
+    assert database.get_session() is database.get_session()
+    assert sessions[0] is not database.get_session()
+
+def test_pending_reminders_use_epoch(database):
+    """Due-time comparison works regardless of the caller's timezone"""
+    now = datetime.now(pytz.utc)
+    database.add_task('user', 'due', now - timedelta(minutes=1))
+    database.add_task('user', 'later', now + timedelta(minutes=1))
+    
+    pending = database.get_pending_reminders(now.astimezone(pytz.timezone('America/New_York')))
+    assert [task.task_description for task in pending] == ['due']
+
+def test_hot_queries_use_indexes(database):
+    """The dispatcher and per-user queries are served by the composite/partial indexes"""
+    plan = query_plan(
+        database,
+        "SELECT * FROM tasks WHERE is_sent = 0 AND reminder_at_ms <= :now",
+        now=0
+    )
+    assert 'ix_tasks_pending_due' in plan
+    
+    plan = query_plan(
+        database,
+        "SELECT * FROM tasks WHERE user_phone = :phone AND is_sent = 0 ORDER BY reminder_at_ms",
+        phone='user'
+    )
+    assert 'ix_tasks_user_status_due' in plan
+    assert 'TEMP B-TREE' not in plan
+    
+    # Keyset pages of /list and /tasks/<phone> too
+    plan = query_plan(
+        database,
+        "SELECT * FROM tasks WHERE user_phone = :phone AND is_sent = 0 "
+        "AND (reminder_at_ms > :ms OR (reminder_at_ms = :ms AND id > :id)) ORDER BY reminder_at_ms, id LIMIT 11",
+        phone='user', ms=0, id=0
+    )
+    assert 'ix_tasks_user_status_due' in plan
+    assert 'TEMP B-TREE' not in plan
+
+def test_added_columns_render_for_postgresql():
+    """migrate() emits dialect types: PostgreSQL has no DATETIME"""
+    from sqlalchemy.dialects import postgresql
+    types = [Task.__table__.c[name].type.compile(dialect=postgresql.dialect()) for name in Database.ADDED_COLUMNS]
+    assert 'TIMESTAMP WITHOUT TIME ZONE' in types
+    assert 'DATETIME' not in types
+
+def test_migrates_legacy_database(tmp_path):
+    """An old reminders.db without reminder_at_ms is upgraded and backfilled"""
+    path = tmp_path / 'legacy.db'
+    connection = sqlite3.connect(path)
+    connection.execute("""
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY,
+            user_phone VARCHAR(20) NOT NULL,
+            task_description VARCHAR(500) NOT NULL,
+            reminder_time DATETIME NOT NULL,
+            created_at DATETIME,
+            is_sent BOOLEAN,
+            sent_at DATETIME
+        )
+    """)
+    connection.execute(
+        "INSERT INTO tasks (user_phone, task_description, reminder_time, created_at, is_sent) "
+        "VALUES ('user', 'old task', '2030-01-01 09:00:00.000000', '2029-12-31 00:00:00.000000', 0)"
+    )
+    connection.commit()
+    connection.close()
+    
+    database = Database(f"sqlite:///{path}")
+    
+    tasks = database.get_user_tasks('user')
+    assert len(tasks) == 1
+    assert tasks[0].reminder_at_ms == to_epoch_ms(datetime(2030, 1, 1, 9, 0))
+    assert 'ix_tasks_pending_due' in query_plan(
+        database,
+        "SELECT * FROM tasks WHERE is_sent = 0 AND reminder_at_ms <= :now",
+        now=0
+    )
+    database.engine.dispose()
+
+def test_claim_is_exclusive_until_lease_expires(database):
+    """A claimed task is invisible to other workers until its lease runs out"""
+    now = datetime.now(pytz.utc)
+    task = database.add_task('user', 'due', now - timedelta(minutes=1))
+    database.add_task('user', 'later', now + timedelta(minutes=10))
+    
+    assert [t.id for t in database.claim_due_tasks('a', now, lease_seconds=60)] == [task.id]
+    assert database.claim_due_tasks('b', now) == []
+    
+    # After the lease expires another worker takes over; sent tasks are never claimed
+    retaken = database.claim_due_tasks('b', now + timedelta(seconds=61))
+    assert [(t.id, t.claimed_by) for t in retaken] == [(task.id, 'b')]
+    database.mark_task_sent(task.id)
+    later = database.claim_due_tasks('c', now + timedelta(hours=1))
+    assert [t.task_description for t in later] == ['later']
+
+def test_record_outcomes_updates_a_batch_at_once(database):
+    """Sent, failed and retried tasks are stored in one call; only the claimant's failures count"""
+    now = datetime.now(pytz.utc)
+    sent, failed, retried, foreign = (
+        database.add_task('user', name, now - timedelta(minutes=1)).id
+        for name in ('sent', 'failed', 'retried', 'foreign')
+    )
+    database.claim_due_tasks('a', now)
+    
+    counts = database.record_outcomes(
+        'a',
+        sent_ids=[sent],
+        failed_ids=[failed],
+        retries={retried: now + timedelta(minutes=5)}
+    )
+    assert counts == {'sent': 1, 'failed': 1, 'retry': 1}
+    # Another worker's outcome for a task it does not hold is ignored
+    assert database.record_outcomes('b', failed_ids=[foreign]) == {'sent': 0, 'failed': 0, 'retry': 0}
+    
+    tasks = {task.id: task for task in database.get_user_tasks('user', include_sent=True)}
+    assert tasks[sent].is_sent and tasks[sent].sent_at and not tasks[sent].failed_at
+    assert tasks[failed].is_sent and tasks[failed].failed_at and tasks[failed].attempts == 1
+    assert not tasks[retried].is_sent and tasks[retried].attempts == 1
+    
+    # The retry is claimable again only once its retry time has passed
+    assert database.claim_due_tasks('c', now + timedelta(minutes=1)) == []
+    later = database.claim_due_tasks('c', now + timedelta(minutes=6))
+    assert sorted(task.id for task in later) == sorted([retried, foreign])
+
+def test_backlog_is_streamed_in_keyset_chunks(database):
+    """Pending reminders come out oldest first across chunk boundaries, ties broken by id"""
+    now = datetime.now(pytz.utc)
+    same_time = now - timedelta(hours=1)
+    ids = [database.add_task('user', f'tie {i}', same_time).id for i in range(3)]
+    ids += [database.add_task('user', f'later {i}', now - timedelta(minutes=30 - i)).id for i in range(4)]
+    database.add_task('user', 'future', now + timedelta(hours=1))
+    
+    pending = database.get_pending_reminders(now, chunk_size=2)
+    assert not isinstance(pending, list)
+    assert [task.id for task in pending] == ids
+    
+    # Claims continue after the cursor instead of rescanning from the start
+    first = database.claim_due_tasks('a', now, limit=3)
+    rest = database.claim_due_tasks('a', now, limit=10, after=(first[-1].reminder_at_ms, first[-1].id))
+    assert [task.id for task in first + rest] == ids
+
+def test_user_tasks_page_by_keyset(database):
+    """Pages follow (reminder_at_ms, id) in both directions; export streams every task"""
+    due = datetime(2030, 1, 1, 9, 0)
+    ids = [database.add_task('user', f'tie {i}', due).id for i in range(3)]
+    ids += [database.add_task('user', f'later {i}', due + timedelta(minutes=i + 1)).id for i in range(4)]
+    database.add_task('other', 'not mine', due)
+    
+    first = database.get_user_tasks('user', limit=3)
+    second = database.get_user_tasks('user', limit=3, after=first[-1].cursor)
+    third = database.get_user_tasks('user', limit=3, after=second[-1].cursor)
+    assert [task.id for task in first + second + third] == ids
+    back = database.get_user_tasks('user', limit=3, before=second[0].cursor)
+    assert [task.id for task in back] == ids[:3]
+    
+    exported = database.iter_user_tasks('user', chunk_size=2)
+    assert not isinstance(exported, list)
+    assert [task.id for task in exported] == ids
+
+def test_archive_moves_settled_tasks_in_batches(database):
+    """Old sent/failed rows move to tasks_archive; pending, recent and the newest row stay"""
+    now = datetime.now(pytz.utc)
+    old = [database.add_task('user', f'old {i}', now - timedelta(days=30, minutes=i)) for i in range(5)]
+    pending = database.add_task('user', 'still pending', now - timedelta(days=30))
+    recent = database.add_task('user', 'sent yesterday', now - timedelta(days=1))
+    newest = database.add_task('user', 'newest', now - timedelta(days=30))
+    for task in old[:4] + [recent, newest]:
+        database.mark_task_sent(task.id)
+    claimed = database.claim_due_tasks('worker', now, limit=10)
+    assert old[4].id in [task.id for task in claimed]
+    database.record_outcomes('worker', failed_ids=[old[4].id])
+    # A copy left behind by an interrupted batch is not archived twice
+    with database.engine.begin() as connection:
+        connection.execute(ArchivedTask.__table__.insert().values(
+            id=old[0].id, user_phone='user', task_description='old 0', reminder_time=old[0].reminder_time
+        ))
+    
+    moved = database.archive_tasks(now - timedelta(days=7), batch_size=2)
+    
+    assert moved == 5
+    remaining = {task.id for task in database.get_user_tasks('user', include_sent=True)}
+    assert remaining == {pending.id, recent.id, newest.id}
+    with database.engine.connect() as connection:
+        archived = connection.execute(text('SELECT id FROM tasks_archive ORDER BY id')).scalars().all()
+    assert archived == sorted(task.id for task in old)
+    assert database.archive_tasks(now - timedelta(days=7)) == 0
+    # Ids keep increasing after the delete
+    assert database.add_task('user', 'later', now + timedelta(days=1)).id > newest.id
+
+def test_archive_can_rotate_into_separate_files(database, tmp_path, monkeypatch):
+    """TASK_ARCHIVE_URL with strftime codes sends the rows to a dated SQLite file"""
+    monkeypatch.setattr(Config, 'TASK_ARCHIVE_URL', f"sqlite:///{tmp_path / 'archive-%Y.db'}")
+    now = datetime.now(pytz.utc)
+    task = database.add_task('user', 'done', now - timedelta(days=30))
+    database.add_task('user', 'newest', now + timedelta(days=1))
+    database.mark_task_sent(task.id)
+    
+    assert database.archive_tasks(now - timedelta(days=7)) == 1
+    
+    archive = database.get_archive_engine()
+    assert archive.url.database.endswith(f"archive-{datetime.now():%Y}.db")
+    with archive.connect() as connection:
+        assert connection.execute(text('SELECT task_description FROM tasks_archive')).scalars().all() == ['done']
+    archive.dispose()
+
+def claim_worker(url, worker_id, results, task_cache_path):
+    """Claim due tasks in small batches until none are left (runs in a child process)"""
+    # A spawned child re-imports Config without the test's patches
+    Config.TASK_CACHE_PATH = task_cache_path
+    database = Database(url)
+    claimed = []
+    while True:
+        tasks = database.claim_due_tasks(worker_id, datetime.now(pytz.utc), limit=5)
+        if not tasks:
+            break
+        claimed.extend(task.id for task in tasks)
+    results.put(claimed)
+
+def test_concurrent_workers_never_share_a_task(tmp_path):
+    """Several processes draining one SQLite database each get disjoint tasks"""
+    url = f"sqlite:///{tmp_path / 'reminders.db'}"
+    database = Database(url)
+    due = datetime.now(pytz.utc) - timedelta(minutes=1)
+    session = database.get_session()
+    try:
+        session.add_all(
+            Task(user_phone=f'user{i % 10}', task_description=f'task {i}', reminder_time=due, reminder_at_ms=to_epoch_ms(due))
+            for i in range(200)
+        )
+        session.commit()
+        task_ids = {task_id for (task_id,) in session.query(Task.id)}
+    finally:
+        session.close()
+    database.engine.dispose()
+    
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [context.Process(target=claim_worker, args=(url, f'worker-{i}', results, Config.TASK_CACHE_PATH)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    claimed = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+    
+    all_claims = [task_id for worker_claims in claimed for task_id in worker_claims]
+    assert len(all_claims) == len(set(all_claims))
+    assert set(all_claims) == task_ids
@@ -0,0 +1,55 @@
+import threading
+import pytest
+from datetime import datetime
+from database import Database, Task
+from group_commit import GroupCommitWriter
+from config import Config
+
+def test_concurrent_inserts_share_commits(database):
+    """Many producers get their own ids back while sharing far fewer commits"""
+    writer = GroupCommitWriter(database, window_seconds=0.01)
+    notified = []
+    database.add_task_listener(lambda task: notified.append(task.id))
+    futures = []
+    lock = threading.Lock()
+    
+    def produce(user):
+        for i in range(5):
+            future = writer.submit(Database.new_task(f'user{user}', f'task {i}', datetime(2030, 1, 1)))
+            with lock:
+                futures.append(future)
+    
+    producers = [threading.Thread(target=produce, args=(u,)) for u in range(20)]
+    for producer in producers:
+        producer.start()
+    for producer in producers:
+        producer.join()
+    ids = [future.result(timeout=10).id for future in futures]
+    
+    assert len(set(ids)) == 100
+    assert sorted(notified) == sorted(ids)
+    assert writer.stats()['commits'] < 50
+    assert len(database.get_user_tasks('user7')) == 5
+
+def test_bad_row_fails_alone(database):
+    """A row the database rejects fails its own future; the rest of the batch commits"""
+    writer = GroupCommitWriter(database, window_seconds=0.05)
+    good = writer.submit(Database.new_task('user', 'fine', datetime(2030, 1, 1)))
+    bad = writer.submit(Task(user_phone='user', task_description=None, reminder_time=datetime(2030, 1, 1)))
+    
+    assert good.result(timeout=5).id is not None
+    with pytest.raises(Exception):
+        bad.result(timeout=5)
+    assert [task.task_description for task in database.get_user_tasks('user')] == ['fine']
+
+def test_add_task_uses_the_writer_when_enabled(tmp_path, monkeypatch):
+    """With DB_GROUP_COMMIT on, add_task still returns the committed task"""
+    monkeypatch.setattr(Config, 'DB_GROUP_COMMIT', True)
+    database = Database(f"sqlite:///{tmp_path / 'reminders.db'}")
+    
+    task = database.add_task('user', 'stretch', datetime(2030, 1, 1, 9, 0))
+    
+    assert task.id is not None
+    assert database.writer.stats()['tasks'] == 1
+    assert [t.id for t in database.get_user_tasks('user')] == [task.id]
+    database.engine.dispose()
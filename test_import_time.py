@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Generous enough for a slow CI machine; loading langchain alone takes about a second
+IMPORT_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = ['langchain', 'langchain_openai', 'openai', 'gtts', 'twilio', 'flask']
+
+def import_in_fresh_interpreter(module):
+    """Import a module in a new process; returns (seconds, heavy modules loaded)"""
+    code = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))\n"
+    )
+    env = dict(os.environ, OPENAI_API_KEY='x', TELEGRAM_BOT_TOKEN='x')
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+@pytest.mark.parametrize("module", ['database', 'scheduler', 'task_parser', 'telegram_service', 'app_telegram', 'dispatcher'])
+def test_import_is_cheap(module):
+    """Importing a module loads no LLM/TTS/Twilio client and stays within the budget"""
+    elapsed, heavy = import_in_fresh_interpreter(module)
+    
+    assert heavy == []
+    assert elapsed < IMPORT_BUDGET_SECONDS
+
+def test_parser_builds_llm_on_first_use():
+    """Constructing a TaskParser doesn't touch langchain until the LLM is needed"""
+    code = (
+        "import sys\n"
+        "from task_parser import TaskParser\n"
+        "parser = TaskParser()\n"
+        "parser.parse_simple_reminder('remind me to call mom tomorrow at 5pm')\n"
+        "print('langchain' in sys.modules)\n"
+        "parser.chain\n"
+        "print('langchain' in sys.modules)\n"
+    )
+    env = dict(os.environ, OPENAI_API_KEY='x', PARSE_CACHE_PATH='', PARSE_TEMPLATES_PATH='')
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    
+    assert output.stdout.split() == ['False', 'True']
@@ -0,0 +1,54 @@
+import pytest
+from intent_classifier import IntentClassifier
+
+@pytest.fixture
+def classifier():
+    return IntentClassifier()
+
+@pytest.mark.parametrize("message", [
+    "Remind me to buy milk tomorrow at 9 AM",
+    "don't let me forget the birthday gift for mom",
+    "dentist appointment on Thursday at 10",
+    "call the bank",
+    "hey, remind me to buy eggs",
+    "good morning! remind me to stretch in 15 mins",
+])
+def test_reminders_reach_the_parser(classifier, message):
+    """Anything that looks like a reminder, even without a time, is kept"""
+    assert classifier.classify(message)['intent'] == 'reminder'
+
+@pytest.mark.parametrize("message, kind", [
+    ("hi", 'greeting'),
+    ("good morning", 'greeting'),
+    ("thank you so much!", 'thanks'),
+    ("ok", 'thanks'),
+    ("👍", 'other'),
+    ("what is this bot", 'other'),
+])
+def test_chatter_gets_a_canned_reply(classifier, message, kind):
+    """Greetings, thanks and emoji are answered without parsing"""
+    result = classifier.classify(message)
+    
+    assert result['intent'] == 'chatter'
+    assert result['kind'] == kind
+    assert classifier.reply(result)
+
+@pytest.mark.parametrize("message, command", [
+    ("help", 'help'),
+    ("/list", 'list'),
+    ("List", 'list'),
+    ("/start@ReminderBot", 'start'),
+])
+def test_commands_are_recognized(classifier, message, command):
+    """Bare and slash commands are routed to their handlers"""
+    result = classifier.classify(message)
+    
+    assert result['intent'] == 'command'
+    assert result['command'] == command
+
+def test_counts_per_intent(classifier):
+    """Per-intent counters are reported for /health"""
+    for message in ["hi", "help", "remind me to call mom", "remind me to pay rent"]:
+        classifier.classify(message)
+    
+    assert classifier.stats() == {'reminder': 2, 'command': 1, 'chatter': 1}
@@ -0,0 +1,84 @@
+import json
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from llm_batcher import LLMBatcher, split_batch_answer
+
+class FakeLLM:
+    """Answers single and batched prompts, recording each call"""
+    
+    def __init__(self, drop_ids=()):
+        self.single_calls = 0
+        self.batch_sizes = []
+        self.drop_ids = set(drop_ids)
+        self._lock = threading.Lock()
+    
+    def invoke_single(self, inputs):
+        with self._lock:
+            self.single_calls += 1
+        return {'text': json.dumps({'task_description': inputs['message']})}
+    
+    def invoke_batch(self, batch_inputs):
+        with self._lock:
+            self.batch_sizes.append(len(batch_inputs))
+        # Answer out of order to make sure results are matched by id
+        items = [{'id': i, 'task_description': inputs['message']} for i, inputs in enumerate(batch_inputs)]
+        return {'text': json.dumps([item for item in reversed(items) if item['id'] not in self.drop_ids])}
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+def make_batcher(llm, executor, **kwargs):
+    return LLMBatcher(llm.invoke_single, llm.invoke_batch, executor, **kwargs)
+
+def test_burst_is_sent_as_one_call(executor):
+    """Messages submitted within the window share one LLM call and get their own answers"""
+    llm = FakeLLM()
+    batcher = make_batcher(llm, executor, window_seconds=0.1, max_batch=8)
+    
+    futures = [batcher.submit({'message': f"task {i}"}) for i in range(5)]
+    answers = [json.loads(future.result(timeout=2)['text']) for future in futures]
+    
+    assert [answer['task_description'] for answer in answers] == [f"task {i}" for i in range(5)]
+    assert llm.batch_sizes == [5]
+    assert batcher.stats()['avg_batch_size'] == 5
+
+def test_full_batch_is_not_held_for_the_window(executor):
+    """Reaching max_batch closes the batch immediately"""
+    llm = FakeLLM()
+    batcher = make_batcher(llm, executor, window_seconds=10, max_batch=3)
+    
+    futures = [batcher.submit({'message': f"task {i}"}) for i in range(3)]
+    
+    assert all(future.result(timeout=2) for future in futures)
+    assert llm.batch_sizes == [3]
+
+def test_lone_message_uses_single_prompt(executor):
+    """Without a burst the regular one-message prompt is used"""
+    llm = FakeLLM()
+    batcher = make_batcher(llm, executor, window_seconds=0.01)
+    
+    batcher.submit({'message': "task"}).result(timeout=2)
+    
+    assert llm.single_calls == 1
+    assert llm.batch_sizes == []
+
+def test_missing_answer_fails_only_that_message(executor):
+    """An item the model left out raises for its caller while the others succeed"""
+    llm = FakeLLM(drop_ids={1})
+    batcher = make_batcher(llm, executor, window_seconds=0.1)
+    
+    futures = [batcher.submit({'message': f"task {i}"}) for i in range(3)]
+    
+    assert futures[0].result(timeout=2) and futures[2].result(timeout=2)
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=2)
+
+def test_split_batch_answer_handles_code_fences():
+    """Markdown fences and missing ids (positional answers) are tolerated"""
+    answer = '```json\n[{"task_description": "a"}, {"task_description": "b"}]\n```'
+    
+    results = split_batch_answer(answer, 2)
+    assert [json.loads(result['text'])['task_description'] for result in results] == ['a', 'b']
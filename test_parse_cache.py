@@ -0,0 +1,97 @@
+import pytest
+from datetime import datetime, timedelta
+from parse_cache import ParseCache
+import pytz
+
+TIMEZONE = pytz.timezone('Asia/Kolkata')
+# Sunday, 18 October 2026, 2:21 PM
+NOW = TIMEZONE.localize(datetime(2026, 10, 18, 14, 21))
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a parse cache in a temporary SQLite file"""
+    cache = ParseCache(str(tmp_path / 'parse_cache.db'), TIMEZONE)
+    yield cache
+    cache.close()
+
+def store(cache, message, reminder_time):
+    cache.put(message, {
+        'task_description': 'task',
+        'reminder_time': reminder_time,
+        'confidence': 'high'
+    }, NOW)
+
+def test_offset_is_reanchored(cache):
+    """'in N units' phrasings replay as an offset from the current time"""
+    store(cache, "remind me to drink water in a couple of hours", NOW + timedelta(hours=2))
+    
+    later = NOW + timedelta(days=3, minutes=7)
+    result = cache.get("Remind me to drink  water in a couple of hours!", later)
+    assert result['reminder_time'] == later + timedelta(hours=2)
+    assert result['task_description'] == 'task'
+
+def test_weekday_rule_is_reanchored(cache):
+    """Weekday phrasings replay as the next occurrence of that weekday and time"""
+    store(cache, "ping me friday evening about rent", TIMEZONE.localize(datetime(2026, 10, 23, 18, 0)))
+    
+    # Asked again the following Saturday: next Friday
+    result = cache.get("ping me friday evening about rent", TIMEZONE.localize(datetime(2026, 10, 24, 10, 0)))
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(2026, 10, 30, 18, 0))
+
+def test_relative_day_rule_is_reanchored(cache):
+    """Day-relative phrasings keep the same day offset and clock time"""
+    store(cache, "ping me the day after next at breakfast", TIMEZONE.localize(datetime(2026, 10, 20, 8, 0)))
+    
+    result = cache.get("ping me the day after next at breakfast", TIMEZONE.localize(datetime(2026, 11, 1, 9, 0)))
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(2026, 11, 3, 8, 0))
+
+def test_clock_time_without_a_day_is_the_next_occurrence(cache):
+    """'at 5pm' parsed in the evening is tomorrow's 5 PM, but today's when replayed in the morning"""
+    parsed_at = TIMEZONE.localize(datetime(2026, 10, 18, 18, 0))
+    cache.put("ping me at 5pm to call mom", {
+        'task_description': 'call mom',
+        'reminder_time': TIMEZONE.localize(datetime(2026, 10, 19, 17, 0)),
+        'confidence': 'high'
+    }, parsed_at)
+    
+    result = cache.get("ping me at 5pm to call mom", TIMEZONE.localize(datetime(2026, 10, 19, 10, 0)))
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(2026, 10, 19, 17, 0))
+    result = cache.get("ping me at 5pm to call mom", TIMEZONE.localize(datetime(2026, 10, 19, 18, 0)))
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(2026, 10, 20, 17, 0))
+
+def test_past_absolute_date_is_a_miss(cache):
+    """A cached fixed date that has passed is not replayed"""
+    store(cache, "ping me on 20 October about the visa", TIMEZONE.localize(datetime(2026, 10, 20, 9, 0)))
+    
+    assert cache.get("ping me on 20 October about the visa", NOW) is not None
+    assert cache.get("ping me on 20 October about the visa", NOW + timedelta(days=5)) is None
+
+def test_ttl_and_hit_rate(tmp_path):
+    """Expired entries miss, and counters report the hit rate"""
+    cache = ParseCache(str(tmp_path / 'parse_cache.db'), TIMEZONE, ttl_seconds=0)
+    store(cache, "ping me in 5 minutes", NOW + timedelta(minutes=5))
+    
+    assert cache.get("ping me in 5 minutes", NOW) is None
+    assert cache.stats() == {'hits': 0, 'misses': 1, 'stores': 1, 'hit_rate': 0.0}
+    cache.close()
+
+def test_shared_between_instances(tmp_path):
+    """Another process (here: another connection) sees the same entries"""
+    path = str(tmp_path / 'parse_cache.db')
+    writer, reader = ParseCache(path, TIMEZONE), ParseCache(path, TIMEZONE)
+    store(writer, "ping me in 5 minutes", NOW + timedelta(minutes=5))
+    
+    assert reader.get("ping me in 5 minutes", NOW) is not None
+    writer.close()
+    reader.close()
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entries are evicted beyond max_entries"""
+    cache = ParseCache(str(tmp_path / 'parse_cache.db'), TIMEZONE, max_entries=10)
+    for i in range(100):
+        store(cache, f"ping me in {i + 1} minutes", NOW + timedelta(minutes=i + 1))
+    
+    count = cache._connection.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+    assert count == 10
+    assert cache.get("ping me in 100 minutes", NOW) is not None
+    cache.close()
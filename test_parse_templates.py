@@ -0,0 +1,91 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from parse_templates import TemplateStore, SEED_TEMPLATES
+import pytz
+
+TIMEZONE = pytz.timezone('Asia/Kolkata')
+NOW = TIMEZONE.localize(datetime(2026, 10, 18, 14, 21))
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'parse_templates.json')
+
+@pytest.fixture
+def store(path):
+    """Create a template store backed by a temporary JSON file"""
+    return TemplateStore(path, TIMEZONE)
+
+def parsed(task, reminder_time, confidence='high'):
+    return {'task_description': task, 'reminder_time': reminder_time, 'confidence': confidence}
+
+def test_seed_templates_cover_legacy_rules(store):
+    """The old 'in N units' rules work before anything is learned"""
+    result = store.match("remind me to stretch in 5 minutes", NOW)
+    
+    assert result['task_description'] == 'stretch'
+    assert result['reminder_time'] == NOW + timedelta(minutes=5)
+
+def test_offset_template_scales_number(store):
+    """A learned offset template generalizes over both the task and the number"""
+    store.learn("ping me to feed the fish in 45 mins", parsed('feed the fish', NOW + timedelta(minutes=45)), NOW)
+    
+    result = store.match("Ping me to water the plants in 10 mins", NOW)
+    assert result['task_description'] == 'water the plants'
+    assert result['reminder_time'] == NOW + timedelta(minutes=10)
+
+def test_day_template_generalizes_task(store):
+    """Non-offset templates keep the time literal and replace the task"""
+    store.learn("yo, call mom next week", parsed('call mom', NOW + timedelta(days=7)), NOW)
+    
+    later = NOW + timedelta(days=2)
+    result = store.match("yo, buy bread next week", later)
+    assert result['task_description'] == 'buy bread'
+    assert result['reminder_time'].date() == (later + timedelta(days=7)).date()
+
+@pytest.mark.parametrize("message, task, confidence", [
+    ("ping me on 3 March about rent", 'rent', 'high'),
+    ("ping me to stretch in 5 mins", 'do some stretches', 'high'),
+    ("ping me to stretch in 5 mins", 'stretch', 'medium'),
+])
+def test_does_not_learn_unsafe_parses(store, message, task, confidence):
+    """Fixed dates, rephrased tasks and uncertain parses are not generalized"""
+    before = len(store.templates())
+    store.learn(message, parsed(task, TIMEZONE.localize(datetime(2027, 3, 3, 9, 0)), confidence), NOW)
+    assert len(store.templates()) == before
+
+def test_store_is_persisted_and_inspectable(path, store):
+    """Templates are written as JSON and shared with new store instances"""
+    store.learn("ping me to feed the fish in 45 mins", parsed('feed the fish', NOW + timedelta(minutes=45)), NOW)
+    
+    with open(path) as f:
+        saved = json.load(f)
+    assert len(saved) == len(SEED_TEMPLATES) + 1
+    assert saved[-1]['example'] == "ping me to feed the fish in 45 mins"
+    assert TemplateStore(path, TIMEZONE).match("ping me to eat in 2 mins", NOW) is not None
+
+@pytest.mark.parametrize("message, task", [
+    ("remind me to call the bank next week", 'call the bank next week'),
+    ("remind me to call the bank", 'call the bank'),
+])
+def test_does_not_learn_catch_all_templates(store, message, task):
+    """Without a time outside the task slot, nothing is learned and other messages still go to the LLM"""
+    store.learn(message, parsed(task, NOW + timedelta(days=7)), NOW)
+    
+    assert len(store.templates()) == len(SEED_TEMPLATES)
+    assert store.match("remind me to pay rent on the 1st", NOW) is None
+
+def test_time_in_task_slot_is_not_matched(store):
+    """A learned template does not swallow a second time expression into the task"""
+    store.learn("yo, call mom next week", parsed('call mom', NOW + timedelta(days=7)), NOW)
+    
+    assert store.match("yo, pay rent on monday next week", NOW) is None
+
+def test_clock_template_is_the_next_occurrence(store):
+    """A template learned from 'at 5pm' in the evening still means today's 5 PM the next morning"""
+    parsed_at = TIMEZONE.localize(datetime(2026, 10, 18, 18, 0))
+    store.learn("yo, call mom at 5pm", parsed('call mom', TIMEZONE.localize(datetime(2026, 10, 19, 17, 0))), parsed_at)
+    
+    result = store.match("yo, buy bread at 5pm", TIMEZONE.localize(datetime(2026, 10, 19, 10, 0)))
+    assert result['task_description'] == 'buy bread'
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(2026, 10, 19, 17, 0))
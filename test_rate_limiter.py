@@ -0,0 +1,46 @@
+import asyncio
+import time
+from rate_limiter import TokenBucket, ChatRateLimiter
+
+def test_bucket_allows_burst_then_throttles():
+    """A full bucket serves `capacity` tokens at once, then refills at `rate`"""
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=5)
+        started = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        return time.monotonic() - started
+    
+    elapsed = asyncio.run(run())
+    # 5 immediate + 5 at 20/s
+    assert 0.2 <= elapsed < 0.6
+
+def test_pause_blocks_acquirers():
+    """pause() holds every acquirer back (used for Telegram RetryAfter)"""
+    async def run():
+        bucket = TokenBucket(rate=100)
+        bucket.pause(0.2)
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+    
+    assert asyncio.run(run()) >= 0.2
+
+def test_per_chat_limit_does_not_block_other_chats():
+    """A chat over its budget waits while other chats go through"""
+    async def run():
+        limiter = ChatRateLimiter(global_rate=1000, per_chat_rate=2, per_chat_burst=1)
+        finished = {}
+        
+        async def send(chat_id, count):
+            for _ in range(count):
+                await limiter.acquire(chat_id)
+            finished[chat_id] = time.monotonic()
+        
+        started = time.monotonic()
+        await asyncio.gather(send('busy', 3), *(send(f'chat{i}', 1) for i in range(20)))
+        return {chat: at - started for chat, at in finished.items()}
+    
+    durations = asyncio.run(run())
+    assert durations['busy'] >= 0.9
+    assert max(value for chat, value in durations.items() if chat != 'busy') < 0.2
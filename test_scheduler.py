@@ -0,0 +1,270 @@
+import asyncio
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from scheduler import ReminderScheduler, MAX_REMINDER_LENGTH, summarize_missed
+import app_telegram
+from app_telegram import TelegramReminderScheduler
+import pytz
+from config import Config
+
+class FakeMessenger:
+    """Records reminders instead of sending them"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    def send_reminder(self, to_number, task_description):
+        self.sent.append((to_number, task_description, time.time()))
+        return True
+
+class FlakyMessenger(FakeMessenger):
+    """Fails every send"""
+    
+    def send_reminder(self, to_number, task_description):
+        self.sent.append((to_number, task_description, time.time()))
+        return False
+
+class FakeTelegram:
+    """Stands in for TelegramService; like the real one, loop stays None until the bot starts"""
+    
+    def __init__(self):
+        self.loop = None
+        self.sent = []
+        self.prerendered = []
+    
+    async def send_reminder(self, user_id, task_description):
+        self.sent.append((user_id, task_description))
+        return True
+    
+    def prerender_voice(self, task_description):
+        self.prerendered.append(task_description)
+
+@pytest.fixture
+def scheduler(database):
+    """Create a started scheduler and stop it after the test"""
+    reminder_scheduler = ReminderScheduler(database, FakeMessenger())
+    reminder_scheduler.start()
+    yield reminder_scheduler
+    reminder_scheduler.stop()
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_new_task_is_sent_when_due(database, scheduler):
+    """A task added after start is delivered at its due time, not on the next minute tick"""
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    task = database.add_task('user', 'stretch', now + timedelta(milliseconds=500))
+    
+    assert wait_for(lambda: scheduler.whatsapp_service.sent)
+    sent_at = scheduler.whatsapp_service.sent[0][2]
+    assert sent_at - (now.timestamp() + 0.5) < 1
+    # The send is recorded just before the row is marked sent
+    assert wait_for(lambda: database.get_user_tasks('user') == [])
+    assert database.get_user_tasks('user', include_sent=True)[0].id == task.id
+
+def test_overdue_tasks_loaded_at_startup(database):
+    """Tasks already in the database are picked up when the scheduler starts"""
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    database.add_task('user', 'overdue', now - timedelta(minutes=5))
+    
+    reminder_scheduler = ReminderScheduler(database, FakeMessenger())
+    reminder_scheduler.start()
+    try:
+        assert wait_for(lambda: reminder_scheduler.whatsapp_service.sent)
+        assert reminder_scheduler.whatsapp_service.sent[0][1] == 'overdue'
+    finally:
+        reminder_scheduler.stop()
+
+def test_future_task_stays_queued(database, scheduler):
+    """Tasks due later are kept on the heap and reported in the status"""
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    database.add_task('user', 'later', now + timedelta(hours=1))
+    
+    status = scheduler.get_scheduler_status()
+    assert status['queued_reminders'] == 1
+    assert status['next_due'] is not None
+    assert scheduler.whatsapp_service.sent == []
+
+def test_upcoming_task_ids_respects_horizon(database, scheduler):
+    """The pre-render lookahead only sees tasks inside its window"""
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    soon = [database.add_task('user', f'soon {i}', now + timedelta(minutes=i + 1)).id for i in range(3)]
+    database.add_task('user', 'later', now + timedelta(hours=2))
+    
+    assert scheduler.get_upcoming_task_ids(10 * 60) == set(soon)
+
+def test_failed_send_is_retried_then_given_up(database, monkeypatch):
+    """A failing reminder is retried after REMINDER_RETRY_SECONDS and marked failed after the last attempt"""
+    monkeypatch.setattr(Config, 'REMINDER_RETRY_SECONDS', 0)
+    monkeypatch.setattr(Config, 'REMINDER_MAX_ATTEMPTS', 3)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    database.add_task('user', 'flaky', now - timedelta(seconds=1))
+    
+    reminder_scheduler = ReminderScheduler(database, FlakyMessenger())
+    reminder_scheduler.start()
+    try:
+        assert wait_for(lambda: database.get_user_tasks('user') == [])
+    finally:
+        reminder_scheduler.stop()
+    
+    task = database.get_user_tasks('user', include_sent=True)[0]
+    assert len(reminder_scheduler.whatsapp_service.sent) == 3
+    assert (task.attempts, task.sent_at) == (3, None)
+    assert task.failed_at is not None
+
+def test_stale_policy_collapses_or_drops_old_reminders(database, monkeypatch):
+    """Reminders past REMINDER_STALE_MINUTES become one summary per user, or are dropped"""
+    monkeypatch.setattr(Config, 'REMINDER_STALE_MINUTES', 60)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    for i in range(3):
+        database.add_task('alice', f'old {i}', now - timedelta(hours=3 - i))
+    database.add_task('bob', 'old bob', now - timedelta(hours=2))
+    database.add_task('alice', 'recent', now - timedelta(seconds=5))
+    reminder_scheduler = ReminderScheduler(database, FakeMessenger())
+    tasks = database.claim_due_tasks('test', now)
+    
+    monkeypatch.setattr(Config, 'REMINDER_STALE_POLICY', 'collapse')
+    deliveries, dropped = reminder_scheduler.plan_deliveries(tasks)
+    assert dropped == []
+    assert [(d.user_phone, d.task_description, len(d.tasks), d.late) for d in deliveries] == [
+        ('alice', 'recent', 1, False),
+        ('alice', '3 missed reminders: old 0; old 1; old 2', 3, True),
+        ('bob', 'old bob', 1, True),
+    ]
+    
+    monkeypatch.setattr(Config, 'REMINDER_STALE_POLICY', 'drop')
+    deliveries, dropped = reminder_scheduler.plan_deliveries(tasks)
+    assert [d.task_description for d in deliveries] == ['recent']
+    assert len(dropped) == 4
+
+def test_late_reminders_are_paced(database, monkeypatch):
+    """Catching up on overdue reminders respects REMINDER_CATCHUP_RATE"""
+    monkeypatch.setattr(Config, 'REMINDER_CATCHUP_RATE', 20)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    for i in range(6):
+        database.add_task(f'user{i}', f'overdue {i}', now - timedelta(minutes=10))
+    
+    reminder_scheduler = ReminderScheduler(database, FakeMessenger())
+    reminder_scheduler.check_and_send_reminders()
+    
+    sent_times = [sent_at for _, _, sent_at in reminder_scheduler.whatsapp_service.sent]
+    assert len(sent_times) == 6
+    assert sent_times[-1] - sent_times[0] >= 5 / 20 * 0.9
+    assert all(database.get_user_tasks(f'user{i}') == [] for i in range(6))
+
+def test_reminders_due_together_are_coalesced_per_user(database, monkeypatch):
+    """One message per user for reminders inside REMINDER_COALESCE_SECONDS; the rest stay separate"""
+    monkeypatch.setattr(Config, 'REMINDER_COALESCE_SECONDS', 60)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    database.add_task('alice', 'call mom', now - timedelta(seconds=30))
+    database.add_task('bob', 'stretch', now - timedelta(seconds=20))
+    database.add_task('alice', 'buy milk', now - timedelta(seconds=10))
+    database.add_task('bob', 'water plants', now - timedelta(minutes=5))
+    
+    reminder_scheduler = ReminderScheduler(database, FakeMessenger())
+    reminder_scheduler.check_and_send_reminders()
+    
+    sent = sorted((user, text) for user, text, _ in reminder_scheduler.whatsapp_service.sent)
+    assert sent == [('alice', 'call mom; buy milk'), ('bob', 'stretch'), ('bob', 'water plants')]
+    assert database.get_user_tasks('alice') == database.get_user_tasks('bob') == []
+
+def test_telegram_batch_timeout_records_sent_reminders(database, monkeypatch):
+    """A batch that runs out of time settles what was sent and defers the rest"""
+    class SlowTelegram:
+        def __init__(self):
+            self.sent = []
+        
+        async def send_reminder(self, to_number, task_description):
+            if to_number == 'slow':
+                await asyncio.sleep(60)
+            self.sent.append(to_number)
+            return True
+    
+    monkeypatch.setattr(Config, 'REMINDER_CATCHUP_RATE', 0)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    database.add_task('fast', 'on time', now - timedelta(seconds=5))
+    database.add_task('slow', 'stuck', now - timedelta(seconds=5))
+    reminder_scheduler = TelegramReminderScheduler(database, SlowTelegram())
+    tasks = database.claim_due_tasks(reminder_scheduler.worker_id, now)
+    deliveries, _ = reminder_scheduler.plan_deliveries(tasks)
+    
+    results = asyncio.run(reminder_scheduler.send_batch(deliveries, timeout=0.2))
+    reminder_scheduler.record_outcomes(results)
+    
+    assert sorted((task.user_phone, outcome) for task, outcome in results) == [('fast', 'sent'), ('slow', 'retry')]
+    assert database.get_user_tasks('fast') == []
+    assert [task.task_description for task in database.get_user_tasks('slow')] == ['stuck']
+
+def test_long_reminders_stay_under_message_limit(database, monkeypatch):
+    """Coalesced reminders split before Telegram's limit; missed summaries are cut with (+N more)"""
+    monkeypatch.setattr(Config, 'REMINDER_COALESCE_SECONDS', 60)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    for i in range(12):
+        database.add_task('alice', f'{i} ' + 'x' * 490, now - timedelta(seconds=30))
+    
+    reminder_scheduler = ReminderScheduler(database, FakeMessenger())
+    tasks = database.claim_due_tasks('test', now)
+    deliveries, _ = reminder_scheduler.plan_deliveries(tasks)
+    
+    assert len(deliveries) > 1
+    assert all(len(d.task_description) <= MAX_REMINDER_LENGTH for d in deliveries)
+    assert sum(len(d.tasks) for d in deliveries) == 12
+    
+    summary = summarize_missed(tasks)
+    assert len(summary) <= MAX_REMINDER_LENGTH
+    assert summary.startswith('12 missed reminders: 0 x') and summary.endswith(' more)')
+
+def test_reminders_due_before_the_bot_starts_are_sent_once_it_runs(database, monkeypatch):
+    """Overdue reminders popped while the bot's loop is down are retried shortly, not at the next resync"""
+    monkeypatch.setattr(app_telegram, 'LOOP_RETRY_SECONDS', 0.2)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    database.add_task('42', 'overdue', now - timedelta(minutes=1))
+    telegram = FakeTelegram()
+    reminder_scheduler = TelegramReminderScheduler(database, telegram)
+    loop = asyncio.new_event_loop()
+    
+    reminder_scheduler.start()
+    try:
+        time.sleep(0.5)
+        assert telegram.sent == []
+        
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        telegram.loop = loop
+        assert wait_for(lambda: telegram.sent == [('42', 'overdue')])
+    finally:
+        reminder_scheduler.stop()
+        loop.call_soon_threadsafe(loop.stop)
+
+def test_voice_prerender_tracks_the_window(database, monkeypatch):
+    """Reminders entering VOICE_PRERENDER_MINUTES are rendered once and forgotten after dispatch"""
+    monkeypatch.setattr(Config, 'VOICE_PRERENDER_MINUTES', 5)
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    soon = database.add_task('42', 'soon', now + timedelta(minutes=2))
+    database.add_task('42', 'later', now + timedelta(hours=2))
+    telegram = FakeTelegram()
+    reminder_scheduler = TelegramReminderScheduler(database, telegram)
+    database.add_task_listener(reminder_scheduler.schedule_task)
+    reminder_scheduler.resync()
+    
+    reminder_scheduler.prerender_upcoming_voices()
+    reminder_scheduler.prerender_upcoming_voices()
+    assert telegram.prerendered == ['soon']
+    assert reminder_scheduler._prerendered == {soon.id}
+    
+    # New tasks inside the window are rendered as they are scheduled
+    added = database.add_task('42', 'added', now + timedelta(minutes=1))
+    assert telegram.prerendered == ['soon', 'added']
+    
+    database.mark_task_sent(soon.id)
+    database.mark_task_sent(added.id)
+    reminder_scheduler.resync()
+    reminder_scheduler.prerender_upcoming_voices()
+    assert reminder_scheduler._prerendered == set()
+    assert telegram.prerendered == ['soon', 'added']
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from database import Database
+from task_cache import TaskListCache
+from config import Config
+
+def page(database, user='user'):
+    return [task.task_description for task in database.get_user_tasks(user, limit=10)]
+
+def test_pages_and_counts_are_cached_until_a_write(database):
+    """Repeated reads hit; adding and sending each invalidate exactly that user"""
+    due = datetime(2030, 1, 1, 9, 0)
+    first = database.add_task('user', 'first', due)
+    database.add_task('other', 'theirs', due)
+    
+    assert page(database) == ['first'] and database.count_pending_tasks('user') == 1
+    assert page(database) == ['first'] and database.count_pending_tasks('user') == 1
+    assert page(database, 'other') == ['theirs']
+    assert database.task_cache.stats()['hits'] == 2
+    
+    second = database.add_task('user', 'second', due + timedelta(minutes=1))
+    assert page(database) == ['first', 'second'] and database.count_pending_tasks('user') == 2
+    database.mark_task_sent(first.id)
+    assert page(database) == ['second'] and database.count_pending_tasks('user') == 1
+    database.mark_task_sent(second.id)
+    assert page(database) == [] and database.count_pending_tasks('user') == 0
+    
+    page(database, 'other')
+    stats = database.task_cache.stats()
+    assert stats['hits'] == 3
+    assert 0 < stats['hit_rate'] < 1
+
+def test_read_racing_a_write_is_not_cached():
+    """A result read before an invalidation is dropped instead of stored"""
+    cache = TaskListCache()
+    _, token = cache.lookup('user', 'count')
+    cache.invalidate(['user'])
+    cache.store('user', 'count', 1, token)
+    assert cache.lookup('user', 'count')[0] is None
+    
+    _, token = cache.lookup('user', 'count')
+    cache.store('user', 'count', 2, token)
+    assert cache.lookup('user', 'count')[0] == 2
+
+def test_shared_store_carries_invalidations_between_processes(tmp_path, monkeypatch):
+    """A dispatcher's writes invalidate the web process's cache through TASK_CACHE_PATH"""
+    monkeypatch.setattr(Config, 'TASK_CACHE_PATH', str(tmp_path / 'task_cache.db'))
+    url = f"sqlite:///{tmp_path / 'reminders.db'}"
+    web, dispatcher = Database(url), Database(url)
+    task = web.add_task('user', 'stretch', datetime(2030, 1, 1, 9, 0))
+    
+    assert page(web) == ['stretch']
+    assert page(web) == ['stretch']
+    dispatcher.mark_task_sent(task.id)
+    assert page(web) == []
+    assert web.task_cache.stats()['stale_drops'] == 1
+    
+    for database in (web, dispatcher):
+        database.task_cache.close()
+        database.engine.dispose()
+
+def test_lru_bounds_users():
+    """Least recently used users are evicted; an evicted user's generation never allows a stale hit"""
+    cache = TaskListCache(max_users=2)
+    for user in ['a', 'b', 'c']:
+        _, token = cache.lookup(user, 'count')
+        cache.store(user, 'count', 1, token)
+    assert cache.lookup('a', 'count')[0] is None
+    assert cache.lookup('c', 'count')[0] == 1
+    
+    # Forgotten generations fall back to the highest evicted one: a miss, not stale data
+    _, token = cache.lookup('b', 'count')
+    cache.invalidate(['x', 'y', 'z'])
+    cache.store('b', 'count', 5, token)
+    assert cache.lookup('b', 'count')[0] is None
@@ -1,12 +1,20 @@
+import asyncio
+import time
 import pytest
 from datetime import datetime, timedelta
 from task_parser import TaskParser
+from config import Config
 import pytz
 
 @pytest.fixture
-def parser():
-    """Create a TaskParser instance for testing"""
-    return TaskParser()
+def parser(tmp_path, monkeypatch):
+    """Create a TaskParser instance for testing, with its cache and templates in tmp_path"""
+    monkeypatch.setattr(Config, 'PARSE_CACHE_PATH', str(tmp_path / 'parse_cache.db'))
+    monkeypatch.setattr(Config, 'PARSE_TEMPLATES_PATH', str(tmp_path / 'parse_templates.json'))
+    parser = TaskParser()
+    parse_cache = parser.parse_cache
+    yield parser
+    parse_cache.close()
 
 def test_parse_simple_reminder(parser):
     """Test parsing a simple reminder message"""
@@ -41,3 +49,119 @@ def test_timezone_awareness(parser):
     
     if result:
         assert result['reminder_time'].tzinfo is not None
+
+class SlowAsyncChain:
+    """Answers after a delay without blocking the event loop, tracking overlap"""
+    
+    def __init__(self, delay):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def ainvoke(self, inputs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return {'text': '{"task_description": "call John", "reminder_datetime": "2099-01-01 10:00:00", "confidence": "high"}'}
+
+def test_async_parses_overlap_and_keep_the_loop_free(parser):
+    """Concurrent aparse_message calls wait on the LLM together while the loop keeps running"""
+    parser.chain = SlowAsyncChain(0.3)
+    parser.batcher = None
+    
+    async def run():
+        beats = []
+        
+        async def heartbeat():
+            while True:
+                beats.append(time.monotonic())
+                await asyncio.sleep(0.01)
+        
+        beat = asyncio.ensure_future(heartbeat())
+        started = time.monotonic()
+        results = await asyncio.gather(*(parser.aparse_message(f"remind me to call contact number {i}") for i in range(5)))
+        elapsed = time.monotonic() - started
+        beat.cancel()
+        return results, elapsed, beats
+    
+    results, elapsed, beats = asyncio.run(run())
+    
+    assert all(result['task_description'] == 'call John' for result in results)
+    assert parser.chain.max_in_flight == 5
+    assert elapsed < 5 * 0.3 / 2
+    # The loop was never held for long while the LLM calls were pending
+    assert max(b - a for a, b in zip(beats, beats[1:])) < 0.1
+
+class FakeChain:
+    """Stands in for the LLM chain with a fixed delay and answer"""
+    
+    def __init__(self, delays, answer=None, error=None):
+        self.delays = list(delays)
+        self.answer = answer or '{"task_description": "call John", "reminder_datetime": "2099-01-01 10:00:00", "confidence": "high"}'
+        self.error = error
+        self.calls = 0
+    
+    def _next_delay(self):
+        self.calls += 1
+        return self.delays.pop(0) if len(self.delays) > 1 else self.delays[0]
+    
+    def invoke(self, inputs):
+        time.sleep(self._next_delay())
+        if self.error:
+            raise self.error
+        return {'text': self.answer}
+    
+    async def ainvoke(self, inputs):
+        await asyncio.sleep(self._next_delay())
+        if self.error:
+            raise self.error
+        return {'text': self.answer}
+
+@pytest.fixture
+def offline_parser(parser, monkeypatch):
+    """Parser without shared caches and with a short latency budget"""
+    monkeypatch.setattr(Config, 'LLM_TIMEOUT_SECONDS', 0.2)
+    parser.parse_cache = None
+    parser.templates = None
+    return parser
+
+def test_llm_timeout_falls_back_to_local_parser(offline_parser):
+    """A slow LLM is abandoned at the deadline and the local guess is used"""
+    offline_parser.chain = FakeChain([1.0])
+    
+    started = time.monotonic()
+    result = offline_parser.parse_message("remind me to call John")
+    
+    assert time.monotonic() - started < 0.5
+    assert result['task_description'] == 'call John'
+    assert result['confidence'] == 'low'
+    assert offline_parser.metrics.snapshot()['outcomes'] == {'timeout_fallback': 1}
+
+@pytest.mark.parametrize("chain", [
+    FakeChain([0], error=RuntimeError("rate limited")),
+    FakeChain([0], answer="not json")
+])
+def test_llm_error_falls_back_to_local_parser(offline_parser, chain):
+    """API errors and unusable answers degrade to the local guess"""
+    offline_parser.chain = chain
+    
+    result = asyncio.run(offline_parser.aparse_message("remind me to call John"))
+    
+    assert result['confidence'] == 'low'
+    assert offline_parser.metrics.snapshot()['outcomes'] == {'error_fallback': 1}
+
+def test_hedged_request_wins_over_slow_one(offline_parser):
+    """After the p95 a second request is sent and the faster answer is used"""
+    for _ in range(20):
+        offline_parser.metrics.observe_latency(0.02)
+    offline_parser.metrics.hedge_enabled = True
+    offline_parser.chain = FakeChain([1.0, 0.01])
+    
+    result = asyncio.run(offline_parser.aparse_message("remind me to call John"))
+    
+    assert result['confidence'] == 'high'
+    assert offline_parser.chain.calls == 2
+    assert offline_parser.metrics.snapshot()['outcomes'] == {'hedged': 1, 'llm_hit': 1}
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from config import Config
+from voice_cache import VoiceCache
+
+pytest.importorskip('aiosqlite')
+from async_database import AsyncDatabase
+from telegram_service import TelegramService, MESSAGE_LIMIT
+
+def callback(markup, label):
+    """callback_data of the button whose text contains `label`"""
+    return next(button.callback_data for button in markup.inline_keyboard[0] if label in button.text)
+
+def test_list_is_paged_with_buttons(database, monkeypatch):
+    """/list pages stay under Telegram's limit and page forward and back by cursor"""
+    monkeypatch.setattr(Config, 'LIST_PAGE_SIZE', 3)
+    due = datetime(2030, 1, 1, 9, 0)
+    for i in range(7):
+        database.add_task('42', f'task {i} ' + 'x' * 490, due + timedelta(minutes=i))
+    
+    async def run():
+        service = TelegramService.__new__(TelegramService)
+        service._async_database = AsyncDatabase(database)
+        try:
+            pages = [await service.task_page('42')]
+            for _ in range(2):
+                _, _, start, ms, task_id = callback(pages[-1][1], 'Next').split(':')
+                pages.append(await service.task_page('42', int(start), after=(int(ms), int(task_id))))
+            _, _, start, ms, task_id = callback(pages[-1][1], 'Previous').split(':')
+            pages.append(await service.task_page('42', int(start), before=(int(ms), int(task_id))))
+            return pages
+        finally:
+            await service._async_database.dispose()
+    
+    pages = asyncio.run(run())
+    first, second, third, back = [text for text, _ in pages]
+    assert all(len(text) <= MESSAGE_LIMIT for text in (first, second, third))
+    assert first.count('⏰') == 3 and third.count('⏰') == 1
+    assert '\n1. task 0' in first and '\n4. task 3' in second and '\n7. task 6' in third
+    assert back == second
+    assert [button.text for button in pages[0][1].inline_keyboard[0]] == ['Next ➡️']
+    assert [button.text for button in pages[2][1].inline_keyboard[0]] == ['⬅️ Previous']
+
+def test_connection_pool_covers_concurrent_sends(monkeypatch):
+    """Every concurrent send gets a connection, with room left for handlers"""
+    monkeypatch.setattr(Config, 'TELEGRAM_MAX_CONCURRENT_SENDS', 20)
+    service = TelegramService.__new__(TelegramService)
+    service.bot_token = '123:abc'
+    service._on_startup = None
+    
+    application = service._build_application()
+    
+    assert TelegramService.connection_pool_size() > 20
+    assert application.bot.request._client_kwargs['limits'].max_connections == TelegramService.connection_pool_size()
+
+class FakeTTS:
+    """Records which thread synthesizes what"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, text, lang):
+        self.calls.append((text, threading.current_thread().name))
+        return b'mp3' * 10
+
+class FakeBot:
+    """Records sends; every uploaded voice note gets the same file_id"""
+    
+    def __init__(self):
+        self.voices = []
+    
+    async def send_message(self, chat_id, text):
+        pass
+    
+    async def send_voice(self, chat_id, voice, caption, filename=None):
+        self.voices.append(voice)
+        return SimpleNamespace(voice=SimpleNamespace(file_id='FILE1'))
+
+def test_prerendered_voice_is_reused_at_send_time(tmp_path):
+    """Pre-rendering synthesizes in the TTS pool; the send uploads that clip, later sends reuse its file_id"""
+    service = TelegramService.__new__(TelegramService)
+    service.voice_cache = VoiceCache(str(tmp_path), max_disk_bytes=10 ** 6, max_memory_bytes=10 ** 6)
+    service.tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tts')
+    service._synthesize = FakeTTS()
+    service.application = SimpleNamespace(bot=FakeBot())
+    
+    service.prerender_voice('stretch').result(timeout=5)
+    assert service._synthesize.calls == [('Reminder: stretch', 'tts_0')]
+    
+    assert asyncio.run(service.send_reminder('42', 'stretch'))
+    assert asyncio.run(service.send_reminder('42', 'stretch'))
+    
+    assert service.application.bot.voices == [b'mp3' * 10, 'FILE1']
+    assert len(service._synthesize.calls) == 1
+    assert service.prerender_voice('stretch') is None
+    service.tts_executor.shutdown()
@@ -0,0 +1,126 @@
+import pytest
+from datetime import datetime
+from time_grammar import TimeGrammar
+import pytz
+
+TIMEZONE = pytz.timezone('Asia/Kolkata')
+# Sunday, 18 October 2026, 2:21 PM
+NOW = TIMEZONE.localize(datetime(2026, 10, 18, 14, 21))
+
+@pytest.fixture
+def grammar():
+    """Create a grammar in a fixed timezone"""
+    return TimeGrammar(TIMEZONE)
+
+@pytest.mark.parametrize("message, task, expected", [
+    ("Remind me to buy milk tomorrow at 9 AM", "buy milk", (2026, 10, 19, 9, 0)),
+    ("Remind me to call mom tomorrow at 3pm", "call mom", (2026, 10, 19, 15, 0)),
+    ("Remind me to stretch at 17:30", "stretch", (2026, 10, 18, 17, 30)),
+    ("remind me to wake up at 7:45 am", "wake up", (2026, 10, 19, 7, 45)),
+    ("Remind me to submit report on Thursday", "submit report", (2026, 10, 22, 9, 0)),
+    ("remind me to workout tomorrow", "workout", (2026, 10, 19, 9, 0)),
+    ("remind me to pray at 6 in the morning", "pray", (2026, 10, 19, 6, 0)),
+    ("remind me to sleep tonight", "sleep", (2026, 10, 18, 20, 0)),
+    ("remind me to go out this evening", "go out", (2026, 10, 18, 18, 0)),
+    ("remind me to pay rent on 5th March", "pay rent", (2027, 3, 5, 9, 0)),
+    ("remind me to renew passport on December 1 at 10am", "renew passport", (2026, 12, 1, 10, 0)),
+    ("remind me to file taxes on 2026-12-01 at 8:15 pm", "file taxes", (2026, 12, 1, 20, 15)),
+    ("remind me on sat to wash car", "wash car", (2026, 10, 24, 9, 0)),
+    ("remind me to call the bank day after tomorrow at noon", "call the bank", (2026, 10, 20, 12, 0)),
+    ("tomorrow at 10am remind me to call bob", "call bob", (2026, 10, 19, 10, 0)),
+    ("remind me to water plants today at 9am", "water plants", (2026, 10, 19, 9, 0)),
+])
+def test_absolute_expressions(grammar, message, task, expected):
+    """Clock times, weekdays, dates and parts of day resolve in the configured timezone"""
+    result = grammar.parse(message, NOW)
+    
+    assert result is not None
+    assert result['task_description'] == task
+    assert result['confidence'] == 'high'
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(*expected))
+
+@pytest.mark.parametrize("message, minutes", [
+    ("remind me to drink water in 1 hour", 60),
+    ("remind me to check the oven in half an hour", 30),
+    ("remind me to stand up in 20 mins", 20),
+    ("remind me to call back within two hours", 120),
+    ("Remind me about the meeting in 2 hours", 120),
+    ("remind me to rest after 30 seconds", 0.5),
+])
+def test_relative_expressions(grammar, message, minutes):
+    """'in/within/after N units' adds an offset to the current time"""
+    result = grammar.parse(message, NOW)
+    
+    assert result is not None
+    assert (result['reminder_time'] - NOW).total_seconds() == minutes * 60
+
+@pytest.mark.parametrize("message, expected", [
+    ("Remind me to submit report before Friday morning", (2026, 10, 23, 8, 0)),
+    ("remind me to pay bills by 5pm", (2026, 10, 18, 16, 0)),
+    ("remind me to buy petrol before Friday", (2026, 10, 22, 18, 0)),
+])
+def test_deadlines_remind_ahead(grammar, message, expected):
+    """'before/by X' fires ahead of the deadline"""
+    result = grammar.parse(message, NOW)
+    
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(*expected))
+
+@pytest.mark.parametrize("message", [
+    "remind me to call John",
+    "remind me to apply sun cream",
+    "hello there",
+    "remind me to do it sometime next quarter",
+    "remind me to eat lunch",
+    "remind me to take my morning pills",
+])
+def test_unrecognized_time_falls_through(grammar, message):
+    """Messages without a recognized time expression are left to the LLM"""
+    assert grammar.parse(message, NOW) is None
+
+def test_abbreviated_weekday_needs_a_marker(grammar):
+    """'sun' in a task is not mistaken for Sunday"""
+    result = grammar.parse("remind me to apply sun cream at 9am", NOW)
+    
+    assert result['task_description'] == "apply sun cream"
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(2026, 10, 19, 9, 0))
+
+@pytest.mark.parametrize("message", [
+    "remind me to call mom in 3 days at 5pm",
+    "remind me to pay the plumber in 2 weeks on monday",
+    "remind me to send the march 3 report tomorrow",
+    "remind me to sleep early tonight at 2",
+    "remind me to wake up at 6 tomorrow",
+    "remind me to call mom on Friday at 6",
+    "remind me to call mom at 5pm on 12/25",
+    "remind me to pay rent at 9am on the 1st",
+    "remind me to call mom at 5pm next week",
+    "remind me to renew the lease at 5pm next month",
+    "remind me to call mom at 5pm on 25/12/2026",
+    "remind me to drink water every day at 5pm",
+])
+def test_partial_or_ambiguous_parses_are_low_confidence(grammar, message):
+    """An unused second time expression or a bare hour leaves the decision to the LLM"""
+    result = grammar.parse(message, NOW)
+    
+    assert result is not None
+    assert result['confidence'] == 'low'
+
+def test_part_of_day_settles_a_bare_hour(grammar):
+    """'at 6 in the evening' needs no am/pm"""
+    result = grammar.parse("remind me to call mom on Friday at 6 in the evening", NOW)
+    
+    assert result['confidence'] == 'high'
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(2026, 10, 23, 18, 0))
+
+@pytest.mark.parametrize("message, task, expected", [
+    ("remind me to take my morning pills tomorrow", "take my morning pills", (2026, 10, 19, 9, 0)),
+    ("remind me to eat lunch at 1pm", "eat lunch", (2026, 10, 19, 13, 0)),
+    ("remind me to cook dinner tonight", "cook dinner", (2026, 10, 18, 20, 0)),
+])
+def test_part_of_day_words_in_the_task_stay_in_the_task(grammar, message, task, expected):
+    """Meal and part-of-day words without a marker are task text, not the time"""
+    result = grammar.parse(message, NOW)
+    
+    assert result['task_description'] == task
+    assert result['confidence'] == 'high'
+    assert result['reminder_time'] == TIMEZONE.localize(datetime(*expected))
@@ -0,0 +1,105 @@
+import os
+import pytest
+from voice_cache import VoiceCache
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a voice cache in a temporary directory"""
+    return VoiceCache(str(tmp_path), max_disk_bytes=1000, max_memory_bytes=100)
+
+class CountingSynth:
+    def __init__(self, size=40):
+        self.calls = 0
+        self.size = size
+    
+    def __call__(self, text, lang):
+        self.calls += 1
+        return (text.encode() * self.size)[:self.size]
+
+def test_identical_text_synthesized_once(cache):
+    """Repeated reminders reuse the cached audio, even with different spacing/case"""
+    synth = CountingSynth()
+    first = cache.get_audio("Reminder: take medicine", 'en', synth)
+    second = cache.get_audio("reminder:   Take medicine ", 'en', synth)
+    
+    assert first == second
+    assert synth.calls == 1
+    assert cache.stats['memory_hits'] == 1
+
+def test_language_is_part_of_key(cache):
+    """The same text in a different language is synthesized separately"""
+    synth = CountingSynth()
+    cache.get_audio("Reminder", 'en', synth)
+    cache.get_audio("Reminder", 'de', synth)
+    assert synth.calls == 2
+
+def test_disk_cache_survives_restart(tmp_path):
+    """A fresh process reads audio and file_ids from disk"""
+    synth = CountingSynth()
+    cache = VoiceCache(str(tmp_path), max_disk_bytes=1000, max_memory_bytes=100)
+    cache.get_audio("Reminder: stretch", 'en', synth)
+    cache.remember_file_id("Reminder: stretch", 'en', 'FILE123')
+    
+    restarted = VoiceCache(str(tmp_path), max_disk_bytes=1000, max_memory_bytes=100)
+    assert restarted.get_file_id("Reminder: stretch", 'en') == 'FILE123'
+    restarted.get_audio("Reminder: stretch", 'en', synth)
+    assert synth.calls == 1
+    assert restarted.stats['disk_hits'] == 1
+
+def test_disk_and_memory_are_bounded(cache, tmp_path):
+    """Old clips are evicted once the byte budgets are exceeded"""
+    synth = CountingSynth(size=300)
+    for i in range(10):
+        cache.get_audio(f"Reminder {i}", 'en', synth)
+    
+    total = sum(path.stat().st_size for path in tmp_path.glob('*.mp3'))
+    assert total <= 1000
+    assert cache._memory_bytes <= 100
+
+def test_forget_file_id(cache):
+    """A rejected file_id is dropped so the next send re-uploads"""
+    cache.remember_file_id("Reminder", 'en', 'OLD')
+    cache.forget_file_id("Reminder", 'en')
+    assert cache.get_file_id("Reminder", 'en') is None
+
+def test_file_id_hits_keep_a_clip_on_disk(tmp_path):
+    """A clip reused by file_id counts as recently used, so colder clips are evicted first"""
+    synth = CountingSynth(size=300)
+    cache = VoiceCache(str(tmp_path), max_disk_bytes=1000, max_memory_bytes=100)
+    cache.get_audio("Reminder: daily pills", 'en', synth)
+    cache.remember_file_id("Reminder: daily pills", 'en', 'PILLS')
+    for path in tmp_path.glob('*.mp3'):
+        os.utime(path, (1, 1))
+    
+    for i in range(3):
+        cache.get_audio(f"Reminder {i}", 'en', synth)
+        assert cache.get_file_id("Reminder: daily pills", 'en') == 'PILLS'
+    
+    restarted = VoiceCache(str(tmp_path), max_disk_bytes=1000, max_memory_bytes=100)
+    assert restarted.get_file_id("Reminder: daily pills", 'en') == 'PILLS'
+    assert sum(path.stat().st_size for path in tmp_path.glob('*.mp3')) <= 1000
+
+def test_file_ids_are_bounded(tmp_path):
+    """Only the most recently used file_ids stay in memory"""
+    cache = VoiceCache(str(tmp_path), max_disk_bytes=1000, max_memory_bytes=100, max_file_ids=3)
+    for i in range(5):
+        cache.remember_file_id(f"Reminder {i}", 'en', f'FILE{i}')
+    
+    assert len(cache._file_ids) == 3
+    # Evicted from memory, still found on disk
+    assert cache.get_file_id("Reminder 0", 'en') == 'FILE0'
+
+def test_directory_is_scanned_only_when_over_budget(cache, monkeypatch):
+    """Writes keep a running size instead of listing the directory every time"""
+    synth = CountingSynth(size=100)
+    cache.get_audio("Reminder first", 'en', synth)
+    scans = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, 'listdir', lambda path: scans.append(path) or listdir(path))
+    
+    for i in range(5):
+        cache.get_audio(f"Reminder {i}", 'en', synth)
+    assert scans == []
+    for i in range(5, 10):
+        cache.get_audio(f"Reminder {i}", 'en', synth)
+    assert len(scans) == 1
@@ -0,0 +1,71 @@
+import time
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from database import Database
+from scheduler import ReminderScheduler
+from wake_signal import WakeSender, WakeListener
+import pytz
+from config import Config
+
+class FakeMessenger:
+    """Records reminders instead of sending them"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    def send_reminder(self, to_number, task_description):
+        self.sent.append(task_description)
+        return True
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+@pytest.fixture
+def dispatcher(tmp_path):
+    """A dispatcher-side scheduler listening for wake signals on a free port"""
+    url = f"sqlite:///{tmp_path / 'reminders.db'}"
+    reminder_scheduler = ReminderScheduler(Database(url), FakeMessenger())
+    reminder_scheduler.start()
+    listener = WakeListener('127.0.0.1:0', reminder_scheduler.wake)
+    listener.start()
+    yield url, reminder_scheduler, listener
+    listener.stop()
+    reminder_scheduler.stop()
+    reminder_scheduler.database.engine.dispose()
+
+def test_task_from_another_process_is_sent_on_time(dispatcher):
+    """A web/bot process's insert wakes the dispatcher without waiting for a resync"""
+    url, reminder_scheduler, listener = dispatcher
+    web_database = Database(url)
+    web_database.add_task_listener(WakeSender('%s:%d' % listener.address, horizon_seconds=300).notify)
+    
+    now = datetime.now(pytz.timezone(Config.DEFAULT_TIMEZONE))
+    web_database.add_task('user', 'stretch', now + timedelta(milliseconds=300))
+    
+    assert wait_for(lambda: reminder_scheduler.whatsapp_service.sent == ['stretch'])
+    assert listener.received == 1
+    web_database.engine.dispose()
+
+def test_far_future_tasks_are_left_to_resync():
+    """Only tasks due before the next resync are signalled"""
+    sender = WakeSender('127.0.0.1:9', horizon_seconds=60)
+    now_ms = int(time.time() * 1000)
+    
+    sender.notify(SimpleNamespace(id=1, reminder_at_ms=now_ms + 30 * 1000))
+    sender.notify(SimpleNamespace(id=2, reminder_at_ms=now_ms + 3600 * 1000))
+    
+    assert sender.sent == 1
+
+def test_empty_address_disables_signal():
+    """An empty DISPATCHER_WAKE_ADDRESS turns both ends into no-ops"""
+    sender = WakeSender('', horizon_seconds=60)
+    sender.notify(SimpleNamespace(id=1, reminder_at_ms=int(time.time() * 1000)))
+    WakeListener('', lambda task_id, reminder_at_ms: None).start()
+    
+    assert sender.sent == 0
@@ -0,0 +1,360 @@
+"""
+Rule-based time grammar for common reminder phrasings
+
+Resolves messages like "remind me to X tomorrow at 3pm", "on Friday at 6",
+"before Friday morning", "at 17:30", "on 5th March" or "in 2 hours" locally,
+so they never need an LLM call. All patterns are compiled once at import.
+
+Semantics (kept in line with the LLM prompt in task_parser.py):
+- A day without a time means 9 AM ("today" alone means 6 PM, "tonight" 8 PM)
+- A time without a day means the next occurrence of that time
+- A part of day counts only with a marker ("in the morning", "at lunch") or
+  right after a day ("Friday morning"); "eat lunch" is task text
+- "at 6" without am/pm means 6 PM for hours 1-7, otherwise as written, but
+  only as a guess: like a second time expression the parse did not use
+  ("in 3 days at 5pm") or date-like text it cannot resolve ("on 12/25",
+  "next month", "every day"), it makes the result low-confidence so the LLM decides
+- "before/by X" reminds ahead of the deadline: the evening before a bare day,
+  or DEADLINE_LEAD before a specific time
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Dict
+import re
+
+WEEKDAYS = {
+    'monday': 0, 'mon': 0, 'tuesday': 1, 'tue': 1, 'tues': 1,
+    'wednesday': 2, 'wed': 2, 'thursday': 3, 'thu': 3, 'thur': 3, 'thurs': 3,
+    'friday': 4, 'fri': 4, 'saturday': 5, 'sat': 5, 'sunday': 6, 'sun': 6,
+}
+
+MONTHS = {
+    'january': 1, 'jan': 1, 'february': 2, 'feb': 2, 'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4, 'may': 5, 'june': 6, 'jun': 6, 'july': 7, 'jul': 7,
+    'august': 8, 'aug': 8, 'september': 9, 'sep': 9, 'sept': 9,
+    'october': 10, 'oct': 10, 'november': 11, 'nov': 11, 'december': 12, 'dec': 12,
+}
+
+PARTS_OF_DAY = {
+    'morning': (9, 0), 'noon': (12, 0), 'midday': (12, 0), 'lunch': (13, 0),
+    'afternoon': (14, 0), 'evening': (18, 0), 'night': (20, 0), 'midnight': (0, 0),
+}
+
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'fifteen': 15, 'twenty': 20, 'thirty': 30,
+}
+
+UNITS = {
+    's': 'seconds', 'sec': 'seconds', 'secs': 'seconds', 'second': 'seconds', 'seconds': 'seconds',
+    'm': 'minutes', 'min': 'minutes', 'mins': 'minutes', 'minute': 'minutes', 'minutes': 'minutes',
+    'h': 'hours', 'hr': 'hours', 'hrs': 'hours', 'hour': 'hours', 'hours': 'hours',
+    'd': 'days', 'day': 'days', 'days': 'days', 'week': 'weeks', 'weeks': 'weeks',
+}
+
+DEFAULT_HOUR = 9
+TODAY_HOUR = 18
+TONIGHT_HOUR = 20
+DEADLINE_LEAD = timedelta(hours=1)
+
+def _alternation(words):
+    # Longest first so "thursday" wins over "thu"
+    return '|'.join(sorted((re.escape(word) for word in words), key=len, reverse=True))
+
+_AMOUNT = rf"\d+|{_alternation(NUMBER_WORDS)}"
+
+_TRIGGER = re.compile(
+    r"\b(?:remind\s+me|reminder|remember|don'?t\s+let\s+me\s+forget)\b\s*(?:to|about|that|of)?\s*",
+    re.IGNORECASE
+)
+
+_RELATIVE = re.compile(
+    rf"\b(?:in|within|after)\s+(?:(?P<half>half\s+an?\s+hour)|(?P<amount>{_AMOUNT})\s*(?P<unit>{_alternation(UNITS)})\b)"
+    rf"(?:\s+and\s+a\s+half)?",
+    re.IGNORECASE
+)
+
+_RELATIVE_DAY = re.compile(
+    r"\b(?P<day>day\s+after\s+tomorrow|tomorrow|tmrw|tmr|today|tonight)\b",
+    re.IGNORECASE
+)
+
+# Abbreviations ("sun", "sat", "wed") need an "on"/"next"/... in front to count as a day
+_WEEKDAY = re.compile(
+    rf"\b(?:(?:on|this|coming|next)\s+)*(?P<weekday>{_alternation(w for w in WEEKDAYS if w.endswith('day'))})\b"
+    rf"|\b(?:on|this|coming|next)\s+(?P<weekday_abbr>{_alternation(w for w in WEEKDAYS if not w.endswith('day'))})\b\.?",
+    re.IGNORECASE
+)
+
+_DATE = re.compile(
+    rf"\b(?:on\s+)?(?:the\s+)?(?:"
+    rf"(?P<day1>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month1>{_alternation(MONTHS)})"
+    rf"|(?P<month2>{_alternation(MONTHS)})\.?\s+(?P<day2>\d{{1,2}})(?:st|nd|rd|th)?"
+    rf"|(?P<iso_year>\d{{4}})-(?P<iso_month>\d{{1,2}})-(?P<iso_day>\d{{1,2}})"
+    rf")\b(?:,?\s+(?P<year>\d{{4}})\b)?",
+    re.IGNORECASE
+)
+
+_CLOCK = re.compile(
+    r"(?:\b(?:at|@)\s*|\b)"
+    r"(?:(?P<hour>\d{1,2})(?:[:.](?P<minute>[0-5]\d))?\s*(?P<meridiem>[ap])\.?\s*m\b\.?"
+    r"|(?P<hour24>[01]?\d|2[0-3]):(?P<minute24>[0-5]\d)\b"
+    r"|(?<=at )(?P<bare_hour>\d{1,2})\b(?![:.%]\d|\s*(?:%|percent|mins?|minutes?|hours?|days?)))",
+    re.IGNORECASE
+)
+
+# Only a time with a marker ("in the morning") or right after a day ("Friday morning"):
+# "eat lunch" or "my morning pills" are part of the task
+_PART_OF_DAY = re.compile(
+    rf"\b(?:(?P<marker>in\s+the|this|at|by|around)\s+)?(?P<part>{_alternation(PARTS_OF_DAY)})\b",
+    re.IGNORECASE
+)
+
+_MARKED_PART_OF_DAY = re.compile(
+    rf"\b(?:in\s+the|this|at|by|around)\s+(?:{_alternation(PARTS_OF_DAY)})\b",
+    re.IGNORECASE
+)
+
+# Date-like text the grammar cannot resolve ("on 12/25", "the 1st", "next month", "every day")
+_UNRESOLVED = re.compile(
+    rf"\d|\b(?:every|daily|weekly|monthly|weekend|fortnight|{_alternation(MONTHS)})\b"
+    rf"|\b(?:next|this|coming|following)\s+(?:week|month|year)\b",
+    re.IGNORECASE
+)
+
+# Any of these left outside the parsed spans means the parse missed part of the time
+_LEFTOVER_PATTERNS = (_RELATIVE, _RELATIVE_DAY, _WEEKDAY, _DATE, _CLOCK, _MARKED_PART_OF_DAY, _UNRESOLVED)
+
+_DEADLINE = re.compile(r"\b(?P<word>before|by|until|no\s+later\s+than)\s+(?:the\s+)?$", re.IGNORECASE)
+
+# Connectors left dangling once the time expression is cut out of the task text
+_TRAILING_JUNK = re.compile(r"(?:[\s,.;:!-]|\b(?:on|at|by|around|and)\b)+$", re.IGNORECASE)
+_LEADING_JUNK = re.compile(r"^(?:[\s,.;:!-]|\b(?:to|about|that|of|and)\b)+", re.IGNORECASE)
+
+
+class TimeGrammar:
+    """Deterministic parser for reminder time expressions"""
+    
+    def __init__(self, timezone):
+        self.timezone = timezone
+    
+    def extract_task(self, message: str, spans=()) -> Optional[str]:
+        """Task text after the 'remind me ...' trigger, with time expressions removed"""
+        trigger = _TRIGGER.search(message)
+        if not trigger:
+            return None
+        
+        text = self._blank(message, spans)
+        task = text[trigger.end():]
+        if not task.strip():
+            # "Tomorrow at 9, remind me" - take what precedes the trigger instead
+            task = text[:trigger.start()]
+        task = ' '.join(task.split())
+        task = _TRAILING_JUNK.sub('', _LEADING_JUNK.sub('', task))
+        return task or None
+    
+    def parse(self, message: str, now: datetime) -> Optional[Dict]:
+        """
+        Resolve a reminder message without an LLM
+        
+        Args:
+            message: User's message text
+            now: Current timezone-aware time in the configured timezone
+        
+        Returns:
+            Dictionary with task_description, reminder_time and confidence 'high'
+            ('low' if part of the time was ambiguous or left unparsed), or None
+            if the message has no recognized time expression
+        """
+        relative = _RELATIVE.search(message)
+        if relative:
+            reminder_time = now + self._offset(relative)
+            task = self.extract_task(message, [relative.span()])
+            if not task:
+                return None
+            return self._result(task, reminder_time, self._leftover(message, [relative.span()]))
+        
+        spans = []
+        date = None
+        day_kind = None
+        
+        match = _DATE.search(message)
+        if match:
+            date = self._resolve_date(match, now)
+            if date is None:
+                return None
+            spans.append(match.span())
+            day_kind = 'date'
+        else:
+            match = _RELATIVE_DAY.search(message)
+            if match:
+                word = ' '.join(match.group('day').lower().split())
+                offset = {'today': 0, 'tonight': 0, 'tomorrow': 1, 'tmrw': 1, 'tmr': 1, 'day after tomorrow': 2}[word]
+                date = (now + timedelta(days=offset)).date()
+                spans.append(match.span())
+                day_kind = word
+            else:
+                match = _WEEKDAY.search(message)
+                if match:
+                    weekday = WEEKDAYS[(match.group('weekday') or match.group('weekday_abbr')).lower()]
+                    date = (now + timedelta(days=(weekday - now.weekday()) % 7)).date()
+                    spans.append(match.span())
+                    day_kind = 'weekday'
+        
+        clock = None
+        clock_match = _CLOCK.search(message)
+        if clock_match and not any(self._overlaps(clock_match.span(), span) for span in spans):
+            clock = self._resolve_clock(clock_match)
+            if clock is None:
+                return None
+            spans.append(clock_match.span())
+        
+        part = None
+        part_match = self._part_of_day(message, spans)
+        if part_match:
+            part = part_match.group('part').lower()
+            spans.append(part_match.span())
+        
+        if not spans:
+            return None
+        
+        ambiguous = False
+        if clock:
+            hour, minute, bare = clock
+            # "at 6" could be morning or evening unless a part of day says which
+            ambiguous = bare and part is None and 1 <= hour <= 12
+            if bare:
+                # "at 6": a part of day decides, otherwise 1-7 means the evening
+                if part in ('afternoon', 'evening', 'night'):
+                    hour = hour + 12 if hour < 12 else hour
+                elif part is None and 1 <= hour <= 7:
+                    hour += 12
+        elif part:
+            hour, minute = PARTS_OF_DAY[part]
+        elif day_kind == 'tonight':
+            hour, minute = TONIGHT_HOUR, 0
+        elif day_kind == 'today':
+            hour, minute = TODAY_HOUR, 0
+        else:
+            hour, minute = DEFAULT_HOUR, 0
+        
+        deadline = self._deadline(message, min(start for start, _ in spans))
+        
+        if date is None:
+            # Time of day only: the next time the clock shows it
+            reminder_time = self._localize(now.date(), hour, minute)
+            if reminder_time <= now:
+                reminder_time = self._localize((now + timedelta(days=1)).date(), hour, minute)
+        else:
+            reminder_time = self._localize(date, hour, minute)
+            if day_kind == 'weekday' and reminder_time <= now:
+                reminder_time = self._localize(date + timedelta(days=7), hour, minute)
+        
+        if deadline:
+            spans.append(deadline)
+            if clock or part:
+                reminder_time = reminder_time - DEADLINE_LEAD
+            else:
+                # "before Friday": the evening before
+                reminder_time = self._localize(reminder_time.date() - timedelta(days=1), TODAY_HOUR, 0)
+        
+        if reminder_time <= now and day_kind in ('today', 'tonight'):
+            # "today at 9am" said at noon: assume the next occurrence
+            reminder_time = self._localize(reminder_time.date() + timedelta(days=1), reminder_time.hour, reminder_time.minute)
+        if reminder_time <= now:
+            return None
+        
+        task = self.extract_task(message, spans)
+        if not task:
+            return None
+        return self._result(task, reminder_time, ambiguous or self._leftover(message, spans))
+    
+    @staticmethod
+    def _result(task, reminder_time, uncertain=False):
+        return {
+            'task_description': task,
+            'reminder_time': reminder_time,
+            'confidence': 'low' if uncertain else 'high'
+        }
+    
+    @staticmethod
+    def _blank(message, spans):
+        """Message with the spans replaced by spaces, so other offsets stay valid"""
+        text = message
+        for start, end in sorted(spans, reverse=True):
+            text = text[:start] + ' ' * (end - start) + text[end:]
+        return text
+    
+    def _leftover(self, message, spans):
+        """Whether a time expression remains outside the spans the parse used"""
+        text = self._blank(message, spans)
+        return any(pattern.search(text) for pattern in _LEFTOVER_PATTERNS)
+    
+    def _part_of_day(self, message, spans):
+        """First part of day with a marker or directly after a parsed day or time, or None"""
+        for match in _PART_OF_DAY.finditer(message):
+            if any(self._overlaps(match.span(), span) for span in spans):
+                continue
+            if match.group('marker') or any(end <= match.start() and not message[end:match.start()].strip() for _, end in spans):
+                return match
+        return None
+    
+    @staticmethod
+    def _overlaps(a, b):
+        return a[0] < b[1] and b[0] < a[1]
+    
+    def _localize(self, date, hour, minute):
+        return self.timezone.localize(datetime(date.year, date.month, date.day, hour, minute))
+    
+    @staticmethod
+    def _offset(match):
+        if match.group('half'):
+            return timedelta(minutes=30)
+        amount = match.group('amount').lower()
+        amount = int(amount) if amount.isdigit() else NUMBER_WORDS[amount]
+        unit = UNITS[match.group('unit').lower()]
+        offset = timedelta(**{unit: amount})
+        if match.group(0).lower().endswith('and a half'):
+            offset += timedelta(**{unit: 0.5})
+        return offset
+    
+    @staticmethod
+    def _resolve_clock(match):
+        """(hour, minute, bare) for a clock match, or None if out of range"""
+        if match.group('meridiem'):
+            hour = int(match.group('hour'))
+            minute = int(match.group('minute') or 0)
+            if not 1 <= hour <= 12:
+                return None
+            hour = hour % 12 + (12 if match.group('meridiem').lower() == 'p' else 0)
+            return hour, minute, False
+        if match.group('hour24') is not None:
+            return int(match.group('hour24')), int(match.group('minute24')), False
+        hour = int(match.group('bare_hour'))
+        if hour > 23:
+            return None
+        return hour, 0, True
+    
+    def _resolve_date(self, match, now):
+        try:
+            if match.group('iso_year'):
+                year = int(match.group('iso_year'))
+                month = int(match.group('iso_month'))
+                day = int(match.group('iso_day'))
+                return datetime(year, month, day).date()
+            day = int(match.group('day1') or match.group('day2'))
+            month = MONTHS[(match.group('month1') or match.group('month2')).lower()]
+            if match.group('year'):
+                return datetime(int(match.group('year')), month, day).date()
+            date = datetime(now.year, month, day).date()
+            if date < now.date():
+                date = datetime(now.year + 1, month, day).date()
+            return date
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _deadline(message, first_start):
+        """Span of a 'before'/'by' directly in front of the time expression, if any"""
+        match = _DEADLINE.search(message[:first_start])
+        return match.span() if match else None
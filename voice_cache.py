@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+class VoiceCache:
+    """Content-addressed cache for synthesized voice reminders
+    
+    Audio is keyed by normalized text + language and kept in a size-bounded
+    in-memory LRU backed by a size-bounded directory of MP3 files. Once a
+    clip has been uploaded, its Telegram file_id is remembered so later sends
+    can reference it without synthesis or upload. A file_id hit counts as a
+    use of the clip, so often-sent reminders are the last to be evicted.
+    
+    Methods touch the disk; call them from a worker thread, not the event loop.
+    """
+    
+    def __init__(self, cache_dir: str, max_disk_bytes: int, max_memory_bytes: int, max_file_ids: int = 10000):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_file_ids = max_file_ids
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._file_ids = OrderedDict()
+        # Running size of the MP3 directory; None until first measured
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+        self.stats = {'file_id_hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def key(text: str, lang: str) -> str:
+        """Cache key: whitespace- and case-normalized text plus language"""
+        normalized = ' '.join(text.split()).casefold()
+        return hashlib.sha256(f"{lang}\0{normalized}".encode('utf-8')).hexdigest()
+    
+    def _path(self, key, suffix):
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+    
+    def get_file_id(self, text: str, lang: str):
+        """Telegram file_id for a previously uploaded clip, or None"""
+        key = self.key(text, lang)
+        with self._lock:
+            file_id = self._file_ids.get(key)
+            if file_id is not None:
+                self._file_ids.move_to_end(key)
+        if file_id is None:
+            try:
+                with open(self._path(key, '.id'), 'r') as f:
+                    file_id = f.read().strip() or None
+            except OSError:
+                return None
+            if file_id:
+                self._remember_file_id(key, file_id)
+        if file_id:
+            self.stats['file_id_hits'] += 1
+            # Keep the clip recently used for the disk LRU
+            try:
+                os.utime(self._path(key, '.mp3'))
+            except OSError:
+                pass
+        return file_id
+    
+    def _remember_file_id(self, key, file_id):
+        with self._lock:
+            self._file_ids[key] = file_id
+            self._file_ids.move_to_end(key)
+            while len(self._file_ids) > self.max_file_ids:
+                self._file_ids.popitem(last=False)
+    
+    def remember_file_id(self, text: str, lang: str, file_id: str):
+        """Store the file_id Telegram returned for an uploaded clip"""
+        key = self.key(text, lang)
+        self._remember_file_id(key, file_id)
+        try:
+            with open(self._path(key, '.id'), 'w') as f:
+                f.write(file_id)
+        except OSError as e:
+            print(f"⚠️ Could not persist voice file_id: {e}")
+    
+    def forget_file_id(self, text: str, lang: str):
+        """Drop a file_id Telegram no longer accepts"""
+        key = self.key(text, lang)
+        with self._lock:
+            self._file_ids.pop(key, None)
+        try:
+            os.unlink(self._path(key, '.id'))
+        except OSError:
+            pass
+    
+    def get_audio(self, text: str, lang: str, synthesize):
+        """MP3 bytes for `text`, calling synthesize(text, lang) only on a cache miss"""
+        key = self.key(text, lang)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return audio
+        
+        path = self._path(key, '.mp3')
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+            os.utime(path)
+            self.stats['disk_hits'] += 1
+        except OSError:
+            self.stats['misses'] += 1
+            audio = synthesize(text, lang)
+            self._write_disk(path, audio)
+        
+        self._remember_memory(key, audio)
+        return audio
+    
+    def _remember_memory(self, key, audio):
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = audio
+            self._memory_bytes += len(audio)
+            while self._memory_bytes > self.max_memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+    
+    def _write_disk(self, path, audio):
+        try:
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(audio)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not write voice cache file: {e}")
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(audio)
+            over_budget = self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+    
+    def _evict_disk(self):
+        """
+        Remove least recently used clips until the directory fits the budget
+        
+        Only runs when the running size says the budget is exceeded (or is not
+        known yet), and frees down to 90% of it so the next writes don't rescan.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.mp3'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        
+        target = self.max_disk_bytes * 0.9 if total > self.max_disk_bytes else total
+        for _, size, name in sorted(entries):
+            if total <= target:
+                break
+            key = name[:-len('.mp3')]
+            for suffix in ('.mp3', '.id'):
+                try:
+                    os.unlink(self._path(key, suffix))
+                except OSError:
+                    pass
+            with self._lock:
+                self._file_ids.pop(key, None)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,81 @@
+"""
+Cross-process wake-up for the standalone dispatcher
+
+Web and bot processes only insert tasks; when a task is due before the
+dispatcher's next resync they send it a one-line UDP datagram
+("<task_id> <reminder_at_ms>") so it goes straight onto the dispatcher's
+timer heap. Delivery is best effort - a lost datagram only means the task is
+picked up by the next REMINDER_RESYNC_MINUTES reload.
+"""
+
+from typing import Callable, Optional, Tuple
+import socket
+import threading
+import time
+
+
+def parse_address(address: str) -> Optional[Tuple[str, int]]:
+    """'host:port' -> (host, port); None for an empty address (signal disabled)"""
+    if not address:
+        return None
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class WakeSender:
+    """Task listener that tells the dispatcher about near-term tasks"""
+    
+    def __init__(self, address: str, horizon_seconds: float):
+        self.address = parse_address(address)
+        self.horizon_seconds = horizon_seconds
+        self.sent = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    
+    def notify(self, task):
+        """Database.add_task listener: signal tasks due before the next resync"""
+        if self.address is None or task.reminder_at_ms / 1000 - time.time() > self.horizon_seconds:
+            return
+        try:
+            self._socket.sendto(f"{task.id} {task.reminder_at_ms}".encode(), self.address)
+            self.sent += 1
+        except OSError as e:
+            print(f"⚠️ Could not signal dispatcher: {e}")
+
+
+class WakeListener:
+    """Receives wake datagrams in a daemon thread and hands them to a callback"""
+    
+    def __init__(self, address: str, callback: Callable[[int, int], None]):
+        self.address = parse_address(address)
+        self.callback = callback
+        self.received = 0
+        self._socket = None
+        self._thread = None
+    
+    def start(self):
+        if self.address is None:
+            return
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(self.address)
+        # Port 0 in the address means "any free port"; report the real one
+        self.address = self._socket.getsockname()[:2]
+        self._thread = threading.Thread(target=self._listen, name='dispatcher-wake', daemon=True)
+        self._thread.start()
+        print(f"👂 Listening for new-task signals on {self.address[0]}:{self.address[1]}")
+    
+    def stop(self):
+        if self._socket:
+            self._socket.close()
+    
+    def _listen(self):
+        while True:
+            try:
+                data, _ = self._socket.recvfrom(64)
+            except OSError:
+                return
+            try:
+                task_id, reminder_at_ms = (int(part) for part in data.split())
+            except ValueError:
+                continue
+            self.received += 1
+            self.callback(task_id, reminder_at_ms)
@@ -1,13 +1,20 @@
-from twilio.rest import Client
 from config import Config
 
 class WhatsAppService:
     """Service for sending WhatsApp messages via Twilio"""
     
     def __init__(self):
-        self.client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+        self._client = None
         self.from_number = Config.TWILIO_WHATSAPP_NUMBER
     
+    @property
+    def client(self):
+        """Twilio client, created (and twilio imported) on first send"""
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+        return self._client
+    
     def send_message(self, to_number, message):
         """
         Send a WhatsApp message to a user